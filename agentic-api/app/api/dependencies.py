@@ -1,27 +1,21 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db, SessionLocal
+from app.db.session import get_db, get_async_db
 from app.models.user import User
 from app.config import settings
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+from app.core.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(
+# Runs on every authenticated request: async, so a cache miss doesn't take a threadpool slot
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    from app.crud.user import get_user_by_email  # <-- ONLY import here!
-
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -35,9 +29,13 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = get_user_by_email(db, email)
+    user = await user_cache.aget(email)
+    if user is not None:
+        return user
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
     if user is None:
         raise credentials_exception
+    await user_cache.aset(email, user)
     return user
 
 def admin_required(current_user: User = Depends(get_current_user)):
@@ -1 +0,0 @@
-from .scan_api import router as scan_api_router
\ No newline at end of file
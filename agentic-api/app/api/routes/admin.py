@@ -1,41 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 from typing import Optional
 
 from app.db.session import get_db
 from app.models.user import User
-from app.schemas.user import UserRead, UserUpdate, UserCreate, UserListResponse
+from app.schemas.user import (
+    UserRead, UserUpdate, UserCreate, UserListResponse,
+    UserImportResult, BulkUserUpdate, BulkUserUpdateResult,
+)
 from app.api.dependencies import admin_required
-from app.core.security import hash_password
-from app.utils.email import send_email
+from app.core.security import hash_password_blocking
+from app.core.compression import compression_stats
+from app.core.password_hasher import password_hasher
+from app.core.user_cache import user_cache
+from app.db.replicas import replica_router
+from app.crud.user_search import count_users, list_users_page, user_count_cache
+from app.service.email_outbox_service import enqueue_email, notify_outbox
+from app.service.user_import_service import ImportTooLarge, bulk_update_users, import_users, parse_import
 from app.utils.token import generate_token
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
-# List users with pagination, filtering
+# List users with keyset pagination and indexed search
 @router.get("/users", response_model=UserListResponse)
 def list_all_users(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(10, le=100),
+    skip: int = Query(0, ge=0, description="Legacy offset paging; prefer cursor"),
+    limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
     admin: User = Depends(admin_required),
 ):
-    query = db.query(User)
-    if search:
-        search_like = f"%{search}%"
-        query = query.filter(
-            or_(
-                User.email.ilike(search_like),
-                User.name.ilike(search_like),
-                User.role.ilike(search_like)
-            )
-        )
-    total = query.count()
-    users = query.offset(skip).limit(limit).all()
-    return {"users": [UserRead.from_orm(u) for u in users], "total": total}
+    after_id = None
+    if cursor:
+        try:
+            after_id = int(cursor)
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    users, next_id = list_users_page(db, limit, search=search, after_id=after_id, skip=skip)
+    return {
+        "users": [UserRead.from_orm(u) for u in users],
+        "total": count_users(db, search),
+        "next_cursor": str(next_id) if next_id is not None else None,
+    }
 
 # Create user (admin only)
 @router.post("/users", response_model=UserRead, status_code=201)
@@ -51,15 +59,43 @@ def admin_create_user(
         email=user_create.email,
         name=user_create.name,
         role=user_create.role or "user",
-        hashed_password=hash_password(user_create.password),
+        hashed_password=hash_password_blocking(user_create.password),
         status="active",
         is_verified=True,
     )
     db.add(user_obj)
     db.commit()
     db.refresh(user_obj)
+    user_count_cache.clear()
     return UserRead.from_orm(user_obj)
 
+# Bulk import from a CSV / NDJSON / JSON request body
+@router.post("/users/import", response_model=UserImportResult)
+async def admin_import_users(
+    request: Request,
+    send_invites: bool = Query(True, description="Invite rows without a password to set one"),
+    db: Session = Depends(get_db),
+    admin: User = Depends(admin_required),
+):
+    try:
+        rows = parse_import(request.headers.get("content-type", ""), request.stream())
+        return await import_users(db, rows, send_invites=send_invites)
+    except ImportTooLarge as e:
+        raise HTTPException(413, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+# Apply role / status to many users at once
+@router.post("/users/bulk-update", response_model=BulkUserUpdateResult)
+def admin_bulk_update_users(
+    payload: BulkUserUpdate,
+    db: Session = Depends(get_db),
+    admin: User = Depends(admin_required),
+):
+    if payload.role is None and payload.status is None:
+        raise HTTPException(400, "Nothing to update: set role and/or status")
+    return bulk_update_users(db, payload.user_ids, role=payload.role, status=payload.status)
+
 # Admin updates any user
 @router.patch("/users/{user_id}", response_model=UserRead)
 def admin_update_user(
@@ -78,6 +114,7 @@ def admin_update_user(
     if user_update.status is not None:
         user.status = user_update.status
     db.commit()
+    user_cache.invalidate(user.email)
     db.refresh(user)
     return UserRead.from_orm(user)
 
@@ -95,11 +132,29 @@ def admin_reset_password(
     expires = datetime.utcnow() + timedelta(hours=1)
     user.reset_token = token
     user.reset_token_expires = expires
-    db.commit()
     reset_link = f"https://yourdomain.com/reset-password?token={token}"
-    send_email(
+    enqueue_email(
+        db,
         user.email,
         "Password Reset Request",
-        f"An admin requested a password reset for your account. Click here: {reset_link}"
+        f"An admin requested a password reset for your account. Click here: {reset_link}",
+        dedupe_key=f"reset:{user.id}",
     )
+    db.commit()
+    notify_outbox()
     return {"message": "Reset email sent."}
+
+# Password hashing pool: queue depth, rejections, latency
+@router.get("/metrics/password-hasher")
+def password_hasher_metrics(admin: User = Depends(admin_required)):
+    return password_hasher.metrics()
+
+# Response compression: encodings chosen, bytes saved, CPU spent
+@router.get("/metrics/compression")
+def compression_metrics(admin: User = Depends(admin_required)):
+    return compression_stats.as_dict()
+
+# Read-replica health and how reads were routed
+@router.get("/metrics/db-replicas")
+def db_replica_metrics(admin: User = Depends(admin_required)):
+    return replica_router.stats()
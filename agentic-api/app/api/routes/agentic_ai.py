@@ -1,16 +1,35 @@
 # app/api/routes/agentic_ai.py
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import Optional, List, Dict, Any, Tuple
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, constr, conlist, ConfigDict
-from sqlalchemy import text, bindparam
 from sqlalchemy.exc import SQLAlchemyError
-
-from app.utils.llm import ask_llm, LLM_ENABLED
-from app.db.session import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.utils.llm import ask_llm, stream_llm, llm_metrics, LLM_ENABLED, OPENAI_MODEL, LLM_TEMPERATURE
+from app.utils.llm_backends import LLMError
+from app.utils.llm_cache import response_cache, make_cache_key, LLM_CACHE_ENABLED
+from app.utils.context_index import ScanContextIndex, scan_index_cache
+from app.crud.profile import get_profile_columns, get_profile_version
+from app.service.scan_digest_service import digest_version, get_scan_digests
+from app.service.ai_intent_router import answer_structured_question
+from app.service.conversation_service import (
+    SessionBusy,
+    build_session_messages,
+    compact_session,
+    conversation_store,
+    new_session,
+)
+from app.utils.llm_limits import estimate_tokens
+from app.db.replicas import get_async_read_db, replica_router
+from app.api.dependencies import admin_required
 from slowapi.util import get_remote_address
 from slowapi import Limiter
 
@@ -19,22 +38,32 @@ log = logging.getLogger(__name__)
 
 # --- Config knobs (centralized for easy tuning) ---
 MAX_CONTEXT_ROWS = 600            # hard cap on rows pulled into prompt
+MAX_INDEX_ROWS = 50_000           # hard cap on columns indexed per scan
+CONTEXT_TOKEN_BUDGET = 4_000      # prompt budget for all scan context
+COLUMN_DETAIL_BUDGET = 1_500      # share of the budget reserved for column lines
 MAX_TABLES_FILTER = 50            # avoid massive IN clauses
 MAX_QUESTION_LEN = 1_000          # protect LLM & logs
 DEFAULT_ROW_LIMIT = 500           # per-scan default fetch limit (<= MAX_CONTEXT_ROWS)
+ANSWER_MAX_TOKENS = 700
+MAX_BATCH_QUESTIONS = 50
+BATCH_CONCURRENCY = 8             # batch questions in flight per client
+LLM_TIMEOUT_S = 25.0
 
 # If you're already attaching a global limiter in app.main, you can reuse it:
 limiter: Limiter | None = getattr(router, "limiter", None)  # app.main may set app.state.limiter
 # ---------------------------------------------------
 
 
-# --- DB dependency (explicit, testable) ---
-def get_db():
-    db = SessionLocal()
+# --- DB access ---
+async def _run_db(db: AsyncSession, fn, *args):
+    """
+    Runs the sync helper `fn(session, *args)` on the async session (no thread),
+    then releases the connection so it isn't held across the LLM call.
+    """
     try:
-        yield db
+        return await db.run_sync(fn, *args)
     finally:
-        db.close()
+        await db.close()
 
 
 # --- Schemas ---
@@ -44,7 +73,7 @@ class AskPayload(BaseModel):
     scan_id: Optional[constr(strip_whitespace=True, min_length=1, max_length=200)] = Field(
         default=None, description="Scan/job ID to scope context"
     )
-    scope_tables: Optional[conlist(constr(strip_whitespace=True, min_length=1, max_length=256), max_items=MAX_TABLES_FILTER)] = Field(
+    scope_tables: Optional[conlist(constr(strip_whitespace=True, min_length=1, max_length=256), max_length=MAX_TABLES_FILTER)] = Field(
         default=None, description="Optional list of table names to focus on"
     )
     question: constr(strip_whitespace=True, min_length=3, max_length=MAX_QUESTION_LEN)
@@ -52,12 +81,68 @@ class AskPayload(BaseModel):
         default=DEFAULT_ROW_LIMIT, ge=1, le=MAX_CONTEXT_ROWS, description="Max rows to include from profiling results"
     )
 
+class AskBatchPayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    scan_id: Optional[constr(strip_whitespace=True, min_length=1, max_length=200)] = Field(
+        default=None, description="Scan/job ID to scope context"
+    )
+    scope_tables: Optional[conlist(constr(strip_whitespace=True, min_length=1, max_length=256), max_length=MAX_TABLES_FILTER)] = Field(
+        default=None, description="Optional list of table names to focus on"
+    )
+    questions: conlist(
+        constr(strip_whitespace=True, min_length=3, max_length=MAX_QUESTION_LEN), min_length=1, max_length=MAX_BATCH_QUESTIONS
+    )
+    row_limit: Optional[int] = Field(
+        default=DEFAULT_ROW_LIMIT, ge=1, le=MAX_CONTEXT_ROWS, description="Max rows to include from profiling results"
+    )
+
 class AskResponse(BaseModel):
     model_config = ConfigDict(extra="forbid")
     answer: str
     context_summary: Optional[str] = Field(
         default=None, description="Short note of what context was used (counts, truncation hints)"
     )
+    cached: bool = Field(default=False, description="True when the answer was served from the response cache")
+    intent: Optional[str] = Field(
+        default=None, description="Structured intent answered directly from profiling results (no LLM call)"
+    )
+
+
+class SessionCreatePayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    scan_id: Optional[constr(strip_whitespace=True, min_length=1, max_length=200)] = Field(
+        default=None, description="Scan/job ID to scope context"
+    )
+    scope_tables: Optional[conlist(constr(strip_whitespace=True, min_length=1, max_length=256), max_length=MAX_TABLES_FILTER)] = Field(
+        default=None, description="Optional list of table names to focus on"
+    )
+    row_limit: Optional[int] = Field(
+        default=DEFAULT_ROW_LIMIT, ge=1, le=MAX_CONTEXT_ROWS, description="Max rows to include from profiling results"
+    )
+
+class SessionAskPayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    question: constr(strip_whitespace=True, min_length=3, max_length=MAX_QUESTION_LEN)
+
+class SessionTurn(BaseModel):
+    question: str
+    answer: str
+
+class SessionResponse(BaseModel):
+    session_id: str
+    scan_id: Optional[str] = None
+    scope_tables: Optional[List[str]] = None
+    context_summary: Optional[str] = None
+    summary: str = Field(default="", description="Rolling summary of turns no longer sent verbatim")
+    summarized_turns: int = 0
+    turns: List[SessionTurn] = Field(default_factory=list, description="Recent turns sent verbatim")
+
+class SessionAskResponse(AskResponse):
+    session_id: str
+    turn: int = Field(description="1-based number of this turn in the session")
+    est_prompt_tokens: int = Field(default=0, description="Estimated prompt tokens sent to the LLM for this turn")
 
 
 # --- Internal helpers ---
@@ -74,78 +159,118 @@ def _normalize_table_list(scope_tables: Optional[List[str]]) -> Optional[List[st
     return out[:MAX_TABLES_FILTER]
 
 
-def _fetch_scan_context(
-    db, scan_id: Optional[str], scope_tables: Optional[List[str]], row_limit: int
+def _load_scan_index(db, scan_id: str, version: str) -> ScanContextIndex:
+    """Retrieval index over every profiled column of a scan (cached per process and data version)."""
+    key = f"{scan_id}@{version}"
+    index = scan_index_cache.get(key)
+    if index is None:
+        index = ScanContextIndex(get_profile_columns(db, scan_id, MAX_INDEX_ROWS))
+        scan_index_cache.put(key, index)
+    return index
+
+
+def _load_scan_context(db, scan_id: str):
+    # Versioned cache keys: a new profile run or digest build changes the
+    # context (and with it the answer cache key) in every process at once
+    digests_at = digest_version(db, scan_id)
+    profile_at = get_profile_version(db, scan_id)
+    index = _load_scan_index(db, scan_id, f"{profile_at}/{digests_at}")
+    return get_scan_digests(db, scan_id, digests_at, profile_at), index
+
+
+async def _load_scan_context_async(db: AsyncSession, scan_id: str):
+    try:
+        return await _run_db(db, _load_scan_context, scan_id)
+    except SQLAlchemyError as e:
+        log.exception("DB error while fetching scan context")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to load scan context") from e
+
+
+async def _fetch_scan_context(
+    db: AsyncSession,
+    scan_id: Optional[str],
+    scope_tables: Optional[List[str]],
+    row_limit: int,
+    question: str,
+    loaded=None,
 ) -> Tuple[str, str]:
     """
-    Builds a compact, model-friendly context string from profiling tables.
-    Returns: (context_text, summary_text)
+    Assembles prompt context top-down within CONTEXT_TOKEN_BUDGET:
+    the scan digest, then digests of the tables relevant to `question`
+    (or of `scope_tables`), then the best-matching column lines.
+    `loaded` is a (digests, index) pair from _load_scan_context, when the
+    caller already has one. Returns: (context_text, summary_text)
     """
     if not scan_id:
         return "No scan context provided.", "context=none (no scan_id)"
 
-    # NOTE: Adjust table/column names to your schema.
-    # This query assumes tables: profile_result_column (prc), profile_run (pr)
-    base_sql = """
-        SELECT
-            prc.table_name      AS table_name,
-            prc.column_name     AS column_name,
-            prc.data_type       AS data_type,
-            prc.null_percent    AS null_percent,
-            prc.distinct_percent AS distinct_percent,
-            prc.is_pii          AS is_pii,
-            prc.quality_score   AS quality_score
-        FROM profile_result_column prc
-        JOIN profile_run pr ON prc.run_id = pr.id
-        WHERE pr.scan_id = :scan_id
-    """
+    digests, index = loaded or await _load_scan_context_async(db, scan_id)
 
-    params: Dict[str, Any] = {"scan_id": scan_id, "row_limit": int(row_limit)}
+    if digests.scan is None or not len(index):
+        return "No rows found for the given scan.", "context=empty"
+
+    scope_tables = _normalize_table_list(scope_tables)
+    scan_text, used = digests.scan
+    sections = ["SCAN DIGEST:\n" + scan_text]
+
+    # Table level: scoped tables, else the tables whose columns match the question
+    table_lines: List[str] = []
+    for table in scope_tables or index.rank_tables(question):
+        digest = digests.tables.get(table)
+        if digest is None:
+            continue
+        if used + digest[1] > CONTEXT_TOKEN_BUDGET - COLUMN_DETAIL_BUDGET:
+            break
+        table_lines.append(digest[0])
+        used += digest[1]
+    if table_lines:
+        sections.append("TABLE DIGESTS:\n" + "\n".join(table_lines))
+
+    # Column level: only when the question (or scope) points at specific columns
+    lines, stats = index.select(
+        question,
+        top_k=min(int(row_limit), MAX_CONTEXT_ROWS),
+        token_budget=min(COLUMN_DETAIL_BUDGET, CONTEXT_TOKEN_BUDGET - used),
+        scope_tables=scope_tables,
+    )
+    if stats["selection"] == "bm25" or scope_tables:
+        sections.append("COLUMN DETAIL:\n" + "\n".join(lines))
+        used += stats["est_tokens"]
+    else:
+        lines = []
 
-    table_filter_sql = ""
-    if scope_tables:
-        # Use list-expanding bindparam for safe IN (...)
-        scope_tables = _normalize_table_list(scope_tables)
-        if scope_tables:
-            table_filter_sql = " AND prc.table_name IN :tables "
-            params["tables"] = scope_tables  # expanded safely via bindparam(expanding=True)
+    # Final prompt context
+    context_text = "SCAN CONTEXT:\n" + "\n\n".join(sections)
+    summary = (
+        f"context_rows={stats['candidates']}; tables={len(table_lines)}; included={len(lines)}; "
+        f"est_tokens={used}; selection={stats['selection']}"
+    )
+    return context_text, summary
 
-    order_limit_sql = " ORDER BY prc.table_name, prc.column_name LIMIT :row_limit "
-    sql = base_sql + table_filter_sql + order_limit_sql
 
+async def _fast_path_answer(
+    db: AsyncSession, scan_id: Optional[str], question: str, scope_tables: Optional[List[str]]
+) -> Optional[Tuple[str, str]]:
+    """(intent, answer) for questions the profile tables answer exactly; None otherwise."""
     try:
-        stmt = text(sql)
-        if "tables" in params:
-            stmt = stmt.bindparams(bindparam("tables", expanding=True))
-        rows = db.execute(stmt, params).fetchall()
+        return await _run_db(db, answer_structured_question, scan_id, question, _normalize_table_list(scope_tables))
     except SQLAlchemyError as e:
-        log.exception("DB error while fetching scan context")
+        log.exception("DB error while answering structured question")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to load scan context") from e
 
-    if not rows:
-        return "No rows found for the given scan.", "context=empty"
 
-    # Build compact lines. Keep stable ordering & predictable formatting for the prompt.
-    lines: List[str] = []
-    for r in rows:
-        # Be defensive with None values to avoid 'None' noise in prompts.
-        table = (getattr(r, "table_name", "") or "").strip()
-        col = (getattr(r, "column_name", "") or "").strip()
-        dtype = (getattr(r, "data_type", "") or "").strip()
-        nullp = getattr(r, "null_percent", None)
-        distp = getattr(r, "distinct_percent", None)
-        pii = getattr(r, "is_pii", None)
-        qscore = getattr(r, "quality_score", None)
-        lines.append(
-            f"{table}.{col} | type={dtype} | null%={nullp if nullp is not None else 'na'} | "
-            f"distinct%={distp if distp is not None else 'na'} | pii={pii if pii is not None else 'na'} | "
-            f"qscore={qscore if qscore is not None else 'na'}"
-        )
+def _answer_cache_key(question: str, scan_id: Optional[str], context_text: str) -> str:
+    return make_cache_key(
+        question,
+        context_text,
+        OPENAI_MODEL,
+        {"max_tokens": ANSWER_MAX_TOKENS, "temperature": LLM_TEMPERATURE},
+        scan_id=scan_id,
+    )
 
-    # Final prompt context
-    context_text = "SCAN CONTEXT:\n" + "\n".join(lines[:MAX_CONTEXT_ROWS])
-    summary = f"context_rows={len(lines)}; included={min(len(lines), MAX_CONTEXT_ROWS)}; tables={len(scope_tables or [])}"
-    return context_text, summary
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 def _build_messages(question: str, context: str) -> List[Dict[str, str]]:
@@ -163,6 +288,62 @@ def _build_messages(question: str, context: str) -> List[Dict[str, str]]:
     ]
 
 
+async def _answer_question(
+    db: AsyncSession,
+    *,
+    scan_id: Optional[str],
+    scope_tables: Optional[List[str]],
+    question: str,
+    row_limit: int,
+    user_key: Optional[str],
+    scan_context=None,
+) -> AskResponse:
+    """One question end to end: fast path, context, cache, LLM. Raises HTTPException."""
+    # Structured questions are answered exactly from the profile tables
+    fast = await _fast_path_answer(db, scan_id, question, scope_tables)
+    if fast is not None:
+        intent, answer = fast
+        return AskResponse(answer=answer, context_summary=f"context=profile_query; intent={intent}", intent=intent)
+
+    if not LLM_ENABLED:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="LLM not configured")
+
+    # Fetch scoped context
+    context_text, context_summary = await _fetch_scan_context(
+        db=db,
+        scan_id=scan_id,
+        scope_tables=scope_tables,
+        row_limit=row_limit,
+        question=question,
+        loaded=scan_context,
+    )
+
+    # Repeat questions over unchanged context are served from cache
+    cache_key = _answer_cache_key(question, scan_id, context_text)
+    if LLM_CACHE_ENABLED:
+        hit = await response_cache.get(cache_key)
+        if hit is not None:
+            return AskResponse(answer=hit["answer"], context_summary=context_summary, cached=True)
+
+    # Build LLM request
+    messages = _build_messages(question, context_text)
+
+    # Call LLM with strong error boundaries
+    result = await ask_llm(messages, max_tokens=ANSWER_MAX_TOKENS, timeout=LLM_TIMEOUT_S, user_key=user_key)
+    if not result.get("ok"):
+        # Log the underlying error but avoid leaking internals to clients
+        log.warning("LLM error: %s", result.get("message"))
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="AI service temporarily unavailable")
+
+    answer = (result.get("answer") or "").strip()
+    if not answer:
+        answer = "No answer generated."
+    elif LLM_CACHE_ENABLED:
+        await response_cache.set(cache_key, {"answer": answer})
+
+    return AskResponse(answer=answer, context_summary=context_summary)
+
+
 # --- Route ---
 @router.post(
     "/ask",
@@ -173,34 +354,308 @@ def _build_messages(question: str, context: str) -> List[Dict[str, str]]:
 # Optional: tighten abuse with a route-level limiter if you have slowapi configured globally
 # If you already attach limiter in app.main, enable the decorator below and import limiter properly.
 # @limiter.limit("20/minute")
-async def ask_ai(payload: AskPayload, db=Depends(get_db)) -> AskResponse:
-    if not LLM_ENABLED:
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="LLM not configured")
-
+async def ask_ai(payload: AskPayload, request: Request, db: AsyncSession = Depends(get_async_read_db)) -> AskResponse:
     # Basic input hardening is handled by Pydantic constraints; add any business rules here:
     if payload.scope_tables and len(payload.scope_tables) > MAX_TABLES_FILTER:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"scope_tables cannot exceed {MAX_TABLES_FILTER}")
 
-    # Fetch scoped context
-    context_text, context_summary = _fetch_scan_context(
-        db=db,
+    return await _answer_question(
+        db,
         scan_id=payload.scan_id,
         scope_tables=payload.scope_tables,
+        question=payload.question,
         row_limit=payload.row_limit or DEFAULT_ROW_LIMIT,
+        user_key=get_remote_address(request),
     )
 
-    # Build LLM request
+
+@router.post(
+    "/ask/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Streaming variant of /ask (Server-Sent Events)",
+    response_class=StreamingResponse,
+)
+async def ask_ai_stream(payload: AskPayload, request: Request, db: AsyncSession = Depends(get_async_read_db)) -> StreamingResponse:
+    """
+    Emits `context` (the context summary) immediately, then `token` events as the
+    model produces text, then `done`. Failures after the stream has started are
+    reported as an `error` event. A client disconnect stops the upstream call.
+    """
+    fast = await _fast_path_answer(db, payload.scan_id, payload.question, payload.scope_tables)
+    if fast is not None:
+        intent, answer = fast
+
+        async def fast_events() -> AsyncIterator[str]:
+            yield _sse("context", {"context_summary": f"context=profile_query; intent={intent}"})
+            yield _sse("token", {"text": answer})
+            yield _sse("done", {"cached": False, "intent": intent})
+
+        return StreamingResponse(fast_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    if not LLM_ENABLED:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="LLM not configured")
+
+    context_text, context_summary = await _fetch_scan_context(
+        db=db,
+        scan_id=payload.scan_id,
+        scope_tables=payload.scope_tables,
+        row_limit=payload.row_limit or DEFAULT_ROW_LIMIT,
+        question=payload.question,
+    )
+    cache_key = _answer_cache_key(payload.question, payload.scan_id, context_text)
     messages = _build_messages(payload.question, context_text)
+    user_key = get_remote_address(request)
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("context", {"context_summary": context_summary})
+
+        hit = await response_cache.get(cache_key) if LLM_CACHE_ENABLED else None
+        if hit is not None:
+            yield _sse("token", {"text": hit["answer"]})
+            yield _sse("done", {"cached": True})
+            return
+
+        parts: List[str] = []
+        try:
+            # aclosing() closes the upstream stream as soon as we stop iterating
+            async with aclosing(stream_llm(
+                messages, max_tokens=ANSWER_MAX_TOKENS, timeout=LLM_TIMEOUT_S, user_key=user_key
+            )) as deltas:
+                async for delta in deltas:
+                    if await request.is_disconnected():
+                        log.info("Client disconnected; cancelling LLM stream")
+                        return
+                    parts.append(delta)
+                    yield _sse("token", {"text": delta})
+        except (asyncio.TimeoutError, LLMError) as e:
+            log.warning("LLM stream error: %s", e)
+            yield _sse("error", {"detail": "AI service temporarily unavailable"})
+            return
+
+        answer = "".join(parts).strip()
+        if answer and LLM_CACHE_ENABLED:
+            await response_cache.set(cache_key, {"answer": answer})
+        yield _sse("done", {"cached": False})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so the first bytes leave immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    # Call LLM with strong error boundaries
-    result = await ask_llm(messages, max_tokens=700, timeout=25.0)
-    if not result.get("ok"):
-        # Log the underlying error but avoid leaking internals to clients
-        log.warning("LLM error: %s", result.get("message"))
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="AI service temporarily unavailable")
 
-    answer = (result.get("answer") or "").strip()
-    if not answer:
-        answer = "No answer generated."
+# Batch questions in flight per client, shared by its concurrent batches: (semaphore, batches using it)
+_batch_slots: Dict[str, Tuple[asyncio.Semaphore, int]] = {}
 
-    return AskResponse(answer=answer, context_summary=context_summary)
+
+@asynccontextmanager
+async def _client_batch_slots(client: str) -> AsyncIterator[asyncio.Semaphore]:
+    sem, users = _batch_slots.get(client, (None, 0))
+    if sem is None:
+        sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+    _batch_slots[client] = (sem, users + 1)
+    try:
+        yield sem
+    finally:
+        sem, users = _batch_slots[client]
+        if users == 1:
+            del _batch_slots[client]
+        else:
+            _batch_slots[client] = (sem, users - 1)
+
+
+@router.post(
+    "/ask/batch",
+    status_code=status.HTTP_200_OK,
+    summary="Ask many questions about one scan; answers stream back as they finish (SSE)",
+    response_class=StreamingResponse,
+)
+async def ask_ai_batch(payload: AskBatchPayload, request: Request, db: AsyncSession = Depends(get_async_read_db)) -> StreamingResponse:
+    """
+    The scan context (digests and retrieval index) is loaded once and shared by
+    every question. Questions run BATCH_CONCURRENCY at a time per client (its
+    concurrent batches share that allowance) and are otherwise throttled by the
+    gate's global concurrency and rate limits, not the per-user limit for single
+    questions, so a batch takes about as long as its slowest question. Emits
+    one `answer` or `error` event per question (with its `index` in the
+    request), in completion order, then `done`.
+    """
+    row_limit = payload.row_limit or DEFAULT_ROW_LIMIT
+    scan_context = await _load_scan_context_async(db, payload.scan_id) if payload.scan_id else None
+    client = get_remote_address(request)
+
+    async def answer_one(batch_slots: asyncio.Semaphore, i: int, question: str) -> Tuple[int, str, Dict[str, Any]]:
+        async with batch_slots:
+            try:
+                # Own session per question: an AsyncSession can't be shared by concurrent tasks
+                async with await replica_router.async_read_session(request) as question_db:
+                    resp = await _answer_question(
+                        question_db,
+                        scan_id=payload.scan_id,
+                        scope_tables=payload.scope_tables,
+                        question=question,
+                        row_limit=row_limit,
+                        user_key=None,  # bounded by batch_slots instead of the per-user gate
+                        scan_context=scan_context,
+                    )
+                return i, "answer", {"index": i, "question": question, **resp.model_dump()}
+            except HTTPException as e:
+                return i, "error", {"index": i, "question": question, "status": e.status_code, "detail": e.detail}
+
+    async def events() -> AsyncIterator[str]:
+        async with _client_batch_slots(client) as batch_slots:
+            tasks = [asyncio.ensure_future(answer_one(batch_slots, i, q)) for i, q in enumerate(payload.questions)]
+            answered = failed = 0
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    _, event, data = await next_done
+                    if event == "answer":
+                        answered += 1
+                    else:
+                        failed += 1
+                    yield _sse(event, data)
+                yield _sse("done", {"answered": answered, "failed": failed})
+            finally:
+                # Client went away mid-batch: stop the remaining LLM calls
+                for t in tasks:
+                    t.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- Conversation sessions ---
+def _session_response(session: Dict[str, Any]) -> SessionResponse:
+    return SessionResponse(
+        session_id=session["id"],
+        scan_id=session["scan_id"],
+        scope_tables=session["scope_tables"],
+        context_summary=session["context_summary"],
+        summary=session["summary"],
+        summarized_turns=session["summarized_turns"],
+        turns=[SessionTurn(question=t["q"], answer=t["a"]) for t in session["turns"]],
+    )
+
+
+@asynccontextmanager
+async def _session_turn(session_id: str) -> AsyncIterator[None]:
+    try:
+        async with conversation_store.lock(session_id):
+            yield
+    except SessionBusy:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session is busy with another question; retry shortly")
+
+
+async def _owned_session(session_id: str, request: Request) -> Dict[str, Any]:
+    session = await conversation_store.get(session_id)
+    # Sessions belong to the client that created them; don't reveal others' ids
+    if session is None or session["owner"] != get_remote_address(request):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found or expired")
+    return session
+
+
+@router.post(
+    "/sessions",
+    response_model=SessionResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Start a conversation about a scan",
+)
+async def create_session(payload: SessionCreatePayload, request: Request) -> SessionResponse:
+    session = new_session(
+        owner=get_remote_address(request),
+        scan_id=payload.scan_id,
+        scope_tables=_normalize_table_list(payload.scope_tables),
+        row_limit=payload.row_limit or DEFAULT_ROW_LIMIT,
+    )
+    await conversation_store.put(session)
+    return _session_response(session)
+
+
+@router.get("/sessions/{session_id}", response_model=SessionResponse, summary="Conversation state")
+async def get_session(session_id: str, request: Request) -> SessionResponse:
+    return _session_response(await _owned_session(session_id, request))
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT, summary="End a conversation")
+async def delete_session(session_id: str, request: Request) -> Response:
+    await _owned_session(session_id, request)
+    await conversation_store.delete(session_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post(
+    "/sessions/{session_id}/ask",
+    response_model=SessionAskResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Ask a follow-up within a conversation",
+)
+async def ask_in_session(
+    session_id: str,
+    payload: SessionAskPayload,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> SessionAskResponse:
+    """
+    The scan context is selected once, for the session's first question, and
+    reused; older turns are summarized in the background after responding.
+    """
+    await _owned_session(session_id, request)
+    user_key = get_remote_address(request)
+    question = payload.question
+
+    async with _session_turn(session_id):
+        # Re-read under the lock: a previous turn or compaction may have updated it
+        session = await _owned_session(session_id, request)
+        prompt_tokens = 0
+        fast = await _fast_path_answer(db, session["scan_id"], question, session["scope_tables"])
+        if fast is not None:
+            intent, answer = fast
+            context_summary = f"context=profile_query; intent={intent}"
+        else:
+            if not LLM_ENABLED:
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="LLM not configured")
+            if session["context_text"] is None:
+                session["context_text"], session["context_summary"] = await _fetch_scan_context(
+                    db=db,
+                    scan_id=session["scan_id"],
+                    scope_tables=session["scope_tables"],
+                    row_limit=session["row_limit"],
+                    question=question,
+                )
+            intent = None
+            context_summary = session["context_summary"]
+            messages = build_session_messages(session, question)
+            prompt_tokens = estimate_tokens(messages, 0)
+            result = await ask_llm(messages, max_tokens=ANSWER_MAX_TOKENS, timeout=LLM_TIMEOUT_S, user_key=user_key)
+            if not result.get("ok"):
+                log.warning("LLM error: %s", result.get("message"))
+                raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="AI service temporarily unavailable")
+            answer = (result.get("answer") or "").strip() or "No answer generated."
+
+        session["turns"].append({"q": question, "a": answer})
+        await conversation_store.put(session)
+        turn = session["summarized_turns"] + len(session["turns"])
+
+    background_tasks.add_task(compact_session, session_id, user_key)
+    return SessionAskResponse(
+        answer=answer,
+        context_summary=context_summary,
+        intent=intent,
+        session_id=session_id,
+        turn=turn,
+        est_prompt_tokens=prompt_tokens,
+    )
+
+
+@router.get(
+    "/metrics",
+    summary="LLM admission-control and response-cache metrics",
+    dependencies=[Depends(admin_required)],
+)
+def ai_metrics() -> Dict[str, Any]:
+    return {"llm": llm_metrics(), "cache": response_cache.stats()}
@@ -1,13 +1,36 @@
 # app/api/routes/audit.py
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from app.models.audit import AuditLog
-from app.db.session import get_db
+
 from app.api.dependencies import admin_required
-from typing import List
+from app.crud.audit import MAX_PAGE_SIZE, search_audit_logs
+from app.db.session import get_db
+from app.schemas.audit import AuditLogPage, AuditLogRead
 
 router = APIRouter()
 
-@router.get("/", response_model=List[dict])
-def list_audit_logs(db: Session = Depends(get_db), admin=Depends(admin_required)):
-    return db.query(AuditLog).order_by(AuditLog.timestamp.desc()).limit(100).all()
+
+@router.get("/", response_model=AuditLogPage)
+def list_audit_logs(
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    object_type: Optional[str] = None,
+    object_id: Optional[int] = None,
+    since: Optional[datetime] = Query(None, description="Inclusive lower bound (UTC)"),
+    until: Optional[datetime] = Query(None, description="Exclusive upper bound (UTC)"),
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    try:
+        rows, next_cursor = search_audit_logs(
+            db, limit=limit, cursor=cursor, user_id=user_id, action=action,
+            object_type=object_type, object_id=object_id, since=since, until=until,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return AuditLogPage(items=[AuditLogRead.model_validate(r) for r in rows], next_cursor=next_cursor)
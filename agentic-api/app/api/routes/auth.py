@@ -4,20 +4,28 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.core.security import create_access_token
 from app.crud.user import authenticate_user
-from authlib.integrations.starlette_client import OAuth
 from fastapi.security import OAuth2PasswordRequestForm
 
 
 router = APIRouter()
 
-oauth = OAuth()
-oauth.register(
-    name='azure',
-    client_id=os.getenv("AZURE_CLIENT_ID"),
-    client_secret=os.getenv("AZURE_CLIENT_SECRET"),
-    server_metadata_url=f"https://login.microsoftonline.com/{os.getenv('AZURE_TENANT_ID')}/v2.0/.well-known/openid-configuration",
-    client_kwargs={"scope": "openid email profile"}
-)
+_oauth = None
+
+def get_oauth():
+    """OAuth client registry, built on first SSO request (authlib is slow to import)."""
+    global _oauth
+    if _oauth is None:
+        from authlib.integrations.starlette_client import OAuth
+        oauth = OAuth()
+        oauth.register(
+            name='azure',
+            client_id=os.getenv("AZURE_CLIENT_ID"),
+            client_secret=os.getenv("AZURE_CLIENT_SECRET"),
+            server_metadata_url=f"https://login.microsoftonline.com/{os.getenv('AZURE_TENANT_ID')}/v2.0/.well-known/openid-configuration",
+            client_kwargs={"scope": "openid email profile"}
+        )
+        _oauth = oauth
+    return _oauth
 
 @router.post("/login")
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
@@ -34,15 +42,15 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 @router.get('/auth/login')
 async def login(request: Request):
     redirect_uri = request.url_for('auth_callback')
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    return await get_oauth().google.authorize_redirect(request, redirect_uri)
 
 @router.get('/auth/callback')
 async def auth_callback(request: Request, db: Session = Depends(get_db)):
     try:
-        token = await oauth.google.authorize_access_token(request)
+        token = await get_oauth().google.authorize_access_token(request)
     except OAuthError as error:
         return RedirectResponse(url='/login?error=oauth')
-    user_info = await oauth.google.parse_id_token(request, token)
+    user_info = await get_oauth().google.parse_id_token(request, token)
     email = user_info['email']
 
     # --- Upsert user (create if not exist, else get)
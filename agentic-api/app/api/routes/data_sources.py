@@ -1,5 +1,5 @@
 # app/api/routes/data_sources.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from app.utils.data_source_scan import scan_data_source_metadata_by_type
 from app.utils.ds_normalize import normalize_type
 from app.utils.artifact_scan import scan_artifact_mongo
@@ -10,34 +10,49 @@ import logging
 
 from sqlalchemy.orm import Session
 from typing import List
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, func, text
 
 from app.db.session import get_db
+from app.db.replicas import get_read_db, writes_primary
 from app.models.data_source import DataSource
 from app.schemas.data_source import DataSourceRead, DataSourceCreate, DataSourceUpdate
 from app.api.dependencies import admin_required
 from app.utils.data_source_test import test_data_source_by_type
-from app.schemas.data_source import DataSourcePublic
+from app.schemas.data_source import DataSourcePublic, data_source_list_adapter, data_source_public_list_adapter
+from app.core.http_cache import cache_headers, is_not_modified, make_etag, not_modified
+from app.core.responses import model_response
 from app.utils.artifact_scan import scan_artifact
 import logging
 
 router = APIRouter()
 public_router = APIRouter()
 
+
+def _list_validators(db: Session, scope: str, *criteria):
+    """Cache headers for a data source list, from one aggregate query."""
+    count, last_id, last_modified = db.query(
+        func.count(DataSource.id), func.max(DataSource.id), func.max(DataSource.updated_at)
+    ).filter(*criteria).one()
+    return cache_headers(make_etag("data-sources", scope, count, last_id, last_modified), last_modified), last_modified
+
+
 @router.get(
     "/",
     response_model=List[DataSourceRead],
     dependencies=[Depends(admin_required)]
 )
-def list_data_sources(db: Session = Depends(get_db)):
+def list_data_sources(request: Request, db: Session = Depends(get_read_db)):
     """List all configured data sources."""
-    return db.query(DataSource).all()
+    headers, last_modified = _list_validators(db, "all")
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return not_modified(headers)
+    return model_response(data_source_list_adapter, db.query(DataSource).all(), headers=headers)
 
 @router.post(
     "/",
     response_model=DataSourceRead,
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(admin_required)]
+    dependencies=[Depends(admin_required), Depends(writes_primary)]
 )
 def create_data_source(
     source: DataSourceCreate,
@@ -58,7 +73,7 @@ def create_data_source(
 @router.patch(
     "/{ds_id}",
     response_model=DataSourceRead,
-    dependencies=[Depends(admin_required)]
+    dependencies=[Depends(admin_required), Depends(writes_primary)]
 )
 def update_data_source(
     ds_id: int,
@@ -81,7 +96,7 @@ def update_data_source(
 @router.delete(
     "/{ds_id}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(admin_required)]
+    dependencies=[Depends(admin_required), Depends(writes_primary)]
 )
 def delete_data_source(
     ds_id: int,
@@ -98,7 +113,7 @@ def delete_data_source(
     db.commit()
     return None
 
-@router.post("/{ds_id}/test-connection", status_code=200, dependencies=[Depends(admin_required)])
+@router.post("/{ds_id}/test-connection", status_code=200, dependencies=[Depends(admin_required), Depends(writes_primary)])
 def test_data_source_connection(ds_id: int, db: Session = Depends(get_db)):
     ds = db.query(DataSource).filter(DataSource.id == ds_id).first()
     if not ds:
@@ -132,11 +147,18 @@ def scan_data_source_metadata(ds_id: int, db: Session = Depends(get_db)):
     response_model=List[DataSourcePublic],
     tags=["public"]
 )
-def list_active_data_sources(db: Session = Depends(get_db)):
+def list_active_data_sources(request: Request, db: Session = Depends(get_read_db)):
     """
     List all active data sources (for all users, multi-tenant).
     """
-    return db.query(DataSource).filter(DataSource.is_active == True).all()
+    headers, last_modified = _list_validators(db, "active", DataSource.is_active == True)
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return not_modified(headers)
+    return model_response(
+        data_source_public_list_adapter,
+        db.query(DataSource).filter(DataSource.is_active == True).all(),
+        headers=headers,
+    )
 
 
 
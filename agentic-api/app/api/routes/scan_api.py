@@ -7,8 +7,9 @@ from dateutil import parser as dateutil_parser  # pip install python-dateutil
 import json
 
 from app.db.session import get_db
-from app.models import DataSource, ScanJob, AuditLog
-from app.celery_config import celery_app
+from app.db.replicas import writes_primary
+from app.models import DataSource, ScanJob
+from app.audit import log_action
 from app.api.dependencies import get_current_user
 
 router = APIRouter()
@@ -24,7 +25,7 @@ class ScanRequest(BaseModel):
     class Config:
         allow_population_by_field_name = True
 
-@router.post("/scan", status_code=202)
+@router.post("/scan", status_code=202, dependencies=[Depends(writes_primary)])
 def start_scan(
     req: ScanRequest,
     db: Session = Depends(get_db),
@@ -46,18 +47,17 @@ def start_scan(
         except Exception as e:
             raise HTTPException(400, f"Invalid scheduled_time: {e}")
 
-    # 4. Audit log (serialize details as JSON string)
-    audit = AuditLog(
-        user_id=current_user.id,
-        action="start_scan",
-        object_type="data_source",
-        object_id=ds.id,
-        timestamp=datetime.utcnow(),
-        details=json.dumps(req.dict(by_alias=True)),  # Ensure camelCase keys for UI traceability
+    # 4. Audit log, in the job's transaction (the job references its id)
+    audit = log_action(
+        db,
+        current_user.id,
+        "start_scan",
+        "data_source",
+        ds.id,
+        details=req.dict(by_alias=True),  # Ensure camelCase keys for UI traceability
+        durability="transaction",
     )
-    db.add(audit)
-    db.commit()
-    db.refresh(audit)
+    db.flush()
 
     # 5. Create scan job (store lists as JSON strings if columns are Text)
     job = ScanJob(
@@ -75,7 +75,8 @@ def start_scan(
     db.commit()
     db.refresh(job)
 
-    # 6. Trigger Celery worker (async)
+    # 6. Trigger Celery worker (async); imported here so API startup doesn't load Celery and every task module
+    from app.celery_config import celery_app
     celery_app.send_task('workers.tasks.run_scan_job', args=[job.id])
 
 
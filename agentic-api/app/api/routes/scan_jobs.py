@@ -1,58 +1,117 @@
 # app/api/routes/scan_jobs.py
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import json
 import csv
 import io
 from app.models import ScanJob
 from app.db.session import get_db
+from app.db.replicas import get_async_read_db
 from app.api.dependencies import get_current_user
+from app.core.compression import negotiate
+from app.core.http_cache import cache_headers, content_hash, is_not_modified, make_etag, not_modified
+from app.core.responses import FastJSONResponse, RawJSON, loads
 from app.schemas.scan_job import ScanJobOut, ScanResultOut
 from app.mongo_client import get_metadata_result  # You need to implement this!
-from app.models.scan_job import ScanJob, ScanJobResult
+from app.models.scan_job import ScanJob, ScanJobResult, ScanResultBlob
+from app.service.result_store import blob_text, load_result_json, zstd_envelope
 from app.models.data_source import DataSource  # Assuming you have a DataSource model
 
 router = APIRouter()
 
+# Exactly the response fields, read as plain rows: no ORM objects, no re-validation
+_SCAN_JOB_COLUMNS = [getattr(ScanJob, name) for name in ScanJobOut.model_fields]
+
 @router.get("/scan-jobs", response_model=List[ScanJobOut])
-def list_scan_jobs(
-    db: Session = Depends(get_db),
+async def list_scan_jobs(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user=Depends(get_current_user)
 ):
-    jobs = db.query(ScanJob).filter(ScanJob.created_by == current_user.id).order_by(ScanJob.created_at.desc()).all()
-    results = []
-    for job in jobs:
-        # Convert JSON string to list for API response
-        job_dict = job.__dict__.copy()
-        job_dict['db_names'] = json.loads(job.db_names) if job.db_names else []
-        job_dict['artifact_types'] = json.loads(job.artifact_types) if job.artifact_types else []
-        # You may need to convert datetime to str if Pydantic expects str (optional)
-        # job_dict['created_at'] = job.created_at.isoformat() if job.created_at else None
-        results.append(job_dict)
-    return results
+    owned = ScanJob.created_by == current_user.id
+    # Any insert, update (updated_at) or delete (count) changes the validators
+    count, last_id, last_modified = (await db.execute(
+        select(func.count(ScanJob.id), func.max(ScanJob.id), func.max(func.coalesce(ScanJob.updated_at, ScanJob.created_at))).where(owned)
+    )).one()
+    headers = cache_headers(make_etag("scan-jobs", current_user.id, count, last_id, last_modified), last_modified)
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return not_modified(headers)
+
+    rows = (await db.execute(
+        select(*_SCAN_JOB_COLUMNS).where(owned).order_by(ScanJob.created_at.desc())
+    )).mappings().all()
+    return FastJSONResponse([
+        {
+            **row,
+            # Stored as JSON text
+            "db_names": loads(row["db_names"]) if row["db_names"] else [],
+            "artifact_types": loads(row["artifact_types"]) if row["artifact_types"] else [],
+        }
+        for row in rows
+    ], headers=headers)
 
 
 
 @router.get("/scan-jobs/{job_id}/result")
-def get_scan_job_result(job_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    result = db.query(ScanJobResult).filter(ScanJobResult.scan_job_id == job_id).order_by(ScanJobResult.created_at.desc()).first()
+async def get_scan_job_result(
+    job_id: int,
+    request: Request,
+    inline_metadata: bool = Query(False, description="Return metadata_json as a JSON object instead of a string"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user=Depends(get_current_user),
+):
+    # Validators first; the (possibly large) payload is only read for a 200
+    result = (await db.execute(
+        select(ScanJobResult.id, ScanJobResult.content_hash, ScanJobResult.created_at, ScanJobResult.metadata_json.is_(None).label("in_blob"))
+        .where(ScanJobResult.scan_job_id == job_id).order_by(ScanJobResult.created_at.desc()).limit(1)
+    )).first()
     print(f"[DEBUG] Lookup result for scan_job_id={job_id}: {result}")
     if not result:
         raise HTTPException(404, "No result yet")
     
     # Get the ScanJob for context (data_source, etc.)
-    job = db.query(ScanJob).filter(ScanJob.id == job_id).first()
-    data_source = db.query(DataSource).filter(DataSource.id == job.data_source_id).first() if job else None
+    job = await db.get(ScanJob, job_id)
+    data_source = await db.get(DataSource, job.data_source_id) if job else None
+    data_source_name = data_source.name if data_source else None
 
-    return {
+    metadata_json = None
+    digest = result.content_hash
+    if digest is None:
+        # Written before content hashes were stored
+        metadata_json = await db.scalar(select(ScanJobResult.metadata_json).where(ScanJobResult.id == result.id))
+        digest = content_hash(metadata_json)
+    headers = cache_headers(make_etag(result.id, digest, data_source_name, inline_metadata), result.created_at)
+    if is_not_modified(request, headers["ETag"], result.created_at):
+        return not_modified(headers)
+
+    envelope = {
         "scan_job_id": job_id,
-        "metadata_json": result.metadata_json,
-        "data_source": data_source.name if data_source else None,
+        "metadata_json": None,
+        "data_source": data_source_name,
         "scan_timestamp": result.created_at.isoformat(),
         "databases": [],
     }
+    if result.in_blob:
+        blob = await db.get(ScanResultBlob, digest)
+        if blob is None:
+            raise HTTPException(500, "Scan result payload is missing")
+        if inline_metadata and negotiate(request.headers.get("accept-encoding", ""), ["zstd"]):
+            # Stored zstd frame goes out as-is, no decompress/recompress
+            body = zstd_envelope(envelope, "metadata_json", blob)
+            if body is not None:
+                headers.update({"ETag": f"W/{headers['ETag']}", "Content-Encoding": "zstd", "Vary": "Accept-Encoding"})
+                return Response(body, media_type="application/json", headers=headers)
+        metadata_json = blob_text(blob)
+    elif metadata_json is None:
+        metadata_json = await db.scalar(select(ScanJobResult.metadata_json).where(ScanJobResult.id == result.id))
+
+    # Stored JSON goes out as-is; never parsed here
+    envelope["metadata_json"] = RawJSON(metadata_json) if inline_metadata else metadata_json
+    return FastJSONResponse(envelope, headers=headers)
 
 
 @router.get("/scan-jobs/{job_id}/export")
@@ -62,8 +121,7 @@ def export_scan_job_csv(job_id: int, db: Session = Depends(get_db), current_user
         raise HTTPException(404, "Not found")
     # Optional: Check job owner == current_user.id
 
-    # Assuming job.metadata_json is the result JSON
-    data = json.loads(job.metadata_json)
+    data = loads(load_result_json(db, job))
     # Flatten for CSV (your logic may vary)
     objects = data.get("objects") or []
     output = io.StringIO()
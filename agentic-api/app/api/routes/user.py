@@ -7,28 +7,22 @@ from app.schemas.user import (
     UserUpdateRequest, UserUpdate, ChangePasswordRequest
 )
 from app.models.user import User
-from app.crud.user import get_user, get_users, create_user, get_user_by_email
-from app.db.session import SessionLocal
+from app.crud.user import get_user, get_users, create_user, get_user_by_email, authenticate_user
+from app.db.session import get_db
 from app.api.dependencies import get_current_user, admin_required
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password_blocking, verify_and_update_password_blocking
+from app.core.user_cache import user_cache
 from app.utils.token import generate_token
-from app.utils.email import send_email
+from app.service.email_outbox_service import enqueue_email, notify_outbox
 from datetime import datetime, timedelta
 from jose import jwt
 from app.config import settings
 
 # --- Rate Limiting ----
-from app.main import limiter
+from app.core.limiter import limiter
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=60))
@@ -54,6 +48,7 @@ def verify_email(token: str = Query(...), db: Session = Depends(get_db)):
     user.verification_token = None
     user.verification_token_expires = None
     db.commit()
+    user_cache.invalidate(user.email)
     return {"message": "Email verified!"}
 
 @router.get("/by-id/{user_id}", response_model=UserRead)
@@ -87,6 +82,7 @@ def update_user(
     if getattr(user_update, "name", None) is not None:
         user.name = user_update.name
     db.commit()
+    user_cache.invalidate(user.email)
     db.refresh(user)
     return user
 
@@ -99,7 +95,7 @@ def register(user: UserCreate, db: Session = Depends(get_db), request: Request =
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     user_dict = user.dict()
-    user_dict["hashed_password"] = hash_password(user.password)
+    user_dict["hashed_password"] = hash_password_blocking(user.password)
     user_dict.pop("password", None)
     user_dict["role"] = "user"
     token = generate_token()
@@ -107,20 +103,23 @@ def register(user: UserCreate, db: Session = Depends(get_db), request: Request =
     user_dict["is_verified"] = False
     user_dict["verification_token"] = token
     user_dict["verification_token_expires"] = expires
-    new_user = create_user(db, user_dict)
     verify_link = f"https://yourdomain.com/verify-email?token={token}"
-    send_email(
-        new_user.email,
+    # Queued in the same transaction create_user commits
+    enqueue_email(
+        db,
+        user.email,
         "Verify your email",
-        f"Welcome! Please verify your email by clicking: {verify_link}"
+        f"Welcome! Please verify your email by clicking: {verify_link}",
     )
+    new_user = create_user(db, user_dict)
+    notify_outbox()
     return new_user
 
 @router.post("/login", response_model=Token)
 @limiter.limit("5/minute")
 def login(form_data: UserCreate, db: Session = Depends(get_db), request: Request = None):
-    user = get_user_by_email(db, form_data.email)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = authenticate_user(db, form_data.email, form_data.password)
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
     if not user.is_verified:
         raise HTTPException(status_code=403, detail="Email not verified. Please check your inbox.")
@@ -145,6 +144,7 @@ def update_profile(
     if user_update.name is not None:
         user.name = user_update.name
     db.commit()
+    user_cache.invalidate(user.email)
     db.refresh(user)
     return UserRead.from_orm(user)
 
@@ -159,13 +159,16 @@ def request_password_reset(request: PasswordResetRequest, db: Session = Depends(
         expires = datetime.utcnow() + timedelta(hours=1)
         user.reset_token = token
         user.reset_token_expires = expires
-        db.commit()
         reset_link = f"https://yourdomain.com/reset-password?token={token}"
-        send_email(
+        enqueue_email(
+            db,
             user.email,
             "Password Reset Request",
-            f"To reset your password, click: {reset_link}"
+            f"To reset your password, click: {reset_link}",
+            dedupe_key=f"reset:{user.id}",
         )
+        db.commit()
+        notify_outbox()
     return {"message": "If that email is registered, you’ll receive a reset email."}
 
 @router.post("/reset-password")
@@ -176,10 +179,11 @@ def reset_password(form: PasswordResetForm, db: Session = Depends(get_db)):
     ).first()
     if not user:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
-    user.hashed_password = hash_password(form.new_password)
+    user.hashed_password = hash_password_blocking(form.new_password)
     user.reset_token = None
     user.reset_token_expires = None
     db.commit()
+    user_cache.invalidate(user.email)
     return {"message": "Password reset successful!"}
 
 @router.post("/change-password")
@@ -191,8 +195,10 @@ def change_password(
     user = db.query(User).filter(User.id == current_user.id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if not verify_password(data.old_password, user.hashed_password):
+    valid, _ = verify_and_update_password_blocking(data.old_password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=403, detail="Old password incorrect")
-    user.hashed_password = hash_password(data.new_password)
+    user.hashed_password = hash_password_blocking(data.new_password)
     db.commit()
+    user_cache.invalidate(user.email)
     return {"message": "Password updated successfully"}
@@ -1,7 +1,230 @@
 # app/audit.py
-from app.models.audit import AuditLog
+"""
+Audit log writer.
 
-def log_action(db, user_id: int, action: str):
-    entry = AuditLog(user_id=user_id, action=action)
-    db.add(entry)
-    db.commit()
+Two durability modes:
+
+* "transaction": the entry is added to the caller's session and committed
+  together with the change it describes. No extra commit; it is never lost
+  unless the change itself is rolled back.
+* "async": the entry is buffered in memory and a background thread
+  bulk-inserts batches every AUDIT_FLUSH_INTERVAL_S (or as soon as
+  AUDIT_BATCH_SIZE entries are waiting). One multi-row insert and one commit
+  per batch instead of per entry; up to one interval of entries can be lost
+  if the process dies. Entries logged against a session are only buffered
+  once that session commits, and are discarded if it rolls back.
+  A batch that fails for a transient reason (connection lost, database
+  down) is put back and retried; any other failure is retried row by row,
+  and rows that still can't be stored are logged and dropped, so one bad
+  entry can't hold up the rest.
+
+The default comes from settings.audit_durability; callers that need the
+entry's id (e.g. to reference it from another row) use "transaction".
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.audit_log import AuditLog
+
+log = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_INTERVAL_S = 1.0
+AUDIT_MAX_BUFFER = 50_000       # beyond this, writers flush inline (backpressure)
+DEAD_LETTER_DETAILS_CHARS = 1000
+
+
+def _is_transient(e: Exception) -> bool:
+    if isinstance(e, sa_exc.DBAPIError) and e.connection_invalidated:
+        return True
+    return isinstance(e, (sa_exc.OperationalError, sa_exc.InterfaceError, sa_exc.TimeoutError))
+
+
+class AuditWriter:
+    def __init__(self, batch_size: int = AUDIT_BATCH_SIZE, interval: float = AUDIT_FLUSH_INTERVAL_S, max_buffer: int = AUDIT_MAX_BUFFER):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_buffer = max_buffer
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self.written = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+
+    def _ensure_thread(self) -> None:
+        if os.getpid() != self._pid:
+            # Forked (e.g. Celery prefork child): the parent's thread and buffer don't belong to us
+            self._pid = os.getpid()
+            self._buffer = deque()
+            self._thread = None
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                    self._thread.start()
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        self._ensure_thread()
+        self._buffer.append(row)
+        size = len(self._buffer)
+        if size >= self.max_buffer:
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Audit flush failed")
+        elif size >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Audit flush failed")
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        return batch
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        from app.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLog), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self.written += len(rows)
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        # Back at the head for the next attempt (oldest first), unless we're overflowing
+        if len(self._buffer) + len(rows) <= self.max_buffer:
+            self._buffer.extendleft(reversed(rows))
+        else:
+            log.error("Dropping %s audit entries after a failed flush", len(rows))
+
+    def _insert_one_by_one(self, batch: List[Dict[str, Any]]) -> None:
+        for i, row in enumerate(batch):
+            try:
+                self._insert([row])
+            except Exception as e:
+                if _is_transient(e):
+                    self._requeue(batch[i:])
+                    raise
+                self.dead_lettered += 1
+                details = row.get("details")
+                log.error(
+                    "Dropping audit entry that can't be stored (%s): %r",
+                    e.__class__.__name__,
+                    {**row, "details": details[:DEAD_LETTER_DETAILS_CHARS] if details else details},
+                )
+
+    def flush(self) -> int:
+        """Writes everything buffered so far. Returns the number of rows inserted."""
+        written_before = self.written
+        with self._flush_lock:
+            while self._buffer:
+                batch = self._take_batch()
+                try:
+                    self._insert(batch)
+                except Exception as e:
+                    self.failed_batches += 1
+                    if _is_transient(e):
+                        self._requeue(batch)
+                        raise
+                    # Probably one bad row (constraint, oversized value): find it, keep the rest
+                    self._insert_one_by_one(batch)
+        return self.written - written_before
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "failed_batches": self.failed_batches,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+audit_writer = AuditWriter()
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    try:
+        audit_writer.flush()
+    except Exception:
+        log.exception("Audit flush at exit failed")
+
+
+_PENDING_KEY = "audit_pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_pending(session) -> None:
+    for row in session.info.pop(_PENDING_KEY, ()):
+        audit_writer.submit(row)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session, transaction) -> None:
+    # after_commit has already taken the rows of a committed transaction
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def log_action(
+    db,
+    user_id: int,
+    action: str,
+    object_type: str,
+    object_id: int,
+    details: Optional[Dict[str, Any]] = None,
+    durability: Optional[str] = None,
+) -> Optional[AuditLog]:
+    """
+    Records an audit entry. In "transaction" mode the entry is returned, added
+    to `db` but not committed; in "async" mode it is buffered when `db` commits
+    (immediately if `db` is None) and None is returned.
+    """
+    row = {
+        "user_id": user_id,
+        "action": action,
+        "object_type": object_type,
+        "object_id": object_id,
+        "timestamp": datetime.utcnow(),
+        "details": json.dumps(details) if details is not None else None,
+    }
+    if (durability or settings.audit_durability) == "transaction":
+        entry = AuditLog(**row)
+        db.add(entry)
+        return entry
+    if db is None:
+        audit_writer.submit(row)
+    else:
+        if not db.in_transaction():
+            db.begin()  # so a rollback with nothing else pending still discards the row
+        db.info.setdefault(_PENDING_KEY, []).append(row)
+    return None
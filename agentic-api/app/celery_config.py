@@ -21,6 +21,12 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    # Safety net for the email outbox; requests also trigger delivery directly
+    beat_schedule={
+        "email-outbox": {"task": "workers.tasks.send_email_outbox", "schedule": 30.0},
+        "audit-rollover": {"task": "workers.tasks.rollover_audit_logs", "schedule": 24 * 3600.0},
+        "scan-result-compaction": {"task": "workers.tasks.compact_scan_results", "schedule": 24 * 3600.0},
+    },
 )
 
 from app.workers import tasks
\ No newline at end of file
@@ -8,6 +8,16 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
 
+    # Connection pools (per process; each engine gets its own)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    async_database_url: str = ""  # empty = database_url with the async driver swapped in
+    db_create_on_startup: bool = True  # False: schema is managed by `python -m app.db.init_db` / migrations
+    database_replica_urls: str = ""  # comma-separated read replicas; empty = reads go to the primary
+    replica_sticky_seconds: int = 10  # after a client's write, its reads stay on the primary this long
+
     # SSO/OAuth settings
     azure_client_id: str = ""
     azure_client_secret: str = ""
@@ -20,6 +30,35 @@ class Settings(BaseSettings):
     MONGO_URI: str = "mongodb://localhost:27017"  # or your actual MongoDB URI
 
     CELERY_BROKER_URL: str = "redis://localhost:6379/0" 
+    REDIS_URL: str = ""  # shared cache/limiter Redis; falls back to CELERY_BROKER_URL
+    rate_limit_storage: str = ""  # limits storage URI; empty = the Redis above, "memory://" for local dev
+
+    # PII classification stage (0 = one worker per CPU)
+    pii_classify_workers: int = 0
+    pii_sample_size: int = 100
+
+    # Resolved-user cache in get_current_user (0 disables)
+    user_cache_ttl: int = 30
+    user_cache_redis: bool = False
+
+    # Password hashing executor (0 workers = min(4, CPUs); 0 max_pending = 16 per worker)
+    bcrypt_rounds: int = 12
+    password_hash_executor: str = "process"  # or "thread"
+    password_hash_workers: int = 0
+    password_hash_max_pending: int = 0
+    password_hash_max_blocking: int = 0  # threadpool threads allowed to wait on it (0 = min(2 per worker, 10))
+
+    # Audit entries: "async" (buffered, batched inserts) or "transaction" (committed with the change)
+    audit_durability: str = "async"
+    audit_hot_days: int = 90  # older entries are rolled over into audit_logs_archive
+
+    # Response compression (zstd / br need the zstandard / brotli packages; gzip always works)
+    compression_enabled: bool = True
+    compression_min_size: int = 1024  # bytes; smaller bodies go out as-is
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+    compression_cpu_budget: float = 0.5  # seconds of compression per second, per process (0 = unlimited)
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,264 @@
+# app/core/compression.py
+"""
+Negotiated response compression (zstd, brotli, gzip) as pure ASGI middleware.
+
+Bodies are compressed chunk by chunk as the app sends them, so streaming
+responses (CSV exports) stay streaming and nothing is buffered beyond the
+codec's own window. A response is compressed when:
+
+* the client accepts one of the available encodings, preferring zstd, then
+  br, then gzip (zstd and br need the zstandard / brotli packages);
+* its content type is text-like (JSON, CSV, text/*) and it isn't already
+  encoded. Server-sent events are left alone so each event goes out at once;
+* it has at least `minimum_size` bytes, or is streamed without a length;
+* the process is within its CPU budget: `cpu_budget` seconds spent
+  compressing per wall-clock second (0 = unlimited). Over budget, responses
+  go out uncompressed until it refills, so compression can't starve request
+  handling under load.
+
+Large chunks are compressed on a worker thread (all three codecs release the
+GIL) to keep the event loop responsive. Strong ETags are weakened on
+compressed responses, since the bytes differ per encoding; a 304 to a client
+that negotiated an encoding gets the same weak ETag and Vary header, as it
+must carry the validator the 200 would have had.
+"""
+import asyncio
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional codec
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # optional codec
+    zstandard = None
+
+PREFERENCE = ("zstd", "br", "gzip")
+THREAD_CHUNK_BYTES = 256 * 1024
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/csv", "application/javascript", "application/xml")
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+_CODECS = {"gzip": _Gzip, "br": _Brotli, "zstd": _Zstd}
+
+
+def available_encodings() -> List[str]:
+    missing = {"br": brotli is None, "zstd": zstandard is None}
+    return [e for e in PREFERENCE if not missing.get(e)]
+
+
+def negotiate(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    """The first of `offered` (server preference order) the client accepts with q > 0."""
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = q
+    for encoding in offered:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CpuBudget:
+    """Token bucket of compression seconds, refilled at `rate` seconds per second."""
+
+    def __init__(self, rate: float, burst_s: float = 1.0):
+        self.rate = rate
+        self.capacity = rate * burst_s
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def allows(self) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill()
+        return self._tokens > 0
+
+    def spend(self, seconds: float) -> None:
+        if self.rate > 0:
+            self._refill()
+            self._tokens -= seconds
+
+
+class CompressionStats:
+    def __init__(self):
+        self.responses: Dict[str, int] = {}
+        self.skipped_budget = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "responses": dict(self.responses),
+            "skipped_over_budget": self.skipped_budget,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "compress_seconds": round(self.seconds, 3),
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def _mark_encoded_variant(headers: MutableHeaders) -> None:
+    headers.add_vary_header("Accept-Encoding")
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["etag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        levels: Optional[Dict[str, int]] = None,
+        cpu_budget: Optional[float] = None,
+        encodings: Optional[List[str]] = None,
+    ):
+        self.app = app
+        self.minimum_size = settings.compression_min_size if minimum_size is None else minimum_size
+        self.levels = {
+            "gzip": settings.compression_gzip_level,
+            "br": settings.compression_brotli_quality,
+            "zstd": settings.compression_zstd_level,
+            **(levels or {}),
+        }
+        available = available_encodings()
+        self.encodings = [e for e in (encodings or PREFERENCE) if e in available]
+        self.budget = CpuBudget(settings.compression_cpu_budget if cpu_budget is None else cpu_budget)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        codec = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, codec, passthrough
+            if passthrough:
+                return await send(message)
+            if message["type"] == "http.response.start":
+                start = message  # held until the first body chunk tells us the size
+                return
+            if codec is None:
+                if message["type"] != "http.response.body" or not self._should_compress(start, message):
+                    if start["status"] == 304:
+                        _mark_encoded_variant(MutableHeaders(scope=start))
+                    passthrough = True
+                    await send(start)
+                    return await send(message)
+                codec = _CODECS[encoding](self.levels[encoding])
+                headers = MutableHeaders(scope=start)
+                del headers["content-length"]
+                headers["content-encoding"] = encoding
+                _mark_encoded_variant(headers)
+                compression_stats.responses[encoding] = compression_stats.responses.get(encoding, 0) + 1
+                await send(start)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            out = await self._compress(codec, body, finish=not more_body)
+            if out or not more_body:
+                await send({"type": "http.response.body", "body": out, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, start, first) -> bool:
+        status = start["status"]
+        if status < 200 or status in (204, 304):
+            return False
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if not media_type.startswith(COMPRESSIBLE_TYPES) or media_type in EXCLUDED_TYPES:
+            return False
+        if "content-length" in headers:
+            size = int(headers["content-length"])
+        elif not first.get("more_body", False):
+            size = len(first.get("body", b""))
+        else:
+            size = None  # streamed
+        if size is not None and size < self.minimum_size:
+            return False
+        if not self.budget.allows():
+            compression_stats.skipped_budget += 1
+            return False
+        return True
+
+    async def _compress(self, codec, data: bytes, finish: bool) -> bytes:
+        started = time.perf_counter()
+        if len(data) >= THREAD_CHUNK_BYTES:
+            out = await asyncio.to_thread(codec.compress, data)
+        else:
+            out = codec.compress(data) if data else b""
+        if finish:
+            out += codec.finish()
+        elapsed = time.perf_counter() - started
+        self.budget.spend(elapsed)
+        compression_stats.seconds += elapsed
+        compression_stats.bytes_in += len(data)
+        compression_stats.bytes_out += len(out)
+        return out
@@ -1,5 +1,126 @@
 # app/core/limiter.py
+"""
+Rate limiter shared by every worker and pod.
+
+Counters live in Redis (the Celery Redis unless rate_limit_storage is set) and
+use the sliding-window-counter strategy, which the `limits` library runs as
+atomic Lua scripts server-side. In front of it each process keeps a small
+token bucket per key:
+
+* a client that has already spent a full window's budget in *this* process is
+  rejected locally, without a Redis round trip;
+* for larger limits a hit reserves a small lease of hits in Redis at once and
+  serves the next few requests from it locally. Unused lease hits expire
+  after LEASE_TTL_S, so limits can only get slightly stricter, never looser.
+
+If Redis is unreachable slowapi falls back to in-memory limits.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+
+from limits.strategies import STRATEGIES, SlidingWindowCounterRateLimiter
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address)
+from app.config import settings
+from app.redis_client import redis_url
+
+STRATEGY = "sliding-window-counter-local"
+LEASE_FRACTION = 20        # a lease is at most 1/20 of the limit
+LEASE_TTL_S = 1.0
+LOCAL_MAX_KEYS = 10_000    # per-process bucket states kept (LRU)
+
+
+class _LocalState:
+    __slots__ = ("tokens", "capacity", "rate", "updated", "lease", "lease_expires")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.tokens = capacity
+        self.capacity = capacity
+        self.rate = rate
+        self.updated = now
+        self.lease = 0
+        self.lease_expires = 0.0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class LocalPrecheckRateLimiter(SlidingWindowCounterRateLimiter):
+    def __init__(self, storage):
+        super().__init__(storage)
+        self._local: "OrderedDict[str, _LocalState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.local_rejects = 0
+        self.remote_hits = 0
+
+    def _state(self, key: str, item, now: float) -> _LocalState:
+        state = self._local.get(key)
+        if state is None:
+            state = self._local[key] = _LocalState(float(item.amount), item.amount / item.get_expiry(), now)
+            while len(self._local) > LOCAL_MAX_KEYS:
+                self._local.popitem(last=False)
+        else:
+            self._local.move_to_end(key)
+        return state
+
+    def hit(self, item, *identifiers: str, cost: int = 1) -> bool:
+        key = item.key_for(*identifiers)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(key, item, now)
+            state.refill(now)
+            if state.tokens < cost:
+                # This process alone has used up the window's budget
+                self.local_rejects += 1
+                return False
+            if state.lease >= cost and now < state.lease_expires:
+                state.lease -= cost
+                state.tokens -= cost
+                self.local_hits += 1
+                return True
+
+        lease = item.amount // LEASE_FRACTION
+        granted = 0
+        if lease > cost and self.storage.acquire_sliding_window_entry(key, item.amount, item.get_expiry(), lease):
+            granted = lease
+        elif self.storage.acquire_sliding_window_entry(key, item.amount, item.get_expiry(), cost):
+            granted = cost
+        self.remote_hits += 1
+        if not granted:
+            return False
+
+        with self._lock:
+            state = self._state(key, item, now)
+            state.tokens -= cost
+            state.lease = granted - cost
+            state.lease_expires = now + LEASE_TTL_S
+        return True
+
+    def clear(self, item, *identifiers: str) -> None:
+        with self._lock:
+            self._local.pop(item.key_for(*identifiers), None)
+        super().clear(item, *identifiers)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "local_keys": len(self._local),
+            "local_hits": self.local_hits,
+            "local_rejects": self.local_rejects,
+            "remote_hits": self.remote_hits,
+        }
+
+
+STRATEGIES[STRATEGY] = LocalPrecheckRateLimiter
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.rate_limit_storage or redis_url(),
+    strategy=STRATEGY,
+    key_prefix="ratelimit",
+    in_memory_fallback_enabled=True,
+)
@@ -0,0 +1,202 @@
+# app/core/password_hasher.py
+"""
+Dedicated, bounded executor for bcrypt.
+
+Each hash/verify costs ~250 ms of CPU. Running them on request threads lets a
+login spike starve every other endpoint, so they run here instead: a small
+worker pool (processes by default) with its own admission limit. Past
+`max_pending` outstanding calls new ones fail fast with PasswordHasherBusy,
+which routes turn into a 503.
+
+Async code awaits hash / verify_and_update. Sync routes, which do their DB
+work on the threadpool anyway, call the *_blocking variants: the calling
+thread waits, but the CPU work stays bounded by the pool. Those waiting
+threads come out of the threadpool every sync endpoint shares (anyio's 40
+tokens), so blocking callers get their own, much smaller admission limit
+(`max_blocking`): past it they are rejected instead of queueing.
+
+Hashes below the configured cost are upgraded transparently on login
+(see verify_and_update).
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+LATENCY_SAMPLES = 1024
+THREADPOOL_TOKENS = 40  # anyio's default to_thread limit, shared by every sync endpoint
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password operations outstanding."""
+
+
+def make_context(rounds: int) -> CryptContext:
+    # min_rounds == rounds: hashes made with a lower cost report needs_update
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+# --- Pool workers (top-level so they pickle) ---
+_contexts: Dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    ctx = _contexts.get(rounds)
+    if ctx is None:
+        ctx = _contexts[rounds] = make_context(rounds)
+    return ctx
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    try:
+        return _context(rounds).verify_and_update(password, hashed)
+    except ValueError:
+        # Unrecognised hash (e.g. placeholder on SSO-created accounts)
+        return False, None
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int, kind: str = "process", rounds: int = 12, max_blocking: int = 0):
+        self.workers = workers if workers > 0 else min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending if max_pending > 0 else self.workers * 16
+        # Threads parked in *_blocking calls: a quarter of the threadpool at most
+        self.max_blocking = max_blocking if max_blocking > 0 else min(self.workers * 2, THREADPOOL_TOKENS // 4)
+        self.kind = kind
+        self.rounds = rounds
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+
+        self._count_lock = threading.Lock()  # the *_blocking calls come from several threads
+        self.pending = 0
+        self.blocking = 0
+        self.completed = 0
+        self.rejected = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # Celery prefork children are daemonic and can't start pools; bcrypt
+                    # releases the GIL, so threads are a fine fallback there.
+                    if self.kind == "process" and not multiprocessing.current_process().daemon:
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            # forkserver: don't fork the multi-threaded server process
+                            mp_context=multiprocessing.get_context("forkserver"),
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+        return self._executor
+
+    def _admit(self) -> float:
+        with self._count_lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"{self.pending} password operations pending")
+            self.pending += 1
+        return time.monotonic()
+
+    def _done(self, started: float) -> None:
+        with self._count_lock:
+            self.pending -= 1
+            self.completed += 1
+            self._latencies.append(time.monotonic() - started)
+
+    async def _run(self, fn, *args):
+        started = self._admit()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._done(started)
+
+    def _run_blocking(self, fn, *args):
+        with self._count_lock:
+            if self.blocking >= self.max_blocking:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"{self.blocking} threads waiting on password operations")
+            self.blocking += 1
+        try:
+            started = self._admit()
+            try:
+                return self._get_executor().submit(fn, *args).result()
+            finally:
+                self._done(started)
+        finally:
+            with self._count_lock:
+                self.blocking -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, self.rounds)
+
+    async def hash_many(self, passwords: List[str]) -> List[Union[str, BaseException]]:
+        """
+        Hashes a batch with at most `workers` calls in flight, so interactive
+        logins queued behind it still get through. Failures are returned in place.
+        """
+        window = asyncio.Semaphore(self.workers)
+
+        async def one(password: str) -> str:
+            async with window:
+                return await self.hash(password)
+
+        return await asyncio.gather(*(one(p) for p in passwords), return_exceptions=True)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when `hashed` should be replaced (cost changed)."""
+        return await self._run(_verify_and_update, password, hashed, self.rounds)
+
+    def hash_blocking(self, password: str) -> str:
+        return self._run_blocking(_hash, password, self.rounds)
+
+    def verify_and_update_blocking(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return self._run_blocking(_verify_and_update, password, hashed, self.rounds)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def metrics(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def pct(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "max_blocking": self.max_blocking,
+            "pending": self.pending,
+            "blocking": self.blocking,
+            "running": min(self.pending, self.workers),
+            "queued": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "bcrypt_rounds": self.rounds,
+            "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "max": pct(1.0)},
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    kind=settings.password_hash_executor,
+    rounds=settings.bcrypt_rounds,
+    max_blocking=settings.password_hash_max_blocking,
+)
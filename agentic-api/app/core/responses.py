@@ -0,0 +1,98 @@
+# app/core/responses.py
+"""
+Fast JSON responses for large payloads.
+
+By default FastAPI validates a route's return value against its
+response_model, walks the result again with jsonable_encoder and encodes it
+with the stdlib json module. Routes returning big lists opt out of that by
+returning one of these instead (their response_model stays, so the OpenAPI
+docs don't change):
+
+* model_response(adapter, rows): rows (ORM objects or dicts) are validated and
+  encoded to bytes by pydantic-core through a TypeAdapter built once at
+  import time. Validation also drops fields the schema doesn't declare.
+* FastJSONResponse(content): plain dicts/lists encoded with orjson, or the
+  stdlib when orjson isn't installed. For hot lists, select exactly the
+  response columns and skip validation altogether.
+* RawJSON(text): JSON we stored as text ourselves (scan metadata) is spliced
+  into the output as-is instead of being parsed and encoded again. Worth it
+  for large documents; tiny values are cheaper to just `loads`.
+"""
+import json
+import secrets
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+loads = orjson.loads if orjson is not None else json.loads
+
+
+class RawJSON:
+    """A JSON document that is already serialised; emitted verbatim."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: Optional[str]):
+        self.text = text or "null"
+
+
+def _stdlib_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encodes `content` to JSON bytes, writing RawJSON values through unchanged."""
+    raw: List[bytes] = []
+    # NUL is always escaped by the encoders, and the token is per call, so real data can't match it
+    mark = f"\x00{secrets.token_hex(8)}\x00"
+
+    def default(obj: Any) -> Any:
+        if isinstance(obj, RawJSON):
+            raw.append(obj.text.encode())
+            return mark
+        if orjson is not None and isinstance(obj, Decimal):
+            return float(obj)
+        return _stdlib_default(obj)
+
+    if orjson is not None:
+        body = orjson.dumps(content, default=default, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(content, default=default, ensure_ascii=False, separators=(",", ":")).encode()
+    if not raw:
+        return body
+    # Markers appear in the order default() was called
+    parts = body.split(json.dumps(mark).encode())
+    out = [parts[0]]
+    for text, rest in zip(raw, parts[1:]):
+        out += (text, rest)
+    return b"".join(out)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_response(
+    adapter: TypeAdapter,
+    value: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Validates `value` (ORM objects allowed) with `adapter` and encodes it in one pydantic-core pass."""
+    body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
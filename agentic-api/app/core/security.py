@@ -7,15 +7,15 @@ from typing import Optional, Any, Dict
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.schemas.user import TokenData
 from app.config import settings
 from app.models.user import User
+from app.core.password_hasher import PasswordHasherBusy, make_context, password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = make_context(settings.bcrypt_rounds)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
@@ -26,6 +26,28 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# Request handlers use these: they run on the dedicated hashing pool, with the
+# calling (threadpool) thread waiting for the result
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+def hash_password_blocking(password: str) -> str:
+    try:
+        return password_hasher.hash_blocking(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+def verify_and_update_password_blocking(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """(valid, new_hash); new_hash is set when the stored hash uses an outdated cost."""
+    try:
+        return password_hasher.verify_and_update_blocking(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
 # ---- JWT UTILS ----
 def create_access_token(
     data: dict,
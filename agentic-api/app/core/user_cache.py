@@ -0,0 +1,164 @@
+# app/core/user_cache.py
+"""
+Short-TTL cache of authenticated users, keyed by JWT subject (email).
+
+get_current_user runs on nearly every request; this saves its users-table
+lookup. Entries are plain column snapshots, and each request gets its own
+detached User built from one, so requests never share ORM state. Credentials
+and one-time tokens are not cached; reading them off a cached user raises
+DetachedInstanceError instead of returning stale values.
+
+Routes that change a user's role, status, password or profile call
+invalidate(); the TTL bounds staleness in other processes. With
+user_cache_redis enabled the snapshot is shared through Redis as well;
+async callers (get_current_user) use aget / aset, which go through the
+asyncio Redis client instead of blocking the event loop.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+
+log = logging.getLogger(__name__)
+
+USER_CACHE_MAXSIZE = 10_000
+REDIS_PREFIX = "auth:user:"
+_UNCACHED = frozenset({
+    "hashed_password",
+    "reset_token",
+    "reset_token_expires",
+    "verification_token",
+    "verification_token_expires",
+})
+_CACHED_COLUMNS = tuple(c.key for c in User.__table__.columns if c.key not in _UNCACHED)
+
+
+class UserCache:
+    def __init__(self, ttl: int, maxsize: int = USER_CACHE_MAXSIZE, use_redis: bool = False):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()     # sync routes call get/invalidate from the threadpool
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _snapshot(user: User) -> Dict[str, Any]:
+        return {key: getattr(user, key) for key in _CACHED_COLUMNS}
+
+    @staticmethod
+    def _materialize(snapshot: Dict[str, Any]) -> User:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def _get_local(self, subject: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._entries.get(subject)
+            if item is not None and item[0] < time.monotonic():
+                del self._entries[subject]
+                item = None
+            if item is not None:
+                self._entries.move_to_end(subject)
+        return item[1] if item is not None else None
+
+    def _from_redis(self, subject: str, raw) -> Optional[Dict[str, Any]]:
+        if not raw:
+            return None
+        snapshot = json.loads(raw)
+        self._put_local(subject, snapshot)
+        return snapshot
+
+    def _result(self, snapshot: Optional[Dict[str, Any]]) -> Optional[User]:
+        if snapshot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._materialize(snapshot)
+
+    def get(self, subject: str) -> Optional[User]:
+        """For sync code (threadpool, Celery); async code uses aget."""
+        if self.ttl <= 0:
+            return None
+        snapshot = self._get_local(subject)
+        if snapshot is None and self.use_redis:
+            try:
+                from app.redis_client import get_redis
+                snapshot = self._from_redis(subject, get_redis().get(REDIS_PREFIX + subject))
+            except Exception as e:
+                log.warning("User cache redis get failed: %s", e)
+        return self._result(snapshot)
+
+    async def aget(self, subject: str) -> Optional[User]:
+        """get() for the event loop: Redis is read through the asyncio client."""
+        if self.ttl <= 0:
+            return None
+        snapshot = self._get_local(subject)
+        if snapshot is None and self.use_redis:
+            try:
+                from app.redis_client import get_async_redis
+                snapshot = self._from_redis(subject, await get_async_redis().get(REDIS_PREFIX + subject))
+            except Exception as e:
+                log.warning("User cache redis get failed: %s", e)
+        return self._result(snapshot)
+
+    def _put_local(self, subject: str, snapshot: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def set(self, subject: str, user: User) -> None:
+        if self.ttl <= 0:
+            return
+        snapshot = self._snapshot(user)
+        self._put_local(subject, snapshot)
+        if self.use_redis:
+            try:
+                from app.redis_client import get_redis
+                get_redis().set(REDIS_PREFIX + subject, json.dumps(snapshot), ex=self.ttl)
+            except Exception as e:
+                log.warning("User cache redis set failed: %s", e)
+
+    async def aset(self, subject: str, user: User) -> None:
+        if self.ttl <= 0:
+            return
+        snapshot = self._snapshot(user)
+        self._put_local(subject, snapshot)
+        if self.use_redis:
+            try:
+                from app.redis_client import get_async_redis
+                await get_async_redis().set(REDIS_PREFIX + subject, json.dumps(snapshot), ex=self.ttl)
+            except Exception as e:
+                log.warning("User cache redis set failed: %s", e)
+
+    def invalidate(self, subject: Optional[str]) -> None:
+        if not subject:
+            return
+        with self._lock:
+            self._entries.pop(subject, None)
+        if self.use_redis:
+            try:
+                from app.redis_client import get_redis
+                get_redis().delete(REDIS_PREFIX + subject)
+            except Exception as e:
+                log.warning("User cache redis invalidation failed: %s", e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "ttl": self.ttl, "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserCache(ttl=settings.user_cache_ttl, use_redis=settings.user_cache_redis)
@@ -0,0 +1,106 @@
+# app/crud/audit.py
+"""
+Audit log queries and rollover.
+
+Listing is keyset-paginated on (timestamp, id) descending, so page N costs the
+same as page 1. Recent rows live in audit_logs; rows older than
+settings.audit_hot_days are moved to audit_logs_archive by a daily task,
+keeping the hot table and its indexes small. Searches read both tables and
+merge, so callers never need to know where a row lives.
+"""
+import base64
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.audit_log import AuditLog, AuditLogArchive
+
+MAX_PAGE_SIZE = 500
+ROLLOVER_BATCH = 5_000
+
+_COLUMNS = ("id", "user_id", "action", "object_type", "object_id", "timestamp", "details")
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError on a malformed cursor."""
+    ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(ts), int(row_id)
+
+
+def _page_query(model, limit: int, after: Optional[Tuple[datetime, int]], user_id, action, object_type, object_id, since, until):
+    q = select(model)
+    if user_id is not None:
+        q = q.where(model.user_id == user_id)
+    if action:
+        q = q.where(model.action == action)
+    if object_type:
+        q = q.where(model.object_type == object_type)
+    if object_id is not None:
+        q = q.where(model.object_id == object_id)
+    if since is not None:
+        q = q.where(model.timestamp >= since)
+    if until is not None:
+        q = q.where(model.timestamp < until)
+    if after is not None:
+        ts, row_id = after
+        # Row-value comparison spelled out so every backend can use the timestamp index
+        q = q.where(or_(model.timestamp < ts, and_(model.timestamp == ts, model.id < row_id)))
+    return q.order_by(model.timestamp.desc(), model.id.desc()).limit(limit)
+
+
+def search_audit_logs(
+    db: Session,
+    *,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    object_type: Optional[str] = None,
+    object_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Tuple[List, Optional[str]]:
+    """Newest-first page of matching entries and the cursor for the next page (None at the end)."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after = decode_cursor(cursor) if cursor else None
+    filters = (user_id, action, object_type, object_id, since, until)
+
+    # One extra row tells us whether another page exists
+    rows = list(db.execute(_page_query(AuditLog, limit + 1, after, *filters)).scalars())
+    # Archived rows are all older than the hot window, so a full page inside it is final
+    hot_boundary = datetime.utcnow() - timedelta(days=settings.audit_hot_days)
+    if len(rows) <= limit or rows[limit - 1].timestamp < hot_boundary:
+        rows += db.execute(_page_query(AuditLogArchive, limit + 1, after, *filters)).scalars()
+        rows.sort(key=lambda r: (r.timestamp, r.id), reverse=True)
+
+    page, more = rows[:limit], len(rows) > limit
+    next_cursor = encode_cursor(page[-1].timestamp, page[-1].id) if more and page else None
+    return page, next_cursor
+
+
+def rollover_audit_logs(db: Session, hot_days: int, batch_size: int = ROLLOVER_BATCH) -> int:
+    """
+    Moves entries older than `hot_days` into audit_logs_archive, one batch per
+    transaction (each row is in exactly one table at any time). Returns rows moved.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=hot_days)
+    moved = 0
+    while True:
+        ids = list(db.execute(
+            select(AuditLog.id).where(AuditLog.timestamp < cutoff).order_by(AuditLog.timestamp).limit(batch_size)
+        ).scalars())
+        if not ids:
+            break
+        cols = [getattr(AuditLog, c) for c in _COLUMNS]
+        db.execute(insert(AuditLogArchive).from_select(list(_COLUMNS), select(*cols).where(AuditLog.id.in_(ids))))
+        db.execute(delete(AuditLog).where(AuditLog.id.in_(ids)))
+        db.commit()
+        moved += len(ids)
+    return moved
@@ -22,9 +22,10 @@ def create_data_source(
         raise HTTPException(400, "DataSource with this name exists.")
     ds = DataSource(**source.dict(), created_by=admin.email)
     db.add(ds)
+    db.flush()
+    log_action(db, admin.id, f"Created data source {ds.name}", "data_source", ds.id)
     db.commit()
     db.refresh(ds)
-    log_action(db, admin.id, f"Created data source {ds.name}")
     return ds
 
 @router.patch("/{ds_id}", response_model=DataSourceRead)
@@ -36,9 +37,9 @@ def update_data_source(
         raise HTTPException(404, "Not found")
     for key, value in update.dict(exclude_unset=True).items():
         setattr(ds, key, value)
+    log_action(db, admin.id, f"Updated data source {ds.name}", "data_source", ds.id)
     db.commit()
     db.refresh(ds)
-    log_action(db, admin.id, f"Updated data source {ds.name}")
     return ds
 
 @router.delete("/{ds_id}")
@@ -47,8 +48,8 @@ def delete_data_source(ds_id: int, db: Session = Depends(get_db), admin=Depends(
     if not ds:
         raise HTTPException(404, "Not found")
     db.delete(ds)
+    log_action(db, admin.id, f"Deleted data source {ds.name}", "data_source", ds.id)
     db.commit()
-    log_action(db, admin.id, f"Deleted data source {ds.name}")
     return {"ok": True}
 
 @router.post("/{ds_id}/test")
@@ -0,0 +1,119 @@
+# app/crud/profile.py
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+# NOTE: Adjust table/column names to your schema.
+# This query assumes tables: profile_result_column (prc), profile_run (pr)
+PROFILE_COLUMNS_SQL = """
+    SELECT
+        prc.table_name      AS table_name,
+        prc.column_name     AS column_name,
+        prc.data_type       AS data_type,
+        prc.null_percent    AS null_percent,
+        prc.distinct_percent AS distinct_percent,
+        prc.is_pii          AS is_pii,
+        prc.quality_score   AS quality_score
+    FROM profile_result_column prc
+    JOIN profile_run pr ON prc.run_id = pr.id
+    WHERE pr.scan_id = :scan_id
+    ORDER BY prc.table_name, prc.column_name
+    LIMIT :row_limit
+"""
+
+
+def get_profile_columns(db: Session, scan_id: str, limit: int) -> List[Any]:
+    """Profiled columns of a scan, ordered by table/column. Raises SQLAlchemyError."""
+    return db.execute(text(PROFILE_COLUMNS_SQL), {"scan_id": scan_id, "row_limit": int(limit)}).fetchall()
+
+
+def get_profile_version(db: Session, scan_id: str) -> Optional[str]:
+    """Changes whenever a profile run is added for the scan; None if it has none."""
+    row = db.execute(
+        text("SELECT MAX(pr.id) AS last_run, COUNT(*) AS runs FROM profile_run pr WHERE pr.scan_id = :scan_id"),
+        {"scan_id": scan_id},
+    ).one()
+    return f"{row.last_run}/{row.runs}" if row.runs else None
+
+
+def _scoped(sql: str, params: Dict[str, Any], scope_tables: Optional[List[str]], tail: str):
+    """Append an optional table filter (safe list-expanding IN) and the ORDER/GROUP tail."""
+    if scope_tables:
+        sql += " AND prc.table_name IN :tables "
+        params["tables"] = list(scope_tables)
+    stmt = text(sql + tail)
+    if scope_tables:
+        stmt = stmt.bindparams(bindparam("tables", expanding=True))
+    return stmt, params
+
+
+_FROM_SCAN = """
+    FROM profile_result_column prc
+    JOIN profile_run pr ON prc.run_id = pr.id
+    WHERE pr.scan_id = :scan_id
+"""
+
+
+def count_pii_columns(db: Session, scan_id: str, scope_tables: Optional[List[str]] = None) -> Any:
+    """Row with the exact number of PII `columns` and of `tables` containing them."""
+    stmt, params = _scoped(
+        "SELECT COUNT(*) AS columns, COUNT(DISTINCT prc.table_name) AS tables" + _FROM_SCAN + " AND prc.is_pii = :yes ",
+        {"scan_id": scan_id, "yes": True},
+        scope_tables,
+        "",
+    )
+    return db.execute(stmt, params).one()
+
+
+def get_pii_tables(db: Session, scan_id: str, scope_tables: Optional[List[str]] = None, limit: int = 1000) -> List[Any]:
+    """Tables with PII and their PII column count, most first."""
+    stmt, params = _scoped(
+        "SELECT prc.table_name AS table_name, COUNT(*) AS columns" + _FROM_SCAN + " AND prc.is_pii = :yes ",
+        {"scan_id": scan_id, "yes": True, "row_limit": limit},
+        scope_tables,
+        " GROUP BY prc.table_name ORDER BY columns DESC, prc.table_name LIMIT :row_limit ",
+    )
+    return db.execute(stmt, params).fetchall()
+
+
+def get_pii_columns(db: Session, scan_id: str, scope_tables: Optional[List[str]] = None, limit: int = 1000) -> List[Any]:
+    stmt, params = _scoped(
+        "SELECT prc.table_name AS table_name, prc.column_name AS column_name" + _FROM_SCAN + " AND prc.is_pii = :yes ",
+        {"scan_id": scan_id, "yes": True, "row_limit": limit},
+        scope_tables,
+        " ORDER BY prc.table_name, prc.column_name LIMIT :row_limit ",
+    )
+    return db.execute(stmt, params).fetchall()
+
+
+def get_column_extremes(
+    db: Session, scan_id: str, metric: str, descending: bool, scope_tables: Optional[List[str]] = None, limit: int = 10
+) -> List[Any]:
+    """Columns with the highest/lowest `metric` (null_percent or quality_score)."""
+    if metric not in ("null_percent", "quality_score"):
+        raise ValueError(f"Unsupported metric: {metric}")
+    stmt, params = _scoped(
+        f"SELECT prc.table_name AS table_name, prc.column_name AS column_name, prc.{metric} AS value"
+        + _FROM_SCAN + f" AND prc.{metric} IS NOT NULL ",
+        {"scan_id": scan_id, "row_limit": limit},
+        scope_tables,
+        f" ORDER BY prc.{metric} {'DESC' if descending else 'ASC'} LIMIT :row_limit ",
+    )
+    return db.execute(stmt, params).fetchall()
+
+
+def get_table_extremes(
+    db: Session, scan_id: str, metric: str, descending: bool, scope_tables: Optional[List[str]] = None, limit: int = 10
+) -> List[Any]:
+    """Tables ranked by the average `metric` of their columns."""
+    if metric not in ("null_percent", "quality_score"):
+        raise ValueError(f"Unsupported metric: {metric}")
+    stmt, params = _scoped(
+        f"SELECT prc.table_name AS table_name, AVG(prc.{metric}) AS value, COUNT(*) AS columns"
+        + _FROM_SCAN + f" AND prc.{metric} IS NOT NULL ",
+        {"scan_id": scan_id, "row_limit": limit},
+        scope_tables,
+        f" GROUP BY prc.table_name ORDER BY value {'DESC' if descending else 'ASC'} LIMIT :row_limit ",
+    )
+    return db.execute(stmt, params).fetchall()
@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password, verify_and_update_password_blocking
+from app.core.user_cache import user_cache
+from app.crud.user_search import user_count_cache
 from typing import Optional
 from datetime import datetime
 
@@ -24,6 +26,7 @@ def create_user(db: Session, user: UserCreate | dict) -> User:
     db_user = User(**user_data)
     db.add(db_user)
     db.commit()
+    user_count_cache.clear()
     db.refresh(db_user)
     return db_user
 
@@ -31,9 +34,17 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+    """Verifies on the hashing pool; upgrades the stored hash if its cost is outdated."""
     user = get_user_by_email(db, email)
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
         return None
+    valid, new_hash = verify_and_update_password_blocking(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+        db.refresh(user)
     return user
 
 # -- NEW: set_user_verification --
@@ -42,6 +53,7 @@ def set_user_verification(db: Session, user: User, value: bool = True) -> User:
     user.verification_token = None
     user.verification_token_expires = None
     db.commit()
+    user_cache.invalidate(user.email)
     db.refresh(user)
     return user
 
@@ -59,5 +71,6 @@ def set_user_password(db: Session, user: User, new_password: str) -> User:
     user.reset_token = None
     user.reset_token_expires = None
     db.commit()
+    user_cache.invalidate(user.email)
     db.refresh(user)
     return user
@@ -0,0 +1,159 @@
+# app/crud/user_search.py
+"""
+Admin user listing and search.
+
+Pages are keyset-paginated on users.id, so page N costs the same as page 1.
+Substring search is index-backed on both supported databases:
+
+* PostgreSQL: pg_trgm GIN indexes on email / name / role, which serve the
+  plain `ILIKE '%term%'` predicates directly.
+* SQLite: an FTS5 table with the trigram tokenizer (external content, kept in
+  sync by triggers). Terms shorter than three characters can't use trigrams
+  and fall back to LIKE.
+
+Totals are cached for COUNT_CACHE_TTL_S; an unfiltered count on a large
+PostgreSQL table uses the planner's row estimate instead of a full scan.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+log = logging.getLogger(__name__)
+
+COUNT_CACHE_TTL_S = 30
+COUNT_CACHE_MAX = 1_000
+ESTIMATE_MIN_ROWS = 100_000   # below this an exact count is cheap enough
+FTS_TABLE = "users_fts"
+
+_PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (email gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_name_trgm ON users USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_role_trgm ON users USING gin (role gin_trgm_ops)",
+]
+
+_SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"email, name, role, content='users', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, email, name, role) VALUES (new.id, new.email, new.name, new.role); END",
+    f"CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, email, name, role) VALUES ('delete', old.id, old.email, old.name, old.role); END",
+    f"CREATE TRIGGER users_fts_au AFTER UPDATE ON users BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, email, name, role) VALUES ('delete', old.id, old.email, old.name, old.role); "
+    f"INSERT INTO {FTS_TABLE}(rowid, email, name, role) VALUES (new.id, new.email, new.name, new.role); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+_fts_available = False
+
+
+def ensure_user_search_index(engine: Engine) -> None:
+    """Creates the search indexes if missing. Safe to call on every startup."""
+    global _fts_available
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "postgresql":
+                for stmt in _PG_DDL:
+                    conn.execute(text(stmt))
+            elif dialect == "sqlite":
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": FTS_TABLE}
+                ).first()
+                if not exists:
+                    for stmt in _SQLITE_DDL:
+                        conn.execute(text(stmt))
+                _fts_available = True
+    except Exception as e:
+        # Search still works without the index, just slower
+        log.warning("Could not create user search index on %s: %s", dialect, e)
+
+
+class _CountCache:
+    def __init__(self, ttl: float = COUNT_CACHE_TTL_S, max_entries: int = COUNT_CACHE_MAX):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        hit = self._data.get(key)
+        if hit and hit[0] > time.monotonic():
+            return hit[1]
+        return None
+
+    def set(self, key: str, value: int) -> None:
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                self._data.clear()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+user_count_cache = _CountCache()
+
+
+def _search_filter(db: Session, search: str):
+    term = search.strip()
+    if db.get_bind().dialect.name == "sqlite" and _fts_available and len(term) >= 3:
+        phrase = '"' + term.replace('"', '""') + '"'
+        matches = select(literal_column("rowid")).select_from(table(FTS_TABLE)).where(
+            text(f"{FTS_TABLE} MATCH :fts_q").bindparams(fts_q=phrase)
+        )
+        return User.id.in_(matches)
+    like = f"%{term}%"
+    return or_(User.email.ilike(like), User.name.ilike(like), User.role.ilike(like))
+
+
+def count_users(db: Session, search: Optional[str] = None) -> int:
+    key = (search or "").strip().lower()
+    cached = user_count_cache.get(key)
+    if cached is not None:
+        return cached
+    total = None
+    if not key and db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'users'")).scalar()
+        if estimate is not None and estimate >= ESTIMATE_MIN_ROWS:
+            total = int(estimate)
+    if total is None:
+        q = select(func.count(User.id))
+        if key:
+            q = q.where(_search_filter(db, search))
+        total = db.execute(q).scalar_one()
+    user_count_cache.set(key, total)
+    return total
+
+
+def list_users_page(
+    db: Session,
+    limit: int,
+    search: Optional[str] = None,
+    after_id: Optional[int] = None,
+    skip: int = 0,
+) -> Tuple[List[User], Optional[int]]:
+    """
+    One page of users ordered by id and the id to pass as `after_id` for the
+    next page (None at the end). `skip` is only honoured without `after_id`.
+    """
+    q = select(User)
+    if search and search.strip():
+        q = q.where(_search_filter(db, search))
+    if after_id is not None:
+        q = q.where(User.id > after_id)
+    elif skip:
+        q = q.offset(skip)
+    users = list(db.execute(q.order_by(User.id).limit(limit + 1)).scalars())
+    more = len(users) > limit
+    users = users[:limit]
+    return users, (users[-1].id if more and users else None)
@@ -0,0 +1,140 @@
+# app/db/init_db.py
+"""
+Schema creation, kept out of import time.
+
+Run it as a deploy / migration step:
+
+    python -m app.db.init_db
+
+The API also runs it from its lifespan hook when settings.db_create_on_startup
+is set (the default, for local development); production pods can turn that
+off and start without touching the schema.
+
+create_all only creates missing tables, so columns added to existing tables
+later are listed in ADDED_COLUMNS and added (and backfilled) here, indexes
+added to them in ADDED_INDEXES, and columns that became nullable are listed
+in RELAXED_COLUMNS.
+"""
+import hashlib
+import logging
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.schema import CreateTable
+
+from app.db.base import Base
+from app.db.session import engine
+
+log = logging.getLogger(__name__)
+
+HASH_BACKFILL_BATCH = 200
+
+
+def _backfill_result_hashes(conn) -> None:
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, metadata_json FROM scan_job_results WHERE id > :last ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": HASH_BACKFILL_BATCH},
+        ).all()
+        if not rows:
+            return
+        conn.execute(
+            text("UPDATE scan_job_results SET content_hash = :h WHERE id = :id"),
+            [{"id": row.id, "h": hashlib.sha256(row.metadata_json.encode()).hexdigest()} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+# (table, column, backfill for existing rows)
+ADDED_COLUMNS = [
+    ("scan_jobs", "updated_at", lambda conn: conn.execute(text("UPDATE scan_jobs SET updated_at = COALESCE(finished_at, created_at)"))),
+    ("scan_job_results", "content_hash", _backfill_result_hashes),
+    ("data_sources", "updated_at", lambda conn: conn.execute(text("UPDATE data_sources SET updated_at = CURRENT_TIMESTAMP"))),
+    ("scan_job_results", "classification_json", lambda conn: None),  # older reports stay inside the payload
+]
+
+
+def _add_missing_columns(bind) -> None:
+    inspector = inspect(bind)
+    for table, column, backfill in ADDED_COLUMNS:
+        if column in {c["name"] for c in inspector.get_columns(table)}:
+            continue
+        col_type = Base.metadata.tables[table].c[column].type.compile(dialect=bind.dialect)
+        with bind.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}"))
+            backfill(conn)
+        log.info("Added column %s.%s", table, column)
+
+
+# (table, index name) declared after the table was first created
+ADDED_INDEXES = [
+    ("audit_logs", "ix_audit_logs_ts_user_objtype"),
+    ("audit_logs", "ix_audit_logs_user_ts"),
+    ("audit_logs", "ix_audit_logs_object_ts"),
+    ("audit_logs_archive", "ix_audit_logs_archive_ts_user_objtype"),
+    ("audit_logs_archive", "ix_audit_logs_archive_user_ts"),
+    ("audit_logs_archive", "ix_audit_logs_archive_object_ts"),
+]
+
+
+def _add_missing_indexes(bind) -> None:
+    inspector = inspect(bind)
+    for table, name in ADDED_INDEXES:
+        if name in {ix["name"] for ix in inspector.get_indexes(table)}:
+            continue
+        index = next(ix for ix in Base.metadata.tables[table].indexes if ix.name == name)
+        # Builds over the whole table (and blocks its writes on Postgres meanwhile): run
+        # `python -m app.db.init_db` as a deploy step on large audit tables
+        index.create(bind=bind, checkfirst=True)
+        log.info("Created index %s on %s", name, table)
+
+
+# (table, column) made nullable after the table was first created
+RELAXED_COLUMNS = [
+    ("scan_job_results", "metadata_json"),  # payloads moved to scan_result_blobs
+]
+
+
+def _rebuild_sqlite_table(conn, table) -> None:
+    # SQLite can't change a column constraint in place: copy into a table built from the model
+    metadata = MetaData()
+    for fk in table.foreign_keys:
+        fk.column.table.to_metadata(metadata)
+    rebuilt = table.to_metadata(metadata, name=f"{table.name}__rebuild")
+    columns = ", ".join(c.name for c in table.columns)
+    conn.execute(CreateTable(rebuilt))
+    conn.execute(text(f"INSERT INTO {rebuilt.name} ({columns}) SELECT {columns} FROM {table.name}"))
+    conn.execute(text(f"DROP TABLE {table.name}"))
+    conn.execute(text(f"ALTER TABLE {rebuilt.name} RENAME TO {table.name}"))
+    for index in table.indexes:
+        index.create(conn)
+
+
+def _relax_not_null(bind) -> None:
+    inspector = inspect(bind)
+    for table, column in RELAXED_COLUMNS:
+        if next(c for c in inspector.get_columns(table) if c["name"] == column)["nullable"]:
+            continue
+        with bind.begin() as conn:
+            if bind.dialect.name == "sqlite":
+                _rebuild_sqlite_table(conn, Base.metadata.tables[table])
+            else:
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} DROP NOT NULL"))
+        log.info("Made %s.%s nullable", table, column)
+
+
+def init_db(bind=engine) -> None:
+    import app.models  # noqa: F401  registers every table on Base.metadata
+    from app.crud.user_search import ensure_user_search_index
+
+    Base.metadata.create_all(bind=bind)
+    _add_missing_columns(bind)
+    _add_missing_indexes(bind)
+    _relax_not_null(bind)
+    ensure_user_search_index(bind)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    log.info("Schema is up to date")
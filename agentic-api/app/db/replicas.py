@@ -0,0 +1,212 @@
+# app/db/replicas.py
+"""
+Read-replica routing.
+
+Read-only dependencies (`get_read_db`, `get_async_read_db`) bind their
+session to one of settings.database_replica_urls, round-robin. The primary
+is used instead when:
+
+* no replicas are configured, or all of them are marked down: a replica
+  whose connection fails is skipped for REPLICA_RETRY_S and then tried
+  again, so failover and recovery need no operator action;
+* the client wrote something in the last replica_sticky_seconds
+  (read-your-writes). Routes whose writes are read back through replica
+  sessions (data sources, scan jobs) declare it with the `writes_primary`
+  dependency; their successful responses set a short-lived cookie, which
+  every worker honours, and are also remembered in-process per client, for
+  API callers that don't keep cookies. Read-only POSTs (/agentic-ai/ask,
+  logins) don't pin the client.
+
+Sessions on a replica carry `info["replica"]`, so shared helpers can avoid
+writing through them.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal, SessionLocal, _pool_options, async_database_url
+
+log = logging.getLogger(__name__)
+
+REPLICA_RETRY_S = 15.0
+STICKY_COOKIE = "primary_until"
+STICKY_MAX_KEYS = 10_000
+# Anything that prevents connecting: drivers don't all wrap refused or timed-out
+# connections in DBAPIError (asyncpg raises the bare OSError)
+CONNECT_ERRORS = (DBAPIError, OSError, asyncio.TimeoutError)
+
+
+class _Replica:
+    def __init__(self, index: int, url: str):
+        self.name = f"replica{index}"
+        self.url = url
+        self.down_until = 0.0
+        self._engine = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._lock = threading.Lock()
+
+    def _watch(self, sync_engine) -> None:
+        @event.listens_for(sync_engine, "handle_error")
+        def _on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(context.original_exception)
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    engine = create_engine(self.url, echo=settings.debug, **_pool_options(self.url))
+                    self._watch(engine)
+                    self._engine = engine
+        return self._engine
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            with self._lock:
+                if self._async_engine is None:
+                    url = async_database_url(self.url)
+                    engine = create_async_engine(url, echo=settings.debug, **_pool_options(url))
+                    self._watch(engine.sync_engine)
+                    self._async_engine = engine
+        return self._async_engine
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, exc: BaseException) -> None:
+        if self.healthy:
+            log.warning("Read replica %s unavailable, using others for %.0fs: %s", self.name, REPLICA_RETRY_S, exc)
+        self.down_until = time.monotonic() + REPLICA_RETRY_S
+
+
+class ReplicaRouter:
+    def __init__(self, urls: List[str], sticky_seconds: int):
+        self.replicas = [_Replica(i, url) for i, url in enumerate(urls)]
+        self.sticky_seconds = sticky_seconds
+        self._next = 0
+        self._recent_writers: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.routed = {"primary": 0, "replica": 0, "sticky": 0, "failover": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    @staticmethod
+    def _client_key(request: Request) -> str:
+        auth = request.headers.get("authorization")
+        if auth:
+            return hashlib.sha1(auth.encode()).hexdigest()
+        return request.client.host if request.client else ""
+
+    def _sticky(self, request: Request) -> bool:
+        now = time.time()
+        try:
+            if float(request.cookies.get(STICKY_COOKIE, 0)) > now:
+                return True
+        except ValueError:
+            pass
+        until = self._recent_writers.get(self._client_key(request))
+        return until is not None and until > now
+
+    def note_write(self, request: Request, response: Response) -> None:
+        """Pins the client's reads to the primary for `sticky_seconds`."""
+        if not self.enabled or self.sticky_seconds <= 0:
+            return
+        until = time.time() + self.sticky_seconds
+        response.set_cookie(STICKY_COOKIE, f"{until:.3f}", max_age=self.sticky_seconds, httponly=True, samesite="lax")
+        with self._lock:
+            key = self._client_key(request)
+            self._recent_writers[key] = until
+            self._recent_writers.move_to_end(key)
+            while len(self._recent_writers) > STICKY_MAX_KEYS:
+                self._recent_writers.popitem(last=False)
+
+    def choose(self, request: Optional[Request]) -> Optional[_Replica]:
+        """A healthy replica for this request, or None for the primary."""
+        if not self.enabled:
+            return None
+        if request is not None and self._sticky(request):
+            self.routed["sticky"] += 1
+            return None
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+                if replica.healthy:
+                    self.routed["replica"] += 1
+                    return replica
+        self.routed["primary"] += 1
+        return None
+
+    def read_session(self, request: Optional[Request]) -> Session:
+        replica = self.choose(request)
+        if replica is not None:
+            db = SessionLocal(bind=replica.engine, info={"replica": replica.name})
+            try:
+                # Connect now, so a dead replica fails over instead of failing the request
+                db.connection()
+                return db
+            except CONNECT_ERRORS as e:
+                db.close()
+                replica.mark_down(e)
+                self.routed["failover"] += 1
+        return SessionLocal()
+
+    async def async_read_session(self, request: Optional[Request]) -> AsyncSession:
+        replica = self.choose(request)
+        if replica is not None:
+            db = AsyncSessionLocal(bind=replica.async_engine, info={"replica": replica.name})
+            try:
+                await db.connection()
+                return db
+            except CONNECT_ERRORS as e:
+                await db.close()
+                replica.mark_down(e)
+                self.routed["failover"] += 1
+        return AsyncSessionLocal()
+
+    def stats(self):
+        return {
+            "replicas": [{"name": r.name, "healthy": r.healthy} for r in self.replicas],
+            "routed": dict(self.routed),
+            "sticky_seconds": self.sticky_seconds,
+        }
+
+
+replica_router = ReplicaRouter(
+    [u.strip() for u in settings.database_replica_urls.split(",") if u.strip()],
+    settings.replica_sticky_seconds,
+)
+
+
+def writes_primary(request: Request) -> None:
+    """Route dependency for endpoints that commit: pins the client's reads to the primary afterwards."""
+    request.state.wrote_primary = True
+
+
+def get_read_db(request: Request):
+    db = replica_router.read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    async with await replica_router.async_read_session(request) as db:
+        yield db
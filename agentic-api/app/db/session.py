@@ -1,18 +1,86 @@
+# app/db/session.py
+"""
+Database engines and the request session dependencies.
+
+Sync code (Celery tasks, sync routes) uses `SessionLocal` / `get_db`. Async
+routes use `get_async_db`, which yields an AsyncSession on an asyncpg
+(PostgreSQL) or aiosqlite (SQLite) engine, so a DB wait doesn't hold a
+threadpool slot or block the event loop. The async engine is created on
+first use, so processes that never touch it don't need the async driver.
+"""
+from typing import Any, AsyncIterator, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.database_url
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=settings.debug)
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def _pool_options(url: str) -> Dict[str, Any]:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": True,
+    }
+
+
+def async_database_url(url: str) -> str:
+    """`url` with its driver replaced by the async one (postgresql+psycopg2 -> postgresql+asyncpg)."""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=settings.debug, **_pool_options(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-# --- This is the function you want to export! ---
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        url = settings.async_database_url or async_database_url(SQLALCHEMY_DATABASE_URL)
+        _async_engine = create_async_engine(url, echo=settings.debug, **_pool_options(url))
+    return _async_engine
+
+
+def AsyncSessionLocal(**kw) -> AsyncSession:
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        # expire_on_commit=False: attribute access after commit would otherwise need awaited IO
+        _async_sessionmaker = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker(**kw)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines() -> None:
+    engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
@@ -1,21 +1,31 @@
 # app/main.py
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 
 # Load environment variables early
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
+from sqlalchemy.engine import make_url
+
+from app.core.compression import CompressionMiddleware
 from app.core.limiter import limiter
+from app.core.password_hasher import password_hasher
 from app.config import settings
-from app.db.base import Base
-from app.db.session import engine
+from app.audit import audit_writer
+from app.db.init_db import init_db
+from app.db.session import dispose_engines
+from app.db.replicas import replica_router
 
 # Import routers explicitly
 from app.api.routes.health import router as health_router
@@ -29,16 +39,31 @@ from app.api.routes import data_sources
 from app.api.routes.scan_api import router as scan_api_router
 from app.api.routes.scan_jobs import router as scan_jobs_router
 from app.api.routes import agentic_ai
+from app.api.routes.audit import router as audit_router
+
+log = logging.getLogger(__name__)
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
 
-print("DATABASE:", settings.database_url)
+# Startup work happens here, not at import: importing app.main stays cheap for
+# tooling, tests and the startup report (see startup_report.py)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log.info("Starting %s, database %s", settings.app_name, make_url(settings.database_url).render_as_string(hide_password=True))
+    if settings.db_create_on_startup:
+        await asyncio.to_thread(init_db)
+    yield
+    password_hasher.shutdown()
+    try:
+        await asyncio.to_thread(audit_writer.flush)
+    except Exception:
+        log.exception("Audit flush at shutdown failed")
+    await dispose_engines()
 
 # Instantiate FastAPI
 app = FastAPI(
     title=settings.app_name,
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Handle HTTPExceptions
@@ -50,6 +75,15 @@ async def http_exception_handler(request, exc):
 app.state.limiter = limiter
 app.add_exception_handler(429, _rate_limit_exceeded_handler)
 
+# Read-your-writes: after a successful write (routes depending on writes_primary),
+# the client's reads skip the replicas for a few seconds
+@app.middleware("http")
+async def pin_reads_after_write(request: Request, call_next):
+    response = await call_next(request)
+    if getattr(request.state, "wrote_primary", False) and response.status_code < 400:
+        replica_router.note_write(request, response)
+    return response
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -59,6 +93,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost: compresses everything above, including streamed exports
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware)
+
 # Include all routers
 app.include_router(health_router, prefix="/health", tags=["Health"])
 app.include_router(fields_router, prefix="/fields", tags=["Fields"])
@@ -66,6 +104,7 @@ app.include_router(user_router, prefix="/users", tags=["Users"])
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 app.include_router(data_sources_router, prefix="/admin/data-sources", tags=["Data Sources"])
+app.include_router(audit_router, prefix="/admin/audit-logs", tags=["Audit"])
 app.include_router(source_types.router, prefix="/source-types", tags=["Source Types"])
 app.include_router(data_sources.public_router)
 app.include_router(scan_api_router, prefix="/api")
@@ -1,3 +1,6 @@
 from .data_source import DataSource
-from .scan_job import ScanJob
-from .audit_log import AuditLog
\ No newline at end of file
+from .scan_job import ScanJob, ScanJobResult, ScanResultBlob
+from .audit_log import AuditLog, AuditLogArchive
+from .scan_digest import ScanDigest
+from .email_outbox import EmailOutbox
+from .user import User
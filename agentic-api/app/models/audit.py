@@ -1,11 +0,0 @@
-# app/models/audit.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from datetime import datetime
-from app.db.base import Base
-
-class AuditLog(Base):
-    __tablename__ = "audit_logs"
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    action = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow)
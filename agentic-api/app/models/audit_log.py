@@ -1,15 +1,40 @@
 # app/models/audit_log.py
 
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.orm import declared_attr
 from app.db.base import Base
 
 
-class AuditLog(Base):
-    __tablename__ = "audit_logs"
-    id = Column(Integer, primary_key=True, index=True)
+class AuditLogColumns:
+    """
+    Shared by the hot table and its archive. Rows older than
+    settings.audit_hot_days are rolled over into the archive (see app.crud.audit).
+    """
     user_id = Column(Integer, nullable=False)
     action = Column(String, nullable=False)
     object_type = Column(String, nullable=False)
     object_id = Column(Integer, nullable=False)
     timestamp = Column(DateTime, nullable=False)
     details = Column(Text, nullable=True)  # This will store JSON as text
+
+    @declared_attr
+    def __table_args__(cls):
+        t = cls.__tablename__
+        return (
+            # Time-range scans, optionally narrowed by user / object type
+            Index(f"ix_{t}_ts_user_objtype", "timestamp", "user_id", "object_type"),
+            # "Everything user X did", newest first
+            Index(f"ix_{t}_user_ts", "user_id", "timestamp"),
+            # "Everything that happened to object Y", newest first
+            Index(f"ix_{t}_object_ts", "object_type", "object_id", "timestamp"),
+        )
+
+
+class AuditLog(AuditLogColumns, Base):
+    __tablename__ = "audit_logs"
+    id = Column(Integer, primary_key=True, index=True)
+
+
+class AuditLogArchive(AuditLogColumns, Base):
+    __tablename__ = "audit_logs_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)  # keeps the id from audit_logs
@@ -1,5 +1,7 @@
 # app/models/data_source.py
-from sqlalchemy import Column, Integer, String, Boolean
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
 from app.db.base import Base
 
 class DataSource(Base):
@@ -11,3 +13,4 @@ class DataSource(Base):
     is_active = Column(Boolean, default=True)
     created_by = Column(String, nullable=True)
     connection_status = Column(String, default="unknown") 
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
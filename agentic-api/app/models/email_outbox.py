@@ -0,0 +1,25 @@
+# app/models/email_outbox.py
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from app.db.base import Base
+from datetime import datetime
+
+class EmailOutbox(Base):
+    """Outgoing email, written in the same transaction as the change that triggers it."""
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True)
+    dedupe_key = Column(String, unique=True, nullable=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending | sending | sent | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
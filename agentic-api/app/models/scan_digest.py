@@ -0,0 +1,15 @@
+# app/models/scan_digest.py
+
+from sqlalchemy import Column, Integer, Text, DateTime, String
+from app.db.base import Base
+from datetime import datetime
+
+class ScanDigest(Base):
+    """Precomputed prompt summary of a scan (table_name is NULL) or of one of its tables."""
+    __tablename__ = "scan_digests"
+    id = Column(Integer, primary_key=True)
+    scan_id = Column(String, index=True, nullable=False)
+    table_name = Column(String, nullable=True)
+    digest_text = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
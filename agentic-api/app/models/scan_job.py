@@ -1,8 +1,9 @@
 # app/models/scan_job.py
 
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, String
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, String, LargeBinary
 from app.db.base import Base
 from datetime import datetime
+import hashlib
 
 class ScanJob(Base):
     __tablename__ = "scan_jobs"
@@ -18,10 +19,28 @@ class ScanJob(Base):
     scheduled_cron = Column(String, nullable=True)
     finished_at = Column(DateTime, nullable=True)
     metadata_result_id = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
+
+def _metadata_hash(context):
+    text = context.get_current_parameters().get("metadata_json")
+    return hashlib.sha256(text.encode()).hexdigest() if text is not None else None
 
 class ScanJobResult(Base):
     __tablename__ = "scan_job_results"
     id = Column(Integer, primary_key=True)
     scan_job_id = Column(Integer, ForeignKey("scan_jobs.id"))
-    metadata_json = Column(Text, nullable=False)  # store metadata as JSON string
+    # Older results only: new payloads live in scan_result_blobs (see app/service/result_store.py)
+    metadata_json = Column(Text, nullable=True)
+    content_hash = Column(String(64), default=_metadata_hash, nullable=True)  # sha256 of the payload JSON; the blob key
+    # This run's classification report (workers, timings): varies per run, so kept out of the hashed payload
+    classification_json = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ScanResultBlob(Base):
+    """One stored copy per distinct scan result payload, keyed by its sha256."""
+    __tablename__ = "scan_result_blobs"
+    hash = Column(String(64), primary_key=True)
+    encoding = Column(String(16), nullable=False)  # "zstd", or "identity" when zstandard isn't installed
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # uncompressed bytes
     created_at = Column(DateTime, default=datetime.utcnow)
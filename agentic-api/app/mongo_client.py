@@ -1,15 +1,23 @@
 # app/mongo_client.py
 
-from pymongo import MongoClient
 from app.config import settings
 
-client = MongoClient(settings.MONGO_URI)
-db = client["your_database_name"]  # <- Replace with your actual DB name, or make this dynamic if needed
+_db = None
+
+def get_mongo_db():
+    """The results database; pymongo is imported and the client opened on first use."""
+    global _db
+    if _db is None:
+        from pymongo import MongoClient
+        client = MongoClient(settings.MONGO_URI)
+        _db = client["your_database_name"]  # <- Replace with your actual DB name, or make this dynamic if needed
+    return _db
 
 def get_metadata_result(result_id: str):
     """
     Fetches a scan result from MongoDB using its ID (as string).
     """
+    db = get_mongo_db()
     # If result_id is stored as ObjectId, convert it:
     # from bson import ObjectId
     # result = db.scan_results.find_one({"_id": ObjectId(result_id)})
@@ -0,0 +1,31 @@
+# app/redis_client.py
+"""
+Shared Redis connections (the same Redis that backs Celery unless REDIS_URL is set).
+Clients are created lazily so importing this module never opens a socket.
+"""
+from app.config import settings
+
+_client = None
+_async_client = None
+
+
+def redis_url() -> str:
+    return settings.REDIS_URL or settings.CELERY_BROKER_URL
+
+
+def get_redis():
+    """Synchronous client, for Celery tasks and sync routes."""
+    global _client
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(redis_url(), socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _client
+
+
+def get_async_redis():
+    """asyncio client, for use inside async routes."""
+    global _async_client
+    if _async_client is None:
+        import redis.asyncio as aioredis
+        _async_client = aioredis.Redis.from_url(redis_url(), socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _async_client
@@ -0,0 +1,21 @@
+# app/schemas/audit.py
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+
+class AuditLogRead(BaseModel):
+    id: int
+    user_id: int
+    action: str
+    object_type: str
+    object_id: int
+    timestamp: datetime
+    details: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogRead]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next (older) page
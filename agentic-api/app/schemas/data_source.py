@@ -1,6 +1,6 @@
 # app/schemas/data_source.py
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Optional
 
 class DataSourceBase(BaseModel):
     name: str
@@ -31,3 +31,7 @@ class DataSourcePublic(BaseModel):
 
 class Config:
     from_attributes = True
+
+# Built once; list routes encode straight to bytes with these (see app.core.responses)
+data_source_list_adapter = TypeAdapter(List[DataSourceRead])
+data_source_public_list_adapter = TypeAdapter(List[DataSourcePublic])
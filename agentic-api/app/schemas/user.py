@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict, Any, Literal
 
 
 class UserBase(BaseModel):
@@ -45,8 +45,39 @@ class UserUpdate(BaseModel):
 
 class UserListResponse(BaseModel):
     users: List[UserRead]
-    total: int
+    total: int  # may be cached for a few seconds, or estimated on very large tables
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
 
 class ChangePasswordRequest(BaseModel):
     old_password: str
-    new_password: str
\ No newline at end of file
+    new_password: str
+# ---- Bulk admin operations ----
+Role = Literal["admin", "user"]
+Status = Literal["active", "inactive"]
+
+class UserImportRow(BaseModel):
+    email: EmailStr
+    name: Optional[str] = None
+    role: Optional[Role] = "user"
+    status: Optional[Status] = "active"
+    password: Optional[str] = None  # omitted: the user is invited to set one
+
+class UserImportError(BaseModel):
+    row: int  # 1-based data row (CSV header not counted)
+    email: Optional[str] = None
+    error: str
+
+class UserImportResult(BaseModel):
+    created: int
+    invited: int
+    failed: int
+    errors: List[UserImportError]
+
+class BulkUserUpdate(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=10_000)
+    role: Optional[Role] = None
+    status: Optional[Status] = None
+
+class BulkUserUpdateResult(BaseModel):
+    updated: int
+    not_found: List[int]
@@ -0,0 +1,137 @@
+# app/service/ai_intent_router.py
+"""
+Fast path for structured governance questions.
+
+Questions such as "which columns contain PII?" or "which tables have the most
+nulls?" have exact answers in the profiling tables. They are recognised here
+with conservative patterns and answered with a single query; anything that
+asks for judgement (why / how should / recommend ...) goes to the LLM.
+"""
+import re
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.crud.profile import count_pii_columns, get_column_extremes, get_pii_columns, get_pii_tables, get_table_extremes
+
+MAX_STRUCTURED_QUESTION_LEN = 160
+MAX_LISTED = 100
+TOP_N = 10
+
+_OPEN_ENDED = re.compile(
+    r"\b(why|explain|recommend|suggest|advise|should|could|fix|mask|remediat\w*|plan|improve|compare|impact|risk)\b"
+    r"|\bhow (do|does|can|to|would)\b"
+)
+_ASKS_FOR_LIST = re.compile(r"^(which|what|list|show|find|give|get)\b")
+_SUBJECT = re.compile(r"\b(tables?|columns?|fields?)\b")
+_PII = re.compile(r"\b(pii|sensitive|personal|personally identifiable)\b")
+_NULLS = re.compile(r"\b(nulls?|missing|empty|null (rate|ratio|percent\w*))\b")
+_MOST = re.compile(r"\b(most|highest|many|worst|top)\b")
+_LOW_QUALITY = re.compile(r"\b(lowest|worst|poorest|bad|low)\b[\w\s-]*\bquality\b")
+_HOW_MANY_PII = re.compile(r"^how many\b.*\b(pii|sensitive|personal)\b")
+
+
+def _subject(q: str) -> Optional[str]:
+    m = _SUBJECT.search(q)
+    if not m:
+        return None
+    return "table" if m.group(1).startswith("table") else "column"
+
+
+def _fmt_value(v) -> str:
+    return f"{float(v):.2f}" if v is not None else "na"
+
+
+def _listing(title: str, items: List[str], total: Optional[int] = None) -> str:
+    if not items:
+        return f"{title}: none found in the profiling results."
+    total = total if total is not None else len(items)
+    body = "\n".join(f"- {i}" for i in items[:MAX_LISTED])
+    more = f"\n(first {MAX_LISTED} shown, +{total - MAX_LISTED} more)" if total > MAX_LISTED else ""
+    return f"{title} ({total}):\n{body}{more}"
+
+
+# --- Handlers: (db, scan_id, scope_tables) -> answer text ---
+# Listings fetch at most MAX_LISTED rows; the totals come from an aggregate, so
+# they stay exact however many PII columns the scan has
+def _pii_columns(db, scan_id, scope_tables) -> str:
+    total = count_pii_columns(db, scan_id, scope_tables).columns
+    rows = get_pii_columns(db, scan_id, scope_tables, limit=MAX_LISTED)
+    return _listing(f"PII columns in scan {scan_id}", [f"{r.table_name}.{r.column_name}" for r in rows], total)
+
+
+def _pii_count(db, scan_id, scope_tables) -> str:
+    counts = count_pii_columns(db, scan_id, scope_tables)
+    return f"Scan {scan_id} has {counts.columns} PII column(s) across {counts.tables} table(s)."
+
+
+def _pii_tables(db, scan_id, scope_tables) -> str:
+    total = count_pii_columns(db, scan_id, scope_tables).tables
+    rows = get_pii_tables(db, scan_id, scope_tables, limit=MAX_LISTED)
+    return _listing(f"Tables with PII in scan {scan_id}", [f"{r.table_name} ({r.columns} PII column(s))" for r in rows], total)
+
+
+def _null_columns(db, scan_id, scope_tables) -> str:
+    rows = get_column_extremes(db, scan_id, "null_percent", True, scope_tables, TOP_N)
+    return _listing("Columns with the most nulls", [f"{r.table_name}.{r.column_name} (null%={_fmt_value(r.value)})" for r in rows])
+
+
+def _null_tables(db, scan_id, scope_tables) -> str:
+    rows = get_table_extremes(db, scan_id, "null_percent", True, scope_tables, TOP_N)
+    return _listing("Tables with the most nulls", [f"{r.table_name} (avg null%={_fmt_value(r.value)}, columns={r.columns})" for r in rows])
+
+
+def _quality_columns(db, scan_id, scope_tables) -> str:
+    rows = get_column_extremes(db, scan_id, "quality_score", False, scope_tables, TOP_N)
+    return _listing("Lowest-quality columns", [f"{r.table_name}.{r.column_name} (qscore={_fmt_value(r.value)})" for r in rows])
+
+
+def _quality_tables(db, scan_id, scope_tables) -> str:
+    rows = get_table_extremes(db, scan_id, "quality_score", False, scope_tables, TOP_N)
+    return _listing("Lowest-quality tables", [f"{r.table_name} (avg qscore={_fmt_value(r.value)}, columns={r.columns})" for r in rows])
+
+
+def classify_intent(question: str) -> Optional[str]:
+    """Name of the structured intent `question` matches, or None for open-ended questions."""
+    q = re.sub(r"\s+", " ", question).strip().lower().rstrip("?.! ")
+    if len(q) > MAX_STRUCTURED_QUESTION_LEN or _OPEN_ENDED.search(q):
+        return None
+    if _HOW_MANY_PII.search(q):
+        return "pii_count"
+    if not _ASKS_FOR_LIST.search(q):
+        return None
+    subject = _subject(q)
+    if subject is None:
+        return None
+    if _PII.search(q):
+        return f"pii_{subject}s"
+    if _NULLS.search(q) and _MOST.search(q):
+        return f"null_{subject}s"
+    if _LOW_QUALITY.search(q):
+        return f"quality_{subject}s"
+    return None
+
+
+INTENT_HANDLERS: dict = {
+    "pii_columns": _pii_columns,
+    "pii_tables": _pii_tables,
+    "pii_count": _pii_count,
+    "null_columns": _null_columns,
+    "null_tables": _null_tables,
+    "quality_columns": _quality_columns,
+    "quality_tables": _quality_tables,
+}
+
+
+def answer_structured_question(
+    db, scan_id: Optional[str], question: str, scope_tables: Optional[List[str]] = None
+) -> Optional[Tuple[str, str]]:
+    """
+    Returns (intent, answer) when the question can be answered exactly from the
+    profiling tables, else None. Raises SQLAlchemyError on DB failures.
+    """
+    if not scan_id:
+        return None
+    intent = classify_intent(question)
+    if intent is None:
+        return None
+    handler: Callable[[Any, str, Optional[List[str]]], str] = INTENT_HANDLERS[intent]
+    return intent, handler(db, scan_id, scope_tables)
@@ -0,0 +1,244 @@
+# app/service/conversation_service.py
+"""
+Server-side conversation sessions for the AI assistant.
+
+A session pins the scan context selected for its first question and keeps the
+turn history. The last few turns are sent verbatim; older ones are folded into
+a rolling summary once the history outgrows its token budget, so follow-ups
+cost roughly context + summary + a few turns regardless of conversation length.
+
+Sessions live in an in-process LRU with TTL; set LLM_SESSION_REDIS=true to
+keep them in Redis so every API worker can serve any session. Redis is then
+the source of truth: reads go there first (the local copy is only a fallback
+while Redis is unreachable), and turns take a Redis lock around their
+read-modify-write so workers serving the same session don't drop each
+other's turns.
+"""
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.utils.context_index import estimate_text_tokens
+from app.utils.llm import ask_llm
+
+log = logging.getLogger(__name__)
+
+LLM_SESSION_REDIS = os.getenv("LLM_SESSION_REDIS", "false").strip().lower() in ("1", "true", "yes")
+SESSION_TTL_S = int(os.getenv("LLM_SESSION_TTL", "3600"))
+SESSION_MAXSIZE = 1000             # in-process sessions
+SESSION_KEEP_TURNS = 4             # most recent turns always sent verbatim
+SESSION_HISTORY_BUDGET = 1_200     # tokens of verbatim history before older turns are summarized
+SUMMARY_MAX_TOKENS = 300
+SUMMARY_TIMEOUT_S = 20.0
+REDIS_PREFIX = "llm:session:"
+REDIS_LOCK_PREFIX = "llm:session-lock:"
+SESSION_LOCK_TTL_S = 120           # a crashed holder's lock expires after this
+SESSION_LOCK_WAIT_S = float(os.getenv("LLM_SESSION_LOCK_WAIT", "60"))  # a turn may hold it for an LLM call
+
+_SUMMARY_PROMPT = (
+    "Update the running summary of a data-governance conversation about a scan.\n"
+    "Keep table/column names, findings, decisions and open questions; drop pleasantries.\n"
+    "Reply with the updated summary only, at most 150 words.\n\n"
+    "Current summary:\n{summary}\n\nNew turns:\n{turns}\n"
+)
+
+
+def _turn_tokens(turn: Dict[str, str]) -> int:
+    return estimate_text_tokens(turn["q"]) + estimate_text_tokens(turn["a"])
+
+
+def _format_turns(turns: List[Dict[str, str]]) -> str:
+    return "\n".join(f"Q: {t['q']}\nA: {t['a']}" for t in turns)
+
+
+def new_session(owner: str, scan_id: Optional[str], scope_tables: Optional[List[str]], row_limit: int) -> Dict[str, Any]:
+    now = time.time()
+    return {
+        "id": secrets.token_urlsafe(18),
+        "owner": owner,
+        "scan_id": scan_id,
+        "scope_tables": scope_tables,
+        "row_limit": row_limit,
+        "context_text": None,          # selected on the first LLM turn, then reused
+        "context_summary": None,
+        "summary": "",
+        "summarized_turns": 0,
+        "turns": [],
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def build_session_messages(session: Dict[str, Any], question: str) -> List[Dict[str, str]]:
+    """
+    Pinned scan context first (identical every turn, so it also benefits from
+    provider-side prompt caching), then the rolling summary, recent turns and
+    the new question.
+    """
+    messages = [{
+        "role": "user",
+        "content": (
+            "You are assisting with data governance over scanned metadata and profiling results.\n"
+            "Answer precisely and propose concrete actions (masking rules, constraints, alerts, owners, remediation steps).\n"
+            "If information is insufficient, say what additional data is needed.\n\n"
+            f"{session['context_text']}\n"
+            + (f"\nEarlier in this conversation (summary):\n{session['summary']}\n" if session["summary"] else "")
+        ),
+    }]
+    for turn in session["turns"]:
+        messages.append({"role": "user", "content": turn["q"]})
+        messages.append({"role": "assistant", "content": turn["a"]})
+    messages.append({"role": "user", "content": f"Question: {question}"})
+    return messages
+
+
+def _needs_compaction(session: Dict[str, Any]) -> bool:
+    turns = session["turns"]
+    return len(turns) > SESSION_KEEP_TURNS and sum(_turn_tokens(t) for t in turns) > SESSION_HISTORY_BUDGET
+
+
+def _fallback_summary(summary: str, turns: List[Dict[str, str]]) -> str:
+    # Extractive fallback when the LLM is unavailable: clipped Q/A, newest kept
+    lines = [summary] if summary else []
+    lines += [f"Q: {t['q'][:200]} -> A: {t['a'][:300]}" for t in turns]
+    text = "\n".join(lines)
+    return text[-SUMMARY_MAX_TOKENS * 4:]
+
+
+class SessionBusy(Exception):
+    """Another worker kept the session locked for longer than SESSION_LOCK_WAIT_S."""
+
+
+class ConversationStore:
+    def __init__(self, maxsize: int = SESSION_MAXSIZE, ttl: int = SESSION_TTL_S, use_redis: bool = LLM_SESSION_REDIS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def lock(self, session_id: str) -> AsyncIterator[None]:
+        """
+        Serializes turns (and compaction) within one session: per process, and
+        across workers through a Redis lock when sessions live in Redis. Raises
+        SessionBusy if the Redis lock isn't released in time; if Redis is down,
+        only the process-local lock is held.
+        """
+        lk = self._locks.get(session_id)
+        if lk is None:
+            lk = self._locks[session_id] = asyncio.Lock()
+        async with lk:
+            if not self.use_redis:
+                yield
+                return
+            shared = None
+            try:
+                from app.redis_client import get_async_redis
+                shared = get_async_redis().lock(
+                    REDIS_LOCK_PREFIX + session_id, timeout=SESSION_LOCK_TTL_S, blocking_timeout=SESSION_LOCK_WAIT_S
+                )
+                acquired = await shared.acquire()
+            except Exception as e:
+                log.warning("Session redis lock failed, locking this process only: %s", e)
+                shared, acquired = None, True
+            if not acquired:
+                raise SessionBusy(session_id)
+            try:
+                yield
+            finally:
+                if shared is not None:
+                    try:
+                        await shared.release()
+                    except Exception as e:
+                        log.warning("Session redis unlock failed: %s", e)
+
+    def _expired(self, session: Dict[str, Any]) -> bool:
+        return time.time() - session["updated_at"] > self.ttl
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if self.use_redis:
+            # Another worker may have added turns (or ended the session) since our copy
+            try:
+                from app.redis_client import get_async_redis
+                raw = await get_async_redis().get(REDIS_PREFIX + session_id)
+            except Exception as e:
+                log.warning("Session redis get failed, using the local copy: %s", e)
+                session = self._sessions.get(session_id)
+            else:
+                session = json.loads(raw) if raw else None
+                if session is None:
+                    self._sessions.pop(session_id, None)
+        else:
+            session = self._sessions.get(session_id)
+        if session is None or self._expired(session):
+            return None
+        return session
+
+    async def put(self, session: Dict[str, Any]) -> None:
+        session["updated_at"] = time.time()
+        self._sessions[session["id"]] = session
+        self._sessions.move_to_end(session["id"])
+        while len(self._sessions) > self.maxsize:
+            old_id, _ = self._sessions.popitem(last=False)
+            self._locks.pop(old_id, None)
+        if self.use_redis:
+            try:
+                from app.redis_client import get_async_redis
+                await get_async_redis().set(REDIS_PREFIX + session["id"], json.dumps(session), ex=self.ttl)
+            except Exception as e:
+                log.warning("Session redis set failed: %s", e)
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._locks.pop(session_id, None)
+        if self.use_redis:
+            try:
+                from app.redis_client import get_async_redis
+                await get_async_redis().delete(REDIS_PREFIX + session_id)
+            except Exception as e:
+                log.warning("Session redis delete failed: %s", e)
+
+
+conversation_store = ConversationStore()
+
+
+async def compact_session(session_id: str, user_key: Optional[str] = None) -> None:
+    """
+    Folds turns older than the last SESSION_KEEP_TURNS into the rolling summary
+    when the verbatim history exceeds SESSION_HISTORY_BUDGET. Runs after the
+    response has been sent, so it never adds latency to a turn.
+    """
+    try:
+        async with conversation_store.lock(session_id):
+            await _compact_locked(session_id, user_key)
+    except SessionBusy:
+        log.info("Session %s busy; compaction left to its next turn", session_id)
+
+
+async def _compact_locked(session_id: str, user_key: Optional[str]) -> None:
+    session = await conversation_store.get(session_id)
+    if session is None or not _needs_compaction(session):
+        return
+    old, recent = session["turns"][:-SESSION_KEEP_TURNS], session["turns"][-SESSION_KEEP_TURNS:]
+    prompt = _SUMMARY_PROMPT.format(summary=session["summary"] or "(none)", turns=_format_turns(old))
+    result = await ask_llm(
+        [{"role": "user", "content": prompt}],
+        max_tokens=SUMMARY_MAX_TOKENS,
+        timeout=SUMMARY_TIMEOUT_S,
+        user_key=user_key,
+    )
+    if result.get("ok") and (result.get("answer") or "").strip():
+        session["summary"] = result["answer"].strip()
+    else:
+        log.warning("Session summary failed (%s); using extractive fallback", result.get("message"))
+        session["summary"] = _fallback_summary(session["summary"], old)
+    session["summarized_turns"] += len(old)
+    session["turns"] = recent
+    await conversation_store.put(session)
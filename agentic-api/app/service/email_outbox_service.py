@@ -0,0 +1,164 @@
+# app/service/email_outbox_service.py
+"""
+Transactional email outbox.
+
+Request handlers call enqueue_email() before committing, so the message is
+stored atomically with the change that caused it (new user, reset token)
+and the request never waits on the email provider. A Celery task drains the
+outbox in batches over a single provider connection; failures are retried
+with exponential backoff, and rows are claimed atomically so two workers
+never send the same message.
+"""
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.models.email_outbox import EmailOutbox
+from app.utils.email import get_email_backend
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_S = 30            # 30s, 1m, 2m, 4m, 8m (+ jitter)
+BACKOFF_MAX_S = 3600
+CLAIM_TIMEOUT = timedelta(minutes=10)   # reclaim rows from a worker that died mid-send
+
+
+def enqueue_email(db: Session, to_email: str, subject: str, body: str, dedupe_key: Optional[str] = None) -> EmailOutbox:
+    """
+    Adds a message to the outbox in the caller's transaction (no commit).
+
+    dedupe_key names what the message is about (e.g. "reset:<user id>").
+    While a message with the same key is still waiting to be sent, it is
+    replaced rather than queued again, so repeated requests send one email,
+    carrying the latest link. Once it has gone out, the key is free again.
+    """
+    if dedupe_key:
+        # The session doesn't autoflush, so also look at rows added in this transaction
+        existing = next(
+            (obj for obj in db.new if isinstance(obj, EmailOutbox) and obj.dedupe_key == dedupe_key),
+            None,
+        ) or db.query(EmailOutbox).filter(EmailOutbox.dedupe_key == dedupe_key).first()
+        if existing is not None and existing.status == "pending":
+            existing.to_email, existing.subject, existing.body = to_email, subject, body
+            return existing
+        if existing is not None:
+            # Sent, failed or being sent: keep it as history and queue a new one
+            existing.dedupe_key = None
+            db.flush()
+    msg = EmailOutbox(to_email=to_email, subject=subject, body=body, dedupe_key=dedupe_key)
+    db.add(msg)
+    return msg
+
+
+_notify_in_flight = threading.Lock()
+
+
+def notify_outbox() -> None:
+    """
+    Asks a worker to drain the outbox now. The publish happens on a background
+    thread, so a slow or unreachable broker never holds up the caller (or the
+    event loop), and at most one is in flight. The periodic beat task sends
+    anything a skipped or failed notify missed.
+    """
+    if not _notify_in_flight.acquire(blocking=False):
+        return
+    threading.Thread(target=_publish_notify, name="email-outbox-notify", daemon=True).start()
+
+
+def _publish_notify() -> None:
+    try:
+        from app.workers.tasks import send_email_outbox_task
+        send_email_outbox_task.apply_async(retry=False)
+    except Exception as e:
+        log.warning("Could not schedule email outbox delivery: %s", e)
+    finally:
+        _notify_in_flight.release()
+
+
+def _backoff(attempts: int) -> timedelta:
+    delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _claim_batch(db: Session, batch_size: int):
+    now = datetime.utcnow()
+    candidates = (
+        db.query(EmailOutbox.id)
+        .filter(or_(
+            (EmailOutbox.status == "pending") & (EmailOutbox.next_attempt_at <= now),
+            (EmailOutbox.status == "sending") & (EmailOutbox.claimed_at < now - CLAIM_TIMEOUT),
+        ))
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .all()
+    )
+    claimed = []
+    for (msg_id,) in candidates:
+        # Conditional update: only one worker wins each row
+        result = db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == msg_id)
+            .where(or_(
+                EmailOutbox.status == "pending",
+                (EmailOutbox.status == "sending") & (EmailOutbox.claimed_at < now - CLAIM_TIMEOUT),
+            ))
+            .values(status="sending", claimed_at=now)
+        )
+        if result.rowcount == 1:
+            claimed.append(msg_id)
+    db.commit()
+    if not claimed:
+        return []
+    return db.query(EmailOutbox).filter(EmailOutbox.id.in_(claimed)).all()
+
+
+def deliver_pending_emails(db: Session, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Sends one batch from the outbox. Returns counts of sent / retried / failed messages."""
+    batch = _claim_batch(db, batch_size)
+    counts = {"claimed": len(batch), "sent": 0, "retried": 0, "failed": 0}
+    if not batch:
+        return counts
+
+    try:
+        backend = get_email_backend().__enter__()
+    except Exception as e:
+        # Provider unreachable: put the whole batch back with backoff
+        log.warning("Email backend unavailable: %s", e)
+        backend = None
+
+    try:
+        for msg in batch:
+            try:
+                if backend is None:
+                    raise RuntimeError("email backend unavailable")
+                backend.send(msg.to_email, msg.subject, msg.body)
+            except Exception as e:
+                msg.attempts += 1
+                msg.last_error = str(e)[:1000]
+                if msg.attempts >= MAX_ATTEMPTS:
+                    msg.status = "failed"
+                    counts["failed"] += 1
+                    log.error("Giving up on email %s to %s after %s attempts: %s", msg.id, msg.to_email, msg.attempts, e)
+                else:
+                    msg.status = "pending"
+                    msg.next_attempt_at = datetime.utcnow() + _backoff(msg.attempts)
+                    counts["retried"] += 1
+            else:
+                msg.attempts += 1
+                msg.status = "sent"
+                msg.sent_at = datetime.utcnow()
+                msg.last_error = None
+                counts["sent"] += 1
+            # Commit per message so a crash mid-batch can't resend what already went out
+            db.commit()
+    finally:
+        if backend is not None:
+            backend.__exit__(None, None, None)
+    return counts
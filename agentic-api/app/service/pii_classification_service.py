@@ -0,0 +1,241 @@
+# app/service/pii_classification_service.py
+"""
+PII classification stage of the scan pipeline.
+
+Columns are classified from their names and from a sample of their values.
+Sample values are packed once into a single shared-memory block; pool workers
+attach to it by name and read their slices in place, so only small
+(offset, length) descriptors cross the process boundary.
+
+The pool needs a non-daemonic parent: Celery's default prefork children may
+not start processes, so the worker runs with --pool=threads (see
+docker-compose.yml). Under prefork classification falls back to one process.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.ds_normalize import normalize_type
+from app.utils.pii_detector import detect_pii_tags, detect_pii_value_tags
+
+log = logging.getLogger(__name__)
+
+VALUE_SEP = "\x1e"            # record separator between sampled values in the buffer
+MIN_COLUMNS_FOR_POOL = 64     # below this, pool startup costs more than it saves
+CHUNKS_PER_WORKER = 4         # smaller chunks balance uneven columns across workers
+MAX_VALUE_LEN = 256           # long values are never PII patterns; keep the buffer small
+
+ColumnKey = Tuple[str, str]   # (table, column)
+
+
+# --- Sampling ---
+def _column_targets(metadata: Dict[str, Any]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """(table, column, dict-to-annotate) for every column-like entry in scan metadata."""
+    targets = []
+    for obj in metadata.get("objects") or []:
+        if obj.get("object_type") in ("table_column", "view_column"):
+            targets.append((obj.get("table") or "", obj.get("name") or "", obj))
+        for field in obj.get("fields") or []:
+            targets.append((obj.get("name") or "", field.get("name") or "", field))
+    return targets
+
+
+def sample_sql_columns(connection_string: str, metadata: Dict[str, Any], sample_size: int) -> Dict[ColumnKey, List[str]]:
+    from sqlalchemy import create_engine, select, table, column
+
+    by_table: Dict[str, List[str]] = {}
+    for obj in metadata.get("objects") or []:
+        if obj.get("object_type") == "table_column":
+            by_table.setdefault(obj["table"], []).append(obj["name"])
+
+    samples: Dict[ColumnKey, List[str]] = {}
+    engine = create_engine(connection_string)
+    try:
+        with engine.connect() as conn:
+            for table_name, cols in by_table.items():
+                stmt = (
+                    select(*[column(c) for c in cols])
+                    .select_from(table(table_name, schema=metadata.get("schema")))
+                    .limit(sample_size)
+                )
+                try:
+                    rows = conn.execute(stmt).fetchall()
+                except Exception as e:
+                    print(f"[PII] Error sampling table '{table_name}': {e}")
+                    continue
+                for i, col in enumerate(cols):
+                    samples[(table_name, col)] = [str(r[i]) for r in rows if r[i] is not None]
+    finally:
+        # One engine per scan: release its pool rather than leaving it to the GC
+        engine.dispose()
+    return samples
+
+
+def sample_mongo_fields(connection_string: str, metadata: Dict[str, Any], db_name: str, sample_size: int) -> Dict[ColumnKey, List[str]]:
+    from pymongo import MongoClient
+
+    client = MongoClient(connection_string)
+    samples: Dict[ColumnKey, List[str]] = {}
+    try:
+        db = client[db_name]
+        for obj in metadata.get("objects") or []:
+            if obj.get("object_type") != "collection":
+                continue
+            name = obj["name"]
+            for doc in db[name].find().limit(sample_size):
+                for key, value in doc.items():
+                    if value is not None and not isinstance(value, (dict, list)):
+                        samples.setdefault((name, key), []).append(str(value))
+    finally:
+        client.close()
+    return samples
+
+
+# --- Shared buffer ---
+def _pack_samples(keys: List[ColumnKey], samples: Dict[ColumnKey, List[str]]) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Encode every column's sample into one contiguous buffer; return it with per-column (offset, length)."""
+    parts: List[bytes] = []
+    spans: List[Tuple[int, int]] = []
+    offset = 0
+    for key in keys:
+        values = (v[:MAX_VALUE_LEN].replace(VALUE_SEP, " ") for v in samples.get(key, []))
+        encoded = VALUE_SEP.join(values).encode("utf-8")
+        parts.append(encoded)
+        spans.append((offset, len(encoded)))
+        offset += len(encoded)
+    return b"".join(parts), spans
+
+
+def _classify_one(column_name: str, raw) -> List[str]:
+    values = str(raw, "utf-8").split(VALUE_SEP) if len(raw) else []
+    tags = detect_pii_tags(column_name) + detect_pii_value_tags(values)
+    # Stable de-duplication: name-based tags first, then value-based ones
+    return list(dict.fromkeys(tags))
+
+
+def _classify_chunk(shm_name: str, specs: List[Tuple[int, str, int, int]]) -> List[Tuple[int, List[str], float]]:
+    """Pool worker: attach to the shared sample buffer and classify a chunk of columns."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    out = []
+    try:
+        buf = shm.buf
+        for idx, column_name, offset, length in specs:
+            started = time.perf_counter()
+            view = buf[offset:offset + length]
+            try:
+                tags = _classify_one(column_name, view)
+            finally:
+                view.release()
+            out.append((idx, tags, (time.perf_counter() - started) * 1000))
+        del buf
+    finally:
+        shm.close()
+    return out
+
+
+def _resolve_workers(workers: Optional[int]) -> int:
+    if not workers or workers < 0:
+        workers = os.cpu_count() or 1
+    # Celery prefork children are daemonic and may not start their own pools;
+    # the worker runs with --pool=threads so classification gets one.
+    if multiprocessing.current_process().daemon:
+        return 1
+    return workers
+
+
+# --- Stage entrypoint ---
+def classify_columns(
+    keys: List[ColumnKey],
+    samples: Dict[ColumnKey, List[str]],
+    workers: Optional[int] = None,
+) -> Tuple[List[List[str]], List[float], int]:
+    """
+    Classify columns in parallel.
+    Returns (tags per column, elapsed ms per column, workers used), aligned with `keys`.
+    """
+    tags: List[List[str]] = [[] for _ in keys]
+    timings: List[float] = [0.0 for _ in keys]
+    if not keys:
+        return tags, timings, 0
+
+    data, spans = _pack_samples(keys, samples)
+    specs = [(i, keys[i][1], off, length) for i, (off, length) in enumerate(spans)]
+
+    workers = _resolve_workers(workers)
+    if workers <= 1 or len(keys) < MIN_COLUMNS_FOR_POOL:
+        view = memoryview(data)
+        for idx, column_name, off, length in specs:
+            started = time.perf_counter()
+            tags[idx] = _classify_one(column_name, view[off:off + length])
+            timings[idx] = (time.perf_counter() - started) * 1000
+        return tags, timings, 1
+
+    shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    try:
+        shm.buf[:len(data)] = data
+        chunk_size = max(1, len(specs) // (workers * CHUNKS_PER_WORKER))
+        chunks = [specs[i:i + chunk_size] for i in range(0, len(specs), chunk_size)]
+        # forkserver: don't fork the (multi-threaded) Celery worker process
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+            for result in pool.map(_classify_chunk, [shm.name] * len(chunks), chunks):
+                for idx, column_tags, elapsed_ms in result:
+                    tags[idx] = column_tags
+                    timings[idx] = elapsed_ms
+    finally:
+        shm.close()
+        shm.unlink()
+    return tags, timings, workers
+
+
+def classify_scan_metadata(
+    metadata: Dict[str, Any],
+    ds_type: str,
+    connection_string: str,
+    db_names=None,
+    sample_size: int = 100,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Annotates every column in `metadata` with `pii` / `pii_tags` and attaches a
+    `classification` report (workers, wall time, per-column timings).
+    Sampling failures degrade to name-only classification.
+    """
+    started = time.perf_counter()
+    targets = _column_targets(metadata)
+    keys = [(t, c) for t, c, _ in targets]
+
+    samples: Dict[ColumnKey, List[str]] = {}
+    norm_type = normalize_type(ds_type)
+    try:
+        if sample_size > 0 and norm_type in ("postgresql", "mysql", "sqlite", "sqlserver"):
+            samples = sample_sql_columns(connection_string, metadata, sample_size)
+        elif sample_size > 0 and norm_type == "mongodb" and db_names:
+            db_name = db_names[0] if isinstance(db_names, list) else db_names
+            samples = sample_mongo_fields(connection_string, metadata, db_name, sample_size)
+    except Exception as e:
+        print(f"[PII] Sampling failed, classifying by name only: {e}")
+
+    tags, timings, used_workers = classify_columns(keys, samples, workers=workers)
+    for (_, _, target), column_tags in zip(targets, tags):
+        target["pii"] = "pii" in column_tags
+        target["pii_tags"] = [t for t in column_tags if t != "pii"]
+
+    report = {
+        "workers": used_workers,
+        "columns": len(keys),
+        "sampled_columns": len(samples),
+        "wall_ms": round((time.perf_counter() - started) * 1000, 2),
+        "column_timings": [
+            {"table": t, "column": c, "ms": round(ms, 3)} for (t, c), ms in zip(keys, timings)
+        ],
+    }
+    metadata["classification"] = report
+    log.info(
+        "PII classification: columns=%d sampled=%d workers=%d wall_ms=%.1f",
+        report["columns"], report["sampled_columns"], used_workers, report["wall_ms"],
+    )
+    return metadata
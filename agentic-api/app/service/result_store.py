@@ -0,0 +1,108 @@
+# app/service/result_store.py
+"""
+Content-addressed, compressed storage for scan result payloads.
+
+Each distinct result JSON is stored once in scan_result_blobs, zstd-compressed
+and keyed by its sha256 (ScanJobResult.content_hash). Re-scanning an
+unchanged source therefore adds a scan_job_results row but no new payload.
+Results written before this have their JSON inline in metadata_json;
+compact_inline_results moves them over in batches.
+
+The stored frames are written once and read many times, so they use a high
+zstd level; decompression speed doesn't depend on it. Clients that accept
+zstd get the stored frame as-is (zstd_envelope).
+"""
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.responses import RawJSON, dumps
+from app.models.scan_job import ScanJobResult, ScanResultBlob
+
+try:
+    import zstandard
+except ImportError:  # payloads are then stored uncompressed, still deduplicated
+    zstandard = None
+
+log = logging.getLogger(__name__)
+
+ZSTD_LEVEL = 12
+ENVELOPE_ZSTD_LEVEL = 3
+COMPACT_BATCH_SIZE = 100
+
+
+def _encode(raw: bytes) -> Tuple[str, bytes]:
+    if zstandard is None:
+        return "identity", raw
+    return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+
+
+def blob_text(blob: ScanResultBlob) -> str:
+    if blob.encoding == "identity":
+        return blob.data.decode()
+    if blob.encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("the zstandard package is needed to read stored scan results")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(blob.data).decode()
+    raise ValueError(f"unknown scan result blob encoding {blob.encoding!r}")
+
+
+def store_result_payload(db: Session, metadata_json: str) -> str:
+    """Stores the payload unless an identical one is already stored. Returns its hash; the caller commits."""
+    raw = metadata_json.encode()
+    digest = hashlib.sha256(raw).hexdigest()
+    if db.get(ScanResultBlob, digest) is None:
+        encoding, data = _encode(raw)
+        try:
+            with db.begin_nested():
+                db.add(ScanResultBlob(hash=digest, encoding=encoding, data=data, size=len(raw)))
+        except IntegrityError:
+            pass  # another worker stored the same payload meanwhile
+    return digest
+
+
+def load_result_json(db: Session, result: ScanJobResult) -> str:
+    if result.metadata_json is not None:
+        return result.metadata_json
+    blob = db.get(ScanResultBlob, result.content_hash)
+    if blob is None:
+        raise LookupError(f"scan result {result.id} references missing payload {result.content_hash}")
+    return blob_text(blob)
+
+
+def zstd_envelope(envelope: Dict[str, Any], field: str, blob: ScanResultBlob) -> Optional[bytes]:
+    """
+    `envelope` as zstd-compressed JSON with `field` set to the stored
+    document, reusing its stored frame: a zstd stream may hold several
+    frames, so only the small envelope around it is compressed here.
+    None when the blob isn't stored as zstd.
+    """
+    if blob.encoding != "zstd" or zstandard is None:
+        return None
+    # A raw NUL can't occur in encoded JSON, so it marks where the document goes
+    prefix, suffix = dumps({**envelope, field: RawJSON("\x00")}).split(b"\x00")
+    compressor = zstandard.ZstdCompressor(level=ENVELOPE_ZSTD_LEVEL)
+    return compressor.compress(prefix) + blob.data + compressor.compress(suffix)
+
+
+def compact_inline_results(db: Session, batch_size: int = COMPACT_BATCH_SIZE) -> int:
+    """Moves inline metadata_json payloads into blobs, one commit per batch. Returns results moved."""
+    moved = 0
+    while True:
+        results = db.execute(
+            select(ScanJobResult).where(ScanJobResult.metadata_json.is_not(None)).order_by(ScanJobResult.id).limit(batch_size)
+        ).scalars().all()
+        if not results:
+            break
+        for result in results:
+            result.content_hash = store_result_payload(db, result.metadata_json)
+            result.metadata_json = None
+        db.commit()
+        moved += len(results)
+    if moved:
+        log.info("Moved %d inline scan results into blob storage", moved)
+    return moved
@@ -0,0 +1,153 @@
+# app/service/scan_digest_service.py
+"""
+Digest stage: compact, prompt-ready summaries of a scan's profile results.
+
+One scan-level digest (totals, PII columns, type mix, worst-quality columns,
+null hotspots) plus one digest per table. Each is stored with its estimated
+token count so the AI endpoint can assemble prompts top-down within a budget.
+
+Digests are written only by the digest stage (Celery, after a scan completes
+or a profile run finishes). The request path just reads them.
+"""
+import logging
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+
+from app.crud.profile import get_profile_columns, get_profile_version
+from app.models.scan_digest import ScanDigest
+from app.utils.context_index import ScanIndexCache, estimate_text_tokens
+
+log = logging.getLogger(__name__)
+
+MAX_DIGEST_ROWS = 200_000      # columns read per scan when digesting
+TOP_N = 10                     # entries per ranked list in the scan digest
+MAX_PII_LISTED = 50            # PII columns named in the scan digest
+NULL_HOTSPOT_PERCENT = 20
+
+digest_cache = ScanIndexCache()
+
+
+class ScanDigests:
+    """Plain (text, token_count) pairs, safe to cache beyond the DB session."""
+
+    def __init__(self, scan: Optional[Tuple[str, int]], tables: Dict[str, Tuple[str, int]]):
+        self.scan = scan
+        self.tables = tables
+
+
+def _fmt_pct(v) -> str:
+    return f"{float(v):.0f}%"
+
+
+def _ranked(items: List[Tuple[float, str]], reverse: bool, limit: int = TOP_N) -> List[Tuple[float, str]]:
+    return sorted(items, key=lambda x: x[0], reverse=reverse)[:limit]
+
+
+def _table_digest(table: str, rows: Sequence[Any]) -> str:
+    types = Counter((getattr(r, "data_type", "") or "na").strip() or "na" for r in rows)
+    pii = [r.column_name for r in rows if getattr(r, "is_pii", None)]
+    quality = [(r.quality_score, r.column_name) for r in rows if getattr(r, "quality_score", None) is not None]
+    nulls = [(r.null_percent, r.column_name) for r in rows
+             if getattr(r, "null_percent", None) is not None and r.null_percent >= NULL_HOTSPOT_PERCENT]
+
+    parts = [f"{table}: cols={len(rows)}"]
+    parts.append("types=" + ",".join(f"{t}:{n}" for t, n in types.most_common(5)))
+    if pii:
+        parts.append("pii=[" + ",".join(pii) + "]")
+    if quality:
+        parts.append("worst_q=" + ",".join(f"{c}({q:.2f})" for q, c in _ranked(quality, reverse=False, limit=3)))
+    if nulls:
+        parts.append("nulls=" + ",".join(f"{c}({_fmt_pct(p)})" for p, c in _ranked(nulls, reverse=True, limit=3)))
+    return " | ".join(parts)
+
+
+def _scan_digest(rows: Sequence[Any], by_table: Dict[str, List[Any]]) -> str:
+    types = Counter((getattr(r, "data_type", "") or "na").strip() or "na" for r in rows)
+    pii = [f"{r.table_name}.{r.column_name}" for r in rows if getattr(r, "is_pii", None)]
+    quality = [(r.quality_score, f"{r.table_name}.{r.column_name}") for r in rows
+               if getattr(r, "quality_score", None) is not None]
+    nulls = [(r.null_percent, f"{r.table_name}.{r.column_name}") for r in rows
+             if getattr(r, "null_percent", None) is not None and r.null_percent >= NULL_HOTSPOT_PERCENT]
+    pii_tables = Counter(r.table_name for r in rows if getattr(r, "is_pii", None))
+
+    lines = [f"tables={len(by_table)} columns={len(rows)} pii_columns={len(pii)} null_hotspots={len(nulls)}"]
+    lines.append("Types: " + ", ".join(f"{t}={n * 100 // len(rows)}%" for t, n in types.most_common(8)))
+    if pii:
+        more = f" (+{len(pii) - MAX_PII_LISTED} more)" if len(pii) > MAX_PII_LISTED else ""
+        lines.append("PII: " + ", ".join(pii[:MAX_PII_LISTED]) + more)
+        lines.append("Tables with most PII: " + ", ".join(f"{t}({n})" for t, n in pii_tables.most_common(TOP_N)))
+    if quality:
+        lines.append("Worst quality: " + ", ".join(f"{c}(q={q:.2f})" for q, c in _ranked(quality, reverse=False)))
+    if nulls:
+        lines.append("Null hotspots: " + ", ".join(f"{c}({_fmt_pct(p)})" for p, c in _ranked(nulls, reverse=True)))
+    return "\n".join(lines)
+
+
+def compute_digests(scan_id: str, rows: Sequence[Any]) -> List[ScanDigest]:
+    by_table: Dict[str, List[Any]] = defaultdict(list)
+    for r in rows:
+        by_table[(r.table_name or "").strip()].append(r)
+
+    text = _scan_digest(rows, by_table)
+    digests = [ScanDigest(scan_id=scan_id, table_name=None, digest_text=text, token_count=estimate_text_tokens(text))]
+    for table, table_rows in by_table.items():
+        text = _table_digest(table, table_rows)
+        digests.append(ScanDigest(scan_id=scan_id, table_name=table, digest_text=text, token_count=estimate_text_tokens(text)))
+    return digests
+
+
+def build_scan_digests(db, scan_id) -> int:
+    """
+    (Re)compute and store digests for a scan. Returns the number of digests
+    written; 0 when the scan has no profile results yet.
+    """
+    scan_id = str(scan_id)
+    rows = get_profile_columns(db, scan_id, MAX_DIGEST_ROWS)
+    db.query(ScanDigest).filter(ScanDigest.scan_id == scan_id).delete(synchronize_session=False)
+    digests = compute_digests(scan_id, rows) if rows else []
+    db.add_all(digests)
+    db.commit()
+    log.info("Stored %d digests for scan %s (%d columns)", len(digests), scan_id, len(rows))
+    return len(digests)
+
+
+def digest_version(db, scan_id: str) -> Optional[str]:
+    """Identifies the stored digest build of a scan; None if it was never digested. Changes on every rebuild."""
+    count, built_at = (
+        db.query(func.count(ScanDigest.id), func.max(ScanDigest.created_at)).filter(ScanDigest.scan_id == scan_id).one()
+    )
+    return f"{built_at.isoformat()}/{count}" if count else None
+
+
+def get_scan_digests(db, scan_id: str, version: Optional[str], profile_version: Optional[str] = None) -> ScanDigests:
+    """
+    Digests of a scan at `version` (see digest_version). Read-only: a scan
+    that has none stored yet gets them computed for this process only.
+    Cached per (scan, version), empty results included, so a rebuild is
+    picked up at once and an undigested scan isn't recomputed per request.
+    Undigested scans are computed from the profile, so their key also carries
+    `profile_version` (get_profile_version; looked up when not given).
+    """
+    if version is None:
+        if profile_version is None:
+            profile_version = get_profile_version(db, scan_id)
+        key = f"{scan_id}@profile:{profile_version}"
+    else:
+        key = f"{scan_id}@{version}"
+    cached = digest_cache.get(key)
+    if cached is not None:
+        return cached
+    if version is None:
+        rows = get_profile_columns(db, scan_id, MAX_DIGEST_ROWS)
+        stored = compute_digests(scan_id, rows) if rows else []
+    else:
+        stored = db.query(ScanDigest).filter(ScanDigest.scan_id == scan_id).all()
+
+    scan = next(((d.digest_text, d.token_count) for d in stored if d.table_name is None), None)
+    digests = ScanDigests(
+        scan, {d.table_name: (d.digest_text, d.token_count) for d in stored if d.table_name is not None}
+    )
+    digest_cache.put(key, digests)
+    return digests
@@ -1,6 +1,8 @@
 import json
 import traceback
 from app.models.scan_job import ScanJobResult
+from app.service.result_store import store_result_payload
+from app.utils.llm_cache import response_cache
 
 def store_scan_metadata(db, scan_job_id, metadata_dict):
     try:
@@ -10,10 +12,15 @@ def store_scan_metadata(db, scan_job_id, metadata_dict):
             raise ValueError(f"metadata_dict must be a dict, got {type(metadata_dict)}")
         print(f"[DEBUG] metadata_dict keys: {list(metadata_dict.keys())}")
 
-        # Insert result
+        # Insert result; the payload itself is stored once per distinct content.
+        # The classification report (timings) differs on every run, so it is
+        # stored beside the payload: re-scanning an unchanged source hashes the same.
+        payload = {k: v for k, v in metadata_dict.items() if k != "classification"}
+        classification = metadata_dict.get("classification")
         result = ScanJobResult(
             scan_job_id=scan_job_id,
-            metadata_json=json.dumps(metadata_dict)
+            content_hash=store_result_payload(db, json.dumps(payload)),
+            classification_json=json.dumps(classification) if classification is not None else None,
         )
         db.add(result)
         db.flush()   # Ensures ID is available before commit
@@ -21,6 +28,8 @@ def store_scan_metadata(db, scan_job_id, metadata_dict):
         db.commit()
         db.refresh(result)
         print(f"[INFO] Scan metadata stored in DB for job_id={scan_job_id}, result_id={result.id}")
+        # Cached AI answers for this scan were built from the previous data
+        response_cache.invalidate_scan(scan_job_id)
         return result
 
     except Exception as e:
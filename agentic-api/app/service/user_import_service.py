@@ -0,0 +1,342 @@
+# app/service/user_import_service.py
+"""
+Bulk user import and bulk admin updates.
+
+Imports stream CSV (header row: email,name,role,status,password), NDJSON or a
+JSON array, and are written in batches of IMPORT_BATCH_SIZE: one existence
+query, parallel hashing on the password pool, and one commit per batch.
+Rows without a password get an unusable hash and an invite email (through
+the outbox) with a reset link, so large imports don't pay bcrypt's cost per
+user at all. Every rejected row is reported with its row number.
+
+If a batch hits a unique-constraint race with a concurrent signup, only that
+batch is retried row by row in savepoints.
+"""
+import asyncio
+import codecs
+import csv
+import json
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.password_hasher import password_hasher
+from app.core.user_cache import user_cache
+from app.crud.user_search import user_count_cache
+from app.models.user import User
+from app.schemas.user import UserImportRow
+from app.service.email_outbox_service import enqueue_email, notify_outbox
+from app.utils.token import generate_token
+
+IMPORT_BATCH_SIZE = 500
+UPDATE_BATCH_SIZE = 1_000
+MAX_REPORTED_ERRORS = 1_000
+MAX_JSON_BYTES = 20 * 1024 * 1024   # JSON arrays are parsed whole; CSV/NDJSON stream
+CSV_RECORDS_PER_HOP = 500           # CSV records parsed per worker-thread round trip
+INVITE_TTL = timedelta(days=7)
+UNUSABLE_PASSWORD = "!"             # matches no hash scheme, so password login always fails
+
+# (row number, parsed row or None, parse error or None)
+ImportRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+class ImportTooLarge(Exception):
+    pass
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buf = ""
+    async for chunk in chunks:
+        buf += decoder.decode(chunk)
+        *lines, buf = buf.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buf += decoder.decode(b"", final=True)
+    if buf:
+        yield buf.rstrip("\r")
+
+
+class _BlockingLines:
+    """Sync line iterator over the async request body, for csv.reader running in a
+    worker thread. Refills wait on the event loop for the next body chunk; lines
+    keep their "\n" so csv.reader carries quoted fields across them."""
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop):
+        self._chunks = chunks.__aiter__()
+        self._loop = loop
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._lines: Deque[str] = deque()
+        self._tail = ""
+        self._done = False
+
+    def __iter__(self) -> "_BlockingLines":
+        return self
+
+    def __next__(self) -> str:
+        while not self._lines:
+            if self._done:
+                raise StopIteration
+            self._refill()
+        return self._lines.popleft()
+
+    async def _next_chunk(self) -> bytes:
+        return await self._chunks.__anext__()
+
+    def _refill(self) -> None:
+        try:
+            chunk = asyncio.run_coroutine_threadsafe(self._next_chunk(), self._loop).result()
+        except StopAsyncIteration:
+            self._done = True
+            if text := self._tail + self._decoder.decode(b"", final=True):
+                self._lines.append(text)
+            return
+        *lines, self._tail = (self._tail + self._decoder.decode(chunk)).split("\n")
+        self._lines.extend(f"{line}\n" for line in lines)
+
+
+def _take(reader: Iterator[List[str]], n: int) -> List[List[str]]:
+    return list(islice(reader, n))
+
+
+async def _csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRow]:
+    reader = csv.reader(_BlockingLines(chunks, asyncio.get_running_loop()))
+    header: Optional[List[str]] = None
+    row_no = 0
+    while True:
+        try:
+            records = await asyncio.to_thread(_take, reader, CSV_RECORDS_PER_HOP)
+        except csv.Error as e:
+            raise ValueError(f"invalid CSV after row {row_no}: {e}")
+        if not records:
+            return
+        for fields in records:
+            if not fields or (len(fields) == 1 and not fields[0].strip()):
+                continue
+            if header is None:
+                header = [h.strip().lower() for h in fields]
+                continue
+            row_no += 1
+            if len(fields) > len(header):
+                yield row_no, None, f"expected {len(header)} columns, got {len(fields)}"
+                continue
+            yield row_no, {k: (v.strip() or None) for k, v in zip(header, fields)}, None
+
+
+async def _ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRow]:
+    row_no = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            yield row_no, json.loads(line), None
+        except ValueError as e:
+            yield row_no, None, f"invalid JSON: {e}"
+
+
+async def _json_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRow]:
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > MAX_JSON_BYTES:
+            raise ImportTooLarge(f"JSON imports are limited to {MAX_JSON_BYTES} bytes; use CSV or NDJSON")
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise ValueError(f"invalid JSON: {e}")
+    if isinstance(data, dict):
+        data = data.get("users")
+    if not isinstance(data, list):
+        raise ValueError('expected a JSON array or {"users": [...]}')
+    for i, item in enumerate(data, start=1):
+        yield i, item, None
+
+
+def parse_import(content_type: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRow]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return _csv_rows(chunks)
+    if media_type in ("application/x-ndjson", "application/jsonl", "application/json-lines"):
+        return _ndjson_rows(chunks)
+    if media_type == "application/json":
+        return _json_rows(chunks)
+    raise ValueError(f"unsupported content type {media_type or '(none)'}; use text/csv, application/x-ndjson or application/json")
+
+
+class _ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.invited = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def fail(self, row: int, email: Optional[str], error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "email": email, "error": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"created": self.created, "invited": self.invited, "failed": self.failed, "errors": self.errors}
+
+
+def _validation_message(e: ValidationError) -> str:
+    err = e.errors()[0]
+    field = ".".join(str(p) for p in err.get("loc", ())) or "row"
+    return f"{field}: {err.get('msg')}"
+
+
+def _invite(db: Session, user: User) -> None:
+    link = f"https://yourdomain.com/reset-password?token={user.reset_token}"
+    # Tokens are fresh per import, so skip the dedupe lookup (one query per row)
+    enqueue_email(db, user.email, "You've been invited", f"An account has been created for you. Set your password here: {link}")
+
+
+def _existing_emails(db: Session, emails: List[str]) -> Set[str]:
+    return set(db.execute(select(User.email).where(User.email.in_(emails))).scalars())
+
+
+def _write_batch(db: Session, entries: List[Tuple[int, User, bool]], result: _ImportResult) -> None:
+    for _, user, invited in entries:
+        db.add(user)
+        if invited:
+            _invite(db, user)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+    else:
+        result.created += len(entries)
+        result.invited += sum(1 for _, _, invited in entries if invited)
+        return
+
+    # Someone created one of these users meanwhile: fall back to row by row
+    for row_no, user, invited in entries:
+        try:
+            with db.begin_nested():
+                db.add(user)
+                if invited:
+                    _invite(db, user)
+        except IntegrityError:
+            result.fail(row_no, user.email, "email already registered")
+            continue
+        result.created += 1
+        result.invited += int(invited)
+    db.commit()
+
+
+async def _import_batch(db: Session, batch: List[ImportRow], seen: Set[str], result: _ImportResult, send_invites: bool) -> None:
+    valid: List[Tuple[int, UserImportRow]] = []
+    for row_no, data, error in batch:
+        if error:
+            result.fail(row_no, None, error)
+            continue
+        try:
+            item = UserImportRow.model_validate(data)
+        except ValidationError as e:
+            result.fail(row_no, data.get("email") if isinstance(data, dict) else None, _validation_message(e))
+            continue
+        if item.email in seen:
+            result.fail(row_no, item.email, "duplicate email in import")
+            continue
+        seen.add(item.email)
+        valid.append((row_no, item))
+    if not valid:
+        return
+
+    existing = await asyncio.to_thread(_existing_emails, db, [item.email for _, item in valid])
+    to_create = []
+    for row_no, item in valid:
+        if item.email in existing:
+            result.fail(row_no, item.email, "email already registered")
+        elif not item.password and not send_invites:
+            result.fail(row_no, item.email, "password required when invites are disabled")
+        else:
+            to_create.append((row_no, item))
+
+    hashes = await password_hasher.hash_many([item.password for _, item in to_create if item.password])
+    hashes = iter(hashes)
+    invite_expires = datetime.utcnow() + INVITE_TTL
+    entries: List[Tuple[int, User, bool]] = []
+    for row_no, item in to_create:
+        user = User(
+            email=item.email,
+            name=item.name,
+            role=item.role or "user",
+            status=item.status or "active",
+            is_verified=True,
+        )
+        if item.password:
+            hashed = next(hashes)
+            if isinstance(hashed, BaseException):
+                result.fail(row_no, item.email, "password hashing failed, retry this row")
+                continue
+            user.hashed_password = hashed
+            entries.append((row_no, user, False))
+        else:
+            user.hashed_password = UNUSABLE_PASSWORD
+            user.reset_token = generate_token()
+            user.reset_token_expires = invite_expires
+            entries.append((row_no, user, True))
+    if entries:
+        await asyncio.to_thread(_write_batch, db, entries, result)
+
+
+async def import_users(
+    db: Session,
+    rows: AsyncIterator[ImportRow],
+    send_invites: bool = True,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Creates users from parsed rows, committing every `batch_size` rows. Returns counts and per-row errors."""
+    result = _ImportResult()
+    seen: Set[str] = set()
+    batch: List[ImportRow] = []
+    try:
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                await _import_batch(db, batch, seen, result, send_invites)
+                batch = []
+        if batch:
+            await _import_batch(db, batch, seen, result, send_invites)
+    finally:
+        # Unconditional: a failed batch may still have committed some rows
+        user_count_cache.clear()
+        if result.invited:
+            notify_outbox()
+    return result.as_dict()
+
+
+def bulk_update_users(
+    db: Session,
+    user_ids: List[int],
+    role: Optional[str] = None,
+    status: Optional[str] = None,
+    batch_size: int = UPDATE_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Applies role/status to many users, one UPDATE and commit per batch of ids."""
+    values = {k: v for k, v in (("role", role), ("status", status)) if v is not None}
+    ids = list(dict.fromkeys(user_ids))
+    if not values:
+        return {"updated": 0, "not_found": []}
+    found: Set[int] = set()
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        rows = db.execute(
+            update(User).where(User.id.in_(chunk)).values(**values).returning(User.id, User.email),
+            execution_options={"synchronize_session": False},
+        ).all()
+        db.commit()
+        for user_id, email in rows:
+            found.add(user_id)
+            user_cache.invalidate(email)
+    if role is not None:
+        user_count_cache.clear()  # role is searchable
+    return {"updated": len(found), "not_found": [i for i in ids if i not in found]}
@@ -0,0 +1,199 @@
+# app/utils/context_index.py
+"""
+Per-scan retrieval index over profiled columns.
+
+Each column becomes a short descriptor document (table, column, type plus
+tags derived from its metrics such as "pii" or "nulls"). Questions are scored
+against the descriptors with BM25 and the best columns are packed into the
+prompt up to a token budget. Indexes are kept in a small in-process LRU keyed
+by scan *and* data version (latest profile run, digest build), so a rescan
+is picked up by every process on its next question.
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.utils.llm_limits import CHARS_PER_TOKEN
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+INDEX_CACHE_SIZE = 32          # scans kept in memory per process
+INDEX_TTL_S = 600              # only bounds memory; keys carry the data version
+
+HIGH_NULL_PERCENT = 20
+HIGH_DISTINCT_PERCENT = 95
+LOW_QUALITY_SCORE = 0.7
+
+_SPLIT = re.compile(r"[^0-9a-zA-Z]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_STOPWORDS = frozenset(
+    "a an and are as at be by column columns do does for from have has how i in is it "
+    "list me of on or scan show table tables that the their there these this to what "
+    "which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    out = []
+    for part in _SPLIT.split(_CAMEL.sub(" ", text or "")):
+        word = part.lower()
+        if not word or word in _STOPWORDS:
+            continue
+        # Cheap plural folding: "emails" matches "email", "nulls" matches "null"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        out.append(word)
+    return out
+
+
+def estimate_text_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def format_profile_row(r) -> str:
+    # Be defensive with None values to avoid 'None' noise in prompts.
+    table = (getattr(r, "table_name", "") or "").strip()
+    col = (getattr(r, "column_name", "") or "").strip()
+    dtype = (getattr(r, "data_type", "") or "").strip()
+    nullp = getattr(r, "null_percent", None)
+    distp = getattr(r, "distinct_percent", None)
+    pii = getattr(r, "is_pii", None)
+    qscore = getattr(r, "quality_score", None)
+    return (
+        f"{table}.{col} | type={dtype} | null%={nullp if nullp is not None else 'na'} | "
+        f"distinct%={distp if distp is not None else 'na'} | pii={pii if pii is not None else 'na'} | "
+        f"qscore={qscore if qscore is not None else 'na'}"
+    )
+
+
+def describe_profile_row(r) -> str:
+    """Searchable descriptor: identifiers plus words for notable metrics."""
+    words = [getattr(r, "table_name", "") or "", getattr(r, "column_name", "") or "", getattr(r, "data_type", "") or ""]
+    if getattr(r, "is_pii", None):
+        words.append("pii sensitive personal")
+    nullp = getattr(r, "null_percent", None)
+    if nullp is not None and nullp >= HIGH_NULL_PERCENT:
+        words.append("null missing empty")
+    distp = getattr(r, "distinct_percent", None)
+    if distp is not None and distp >= HIGH_DISTINCT_PERCENT:
+        words.append("unique distinct identifier")
+    qscore = getattr(r, "quality_score", None)
+    if qscore is not None and qscore < LOW_QUALITY_SCORE:
+        words.append("low quality issue")
+    return " ".join(words)
+
+
+class ScanContextIndex:
+    def __init__(self, rows: Sequence[Any]):
+        self.tables: List[str] = [(getattr(r, "table_name", "") or "").strip() for r in rows]
+        self.lines: List[str] = [format_profile_row(r) for r in rows]
+        self.costs: List[int] = [estimate_text_tokens(line) for line in self.lines]
+        self._tf: List[Counter] = [Counter(tokenize(describe_profile_row(r))) for r in rows]
+        self._lengths = [sum(tf.values()) for tf in self._tf]
+        self._avg_len = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        df: Counter = Counter()
+        for tf in self._tf:
+            df.update(tf.keys())
+        n = len(rows)
+        self._idf = {term: math.log(1 + (n - d + 0.5) / (d + 0.5)) for term, d in df.items()}
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def scores(self, question: str) -> List[float]:
+        terms = [t for t in set(tokenize(question)) if t in self._idf]
+        if not terms:
+            return [0.0] * len(self.lines)
+        out = []
+        for tf, length in zip(self._tf, self._lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self._avg_len or 1))
+            s = 0.0
+            for t in terms:
+                f = tf.get(t)
+                if f:
+                    s += self._idf[t] * f * (BM25_K1 + 1) / (f + norm)
+            out.append(s)
+        return out
+
+    def rank_tables(self, question: str, scope_tables: Optional[Iterable[str]] = None) -> List[str]:
+        """Tables ordered by their best-matching column; empty when nothing matches."""
+        scope = set(scope_tables) if scope_tables else None
+        best: Dict[str, float] = {}
+        for table, score in zip(self.tables, self.scores(question)):
+            if score > 0 and (scope is None or table in scope) and score > best.get(table, 0.0):
+                best[table] = score
+        return sorted(best, key=lambda t: -best[t])
+
+    def select(
+        self,
+        question: str,
+        top_k: int,
+        token_budget: int,
+        scope_tables: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        Best-matching lines for `question`, at most `top_k` and within `token_budget`.
+        Returned in table/column order so prompts stay stable for caching.
+        Falls back to index order when no question term matches any column.
+        """
+        scope = set(scope_tables) if scope_tables else None
+        candidates = [i for i, t in enumerate(self.tables) if scope is None or t in scope]
+        scores = self.scores(question)
+        matched = [i for i in candidates if scores[i] > 0]
+        ranked = bool(matched)
+        if ranked:
+            # Only relevant columns go in; unmatched ones would just spend tokens
+            candidates = sorted(matched, key=lambda i: -scores[i])
+
+        chosen: List[int] = []
+        used = 0
+        for i in candidates:
+            if len(chosen) >= top_k:
+                break
+            if used + self.costs[i] > token_budget:
+                continue
+            chosen.append(i)
+            used += self.costs[i]
+        chosen.sort()
+        stats = {
+            "candidates": len(candidates),
+            "included": len(chosen),
+            "est_tokens": used,
+            "selection": "bm25" if ranked else "order",
+        }
+        return [self.lines[i] for i in chosen], stats
+
+
+class ScanIndexCache:
+    """LRU (with TTL) of per-scan derived objects (indexes, digests), keyed "<scan id>@<data version>"."""
+
+    def __init__(self, maxsize: int = INDEX_CACHE_SIZE, ttl: float = INDEX_TTL_S):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            built_at, index = item
+            if time.monotonic() - built_at > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return index
+
+    def put(self, key: str, index: Any) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic(), index)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+scan_index_cache = ScanIndexCache()
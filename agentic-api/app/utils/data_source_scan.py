@@ -201,7 +201,7 @@ def scan_sql_metadata(connection_string: str, db_names=None, artifact_types=None
         except Exception as e:
             print(f"[SQL Scan] Error scanning procedure '{proc_name}': {e}")
 
-    return {"source_type": "sql", "objects": objects}
+    return {"source_type": "sql", "schema": schema, "objects": objects}
 
 
 
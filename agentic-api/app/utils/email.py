@@ -1,24 +1,105 @@
+import json
 import os
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+import smtplib
+from datetime import datetime
+from email.message import EmailMessage
 
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
+EMAIL_FROM = os.getenv("EMAIL_FROM", "your_verified_sender@yourdomain.com")
+# sendgrid | smtp | file | console (default: sendgrid when a key is set, else console)
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "").strip().lower() or ("sendgrid" if SENDGRID_API_KEY else "console")
+EMAIL_SMTP_HOST = os.getenv("EMAIL_SMTP_HOST", "localhost")
+EMAIL_SMTP_PORT = int(os.getenv("EMAIL_SMTP_PORT", "1025"))
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", "sent_emails.jsonl")
+
+
+class EmailBackend:
+    """One connection per batch: `with backend: backend.send(...)`. send() raises on failure."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, to_email: str, subject: str, body: str) -> None:
+        raise NotImplementedError
+
+
+class ConsoleBackend(EmailBackend):
+    def send(self, to_email, subject, body):
+        print(f"Send to: {to_email}\nSubject: {subject}\n\n{body}\n")
+
+
+class FileBackend(EmailBackend):
+    """Appends one JSON line per message; for tests and local development."""
+
+    def send(self, to_email, subject, body):
+        with open(EMAIL_FILE_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "to": to_email, "from": EMAIL_FROM, "subject": subject, "body": body,
+                "sent_at": datetime.utcnow().isoformat(),
+            }) + "\n")
+
+
+class SMTPBackend(EmailBackend):
+    """Plain SMTP, e.g. a local MailHog / aiosmtpd catcher."""
+
+    def __enter__(self):
+        self._smtp = smtplib.SMTP(EMAIL_SMTP_HOST, EMAIL_SMTP_PORT, timeout=10)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._smtp.quit()
+        except smtplib.SMTPException:
+            pass
+        return False
+
+    def send(self, to_email, subject, body):
+        msg = EmailMessage()
+        msg["From"] = EMAIL_FROM
+        msg["To"] = to_email
+        msg["Subject"] = subject
+        msg.set_content(body, subtype="html")
+        self._smtp.send_message(msg)
+
+
+class SendGridBackend(EmailBackend):
+    def __enter__(self):
+        from sendgrid import SendGridAPIClient
+        self._client = SendGridAPIClient(SENDGRID_API_KEY)
+        return self
+
+    def send(self, to_email, subject, body):
+        from sendgrid.helpers.mail import Mail
+        message = Mail(
+            from_email=EMAIL_FROM,
+            to_emails=to_email,
+            subject=subject,
+            html_content=body,
+        )
+        response = self._client.send(message)
+        if response.status_code >= 300:
+            raise RuntimeError(f"SendGrid status code: {response.status_code}")
+
+
+BACKENDS = {
+    "console": ConsoleBackend,
+    "file": FileBackend,
+    "smtp": SMTPBackend,
+    "sendgrid": SendGridBackend,
+}
+
+
+def get_email_backend() -> EmailBackend:
+    return BACKENDS[EMAIL_BACKEND]()
+
 
 def send_email(to_email: str, subject: str, body: str):
-    # Always print for dev/test
-    print(f"Send to: {to_email}\nSubject: {subject}\n\n{body}\n")
-    if not SENDGRID_API_KEY:
-        print("SENDGRID_API_KEY not set, not sending real email.")
-        return
-    message = Mail(
-        from_email='your_verified_sender@yourdomain.com',
-        to_emails=to_email,
-        subject=subject,
-        html_content=body,
-    )
+    """Sends immediately. Request handlers should use app.service.email_outbox_service.enqueue_email."""
     try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
-        print("SendGrid status code:", response.status_code)
+        with get_email_backend() as backend:
+            backend.send(to_email, subject, body)
     except Exception as e:
-        print("SendGrid error:", e)
+        print("Email send error:", e)
@@ -1,13 +1,18 @@
 # app/utils/llm.py
-import os, asyncio
-from typing import Iterable, Optional, Dict, Any
-from openai import AsyncOpenAI, OpenAIError
+import os, asyncio, hashlib, json
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Iterable, Optional, Dict, Any, List
+
+from app.utils.llm_backends import LLMBackend, LLMError, LLM_BACKEND, make_backend
+from app.utils.llm_limits import llm_gate, estimate_tokens
 
 OPENAI_API_KEY = (os.getenv("OPENAI_API_KEY") or "").strip()
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini").strip()
-LLM_ENABLED = bool(OPENAI_API_KEY)
+LLM_TEMPERATURE = 0.2
 
-_client: Optional[AsyncOpenAI] = AsyncOpenAI(api_key=OPENAI_API_KEY) if LLM_ENABLED else None
+# LLM_BACKEND=fake swaps in the local stand-in (see app.utils.llm_backends)
+_backend: Optional[LLMBackend] = make_backend(LLM_BACKEND, OPENAI_API_KEY)
+LLM_ENABLED = _backend is not None
 
 SYSTEM_PROMPT = (
     "You are an AI assistant for a data governance platform. "
@@ -17,21 +22,127 @@ SYSTEM_PROMPT = (
     "(4) note false positives and caveats concisely."
 )
 
-async def ask_llm(messages: Iterable[Dict[str, str]], *, max_tokens: int = 600, timeout: float = 20.0) -> Dict[str, Any]:
-    if not LLM_ENABLED or _client is None:
-        return {"ok": False, "error": "LLM_NOT_CONFIGURED", "message": "OpenAI key not set"}
+class _Flight:
+    """One upstream call and the number of callers still waiting for it."""
 
-    try:
-        async def _call():
-            resp = await _client.chat.completions.create(
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[str]"):
+        self.task = task
+        self.waiters = 0
+
+
+# Identical prompts already in flight share one upstream call (single-flight)
+_inflight: Dict[str, _Flight] = {}
+
+
+def _flight_key(messages: List[Dict[str, str]], max_tokens: int) -> str:
+    payload = json.dumps([OPENAI_MODEL, LLM_TEMPERATURE, max_tokens, messages], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _forget_flight(key: str, flight: _Flight) -> None:
+    if _inflight.get(key) is flight:
+        del _inflight[key]
+    # Mark the exception retrieved even if every waiter timed out
+    if not flight.task.cancelled():
+        flight.task.exception()
+
+
+async def _gated_call(messages: List[Dict[str, str]], max_tokens: int, timeout: float, user_key: Optional[str]) -> str:
+    async def call() -> str:
+        async with llm_gate.slot(user_key, tokens=estimate_tokens(messages, max_tokens)):
+            return await _backend.complete(
+                [{"role": "system", "content": SYSTEM_PROMPT}, *messages],
                 model=OPENAI_MODEL,
-                messages=[{"role": "system", "content": SYSTEM_PROMPT}, *messages],
-                temperature=0.2,
+                temperature=LLM_TEMPERATURE,
                 max_tokens=max_tokens,
             )
-            return resp.choices[0].message.content
 
-        # Hard timeout guard
-        return {"ok": True, "answer": await asyncio.wait_for(_call(), timeout=timeout)}
-    except (asyncio.TimeoutError, OpenAIError) as e:
+    # The deadline covers the wait for a gate slot too: a call still queued
+    # when it passes never reaches the provider
+    return await asyncio.wait_for(call(), timeout=timeout)
+
+
+async def ask_llm(
+    messages: Iterable[Dict[str, str]],
+    *,
+    max_tokens: int = 600,
+    timeout: float = 20.0,
+    user_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    if _backend is None:
+        return {"ok": False, "error": "LLM_NOT_CONFIGURED", "message": "OpenAI key not set"}
+
+    messages = list(messages)
+    key = _flight_key(messages, max_tokens)
+    flight = _inflight.get(key)
+    if flight is None:
+        flight = _Flight(asyncio.ensure_future(_gated_call(messages, max_tokens, timeout, user_key)))
+        _inflight[key] = flight
+        flight.task.add_done_callback(lambda t, k=key, f=flight: _forget_flight(k, f))
+    else:
+        llm_gate.coalesced += 1
+
+    flight.waiters += 1
+    try:
+        # Shield so one caller giving up doesn't cancel the call other
+        # coalesced callers are waiting on
+        return {"ok": True, "answer": await asyncio.wait_for(asyncio.shield(flight.task), timeout=timeout)}
+    except (asyncio.TimeoutError, LLMError) as e:
         return {"ok": False, "error": "LLM_ERROR", "message": str(e)}
+    finally:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            # The last caller left (timed out or cancelled): nobody would read the answer,
+            # so free the gate slot / stop spending quota. Unlist it first so no new
+            # caller joins a call that is being cancelled.
+            if _inflight.get(key) is flight:
+                del _inflight[key]
+            flight.task.cancel()
+
+
+async def stream_llm(
+    messages: Iterable[Dict[str, str]],
+    *,
+    max_tokens: int = 600,
+    timeout: float = 20.0,
+    user_key: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Yields answer text as the model produces it. `timeout` bounds the wait for
+    a gate slot and for each chunk (including the first). Raises LLMError /
+    asyncio.TimeoutError.
+    Closing the generator early closes the upstream stream, so the provider
+    stops generating when the client goes away.
+    """
+    if _backend is None:
+        raise LLMError("OpenAI key not set")
+
+    messages = list(messages)
+    async with AsyncExitStack() as stack:
+        # Same deadline for the wait for a gate slot as for each chunk
+        try:
+            async with asyncio.timeout(timeout):
+                await stack.enter_async_context(llm_gate.slot(user_key, tokens=estimate_tokens(messages, max_tokens)))
+        except TimeoutError:
+            raise asyncio.TimeoutError(f"no LLM slot free within {timeout}s")
+        chunks = _backend.stream(
+            [{"role": "system", "content": SYSTEM_PROMPT}, *messages],
+            model=OPENAI_MODEL,
+            temperature=LLM_TEMPERATURE,
+            max_tokens=max_tokens,
+        )
+        try:
+            while True:
+                try:
+                    text = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    break
+                yield text
+        finally:
+            await chunks.aclose()
+
+
+def llm_metrics() -> Dict[str, Any]:
+    return {**llm_gate.metrics(), "inflight": len(_inflight), "backend": _backend.name if _backend else None}
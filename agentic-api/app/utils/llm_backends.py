@@ -0,0 +1,152 @@
+# app/utils/llm_backends.py
+"""
+Chat-completion backends behind app.utils.llm.
+
+`openai` talks to the real API. `fake` is a local, deterministic stand-in for
+load tests, benchmarks and air-gapped machines: it answers from a hash of the
+prompt, streams word by word and can simulate latency and rate-limit errors.
+Select with LLM_BACKEND (default: openai when OPENAI_API_KEY is set).
+
+The openai SDK takes about half a second to import, so it is only loaded
+when the first request reaches OpenAIBackend; its errors surface as LLMError.
+"""
+import asyncio
+import hashlib
+import os
+import random
+from typing import AsyncIterator, Dict, List, Optional
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "").strip().lower()
+
+# Stand-in behaviour (all optional)
+LLM_FAKE_LATENCY_MS = float(os.getenv("LLM_FAKE_LATENCY_MS", "300"))       # time to first token
+LLM_FAKE_JITTER_MS = float(os.getenv("LLM_FAKE_JITTER_MS", "0"))           # +/- uniform jitter on the above
+LLM_FAKE_TOKEN_MS = float(os.getenv("LLM_FAKE_TOKEN_MS", "15"))            # per streamed token
+LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", "0"))         # fraction of calls rate-limited
+LLM_FAKE_SEED = int(os.getenv("LLM_FAKE_SEED", "0"))
+
+_FAKE_WORDS = (
+    "review the flagged columns and apply masking where values are personal; "
+    "add not-null constraints for required fields and track null rates per table; "
+    "sampled values may include false positives so confirm with the data owner"
+).split()
+
+
+class LLMError(Exception):
+    """The backend failed to produce an answer (provider error, rate limit, ...)."""
+
+
+class SimulatedRateLimitError(LLMError):
+    """Raised by the fake backend in place of a provider 429."""
+
+
+class LLMBackend:
+    name = "base"
+
+    async def complete(self, messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int) -> str:
+        raise NotImplementedError
+
+    def stream(
+        self, messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int
+    ) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=self.api_key)
+        return self._client
+
+    async def complete(self, messages, *, model, temperature, max_tokens) -> str:
+        from openai import OpenAIError
+        try:
+            resp = await self.client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, max_tokens=max_tokens
+            )
+        except OpenAIError as e:
+            raise LLMError(str(e)) from e
+        return resp.choices[0].message.content
+
+    async def stream(self, messages, *, model, temperature, max_tokens) -> AsyncIterator[str]:
+        from openai import OpenAIError
+        try:
+            stream = await self.client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True
+            )
+        except OpenAIError as e:
+            raise LLMError(str(e)) from e
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except OpenAIError as e:
+            raise LLMError(str(e)) from e
+        finally:
+            # Closing the HTTP stream makes the provider stop generating
+            await stream.close()
+
+
+class FakeLLMBackend(LLMBackend):
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = LLM_FAKE_LATENCY_MS,
+        jitter_ms: float = LLM_FAKE_JITTER_MS,
+        token_ms: float = LLM_FAKE_TOKEN_MS,
+        error_rate: float = LLM_FAKE_ERROR_RATE,
+        seed: int = LLM_FAKE_SEED,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_ms = token_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def _answer_words(self, messages: List[Dict[str, str]], max_tokens: int) -> List[str]:
+        # Same prompt -> same answer, so caching and coalescing behave as with a real model
+        digest = hashlib.sha256("\n".join(m.get("content") or "" for m in messages).encode("utf-8")).digest()
+        n = min(max_tokens, 20 + digest[0] % 40)
+        start = digest[1] % len(_FAKE_WORDS)
+        return [f"[fake:{digest.hex()[:8]}]"] + [_FAKE_WORDS[(start + i) % len(_FAKE_WORDS)] for i in range(n)]
+
+    async def _first_token_delay(self) -> None:
+        self.calls += 1
+        jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        await asyncio.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise SimulatedRateLimitError("Rate limit reached (simulated)")
+
+    async def complete(self, messages, *, model, temperature, max_tokens) -> str:
+        words = self._answer_words(messages, max_tokens)
+        await self._first_token_delay()
+        await asyncio.sleep(self.token_ms * (len(words) - 1) / 1000)
+        return " ".join(words)
+
+    async def stream(self, messages, *, model, temperature, max_tokens) -> AsyncIterator[str]:
+        words = self._answer_words(messages, max_tokens)
+        await self._first_token_delay()
+        yield words[0]
+        for w in words[1:]:
+            await asyncio.sleep(self.token_ms / 1000)
+            yield " " + w
+
+
+def make_backend(name: str, api_key: str) -> Optional[LLMBackend]:
+    """Backend for `name` ("openai" / "fake"; empty picks openai if a key is set). None when unconfigured."""
+    name = name or ("openai" if api_key else "")
+    if name == "fake":
+        return FakeLLMBackend()
+    if name == "openai" and api_key:
+        return OpenAIBackend(api_key)
+    return None
@@ -0,0 +1,135 @@
+# app/utils/llm_cache.py
+"""
+Response cache for LLM answers.
+
+Two tiers: an in-process LRU with TTL, and an optional shared Redis tier so
+all API workers see each other's answers. Keys are namespaced by scan id so a
+scan's entries can be dropped when its profile data changes.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "900"))            # seconds
+LLM_CACHE_MAXSIZE = int(os.getenv("LLM_CACHE_MAXSIZE", "1024"))    # in-process entries
+LLM_CACHE_REDIS = os.getenv("LLM_CACHE_REDIS", "false").strip().lower() in ("1", "true", "yes")
+
+REDIS_PREFIX = "llm:resp:"
+NO_SCAN = "_"
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive form of a question."""
+    return _WS.sub(" ", question).strip().lower().rstrip("?.! ")
+
+
+def make_cache_key(
+    question: str,
+    context_text: str,
+    model: str,
+    params: Dict[str, Any],
+    scan_id: Optional[str] = None,
+) -> str:
+    digest = hashlib.sha256()
+    digest.update(normalize_question(question).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(hashlib.sha256(context_text.encode("utf-8")).digest())
+    digest.update(b"\0")
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return f"{scan_id or NO_SCAN}:{digest.hexdigest()}"
+
+
+class LLMResponseCache:
+    def __init__(self, maxsize: int = LLM_CACHE_MAXSIZE, ttl: int = LLM_CACHE_TTL, use_redis: bool = LLM_CACHE_REDIS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # --- local tier ---
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    # --- public API ---
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._get_local(key)
+        if value is None and self.use_redis:
+            try:
+                from app.redis_client import get_async_redis
+                raw = await get_async_redis().get(REDIS_PREFIX + key)
+                if raw:
+                    value = json.loads(raw)
+                    self._set_local(key, value)
+            except Exception as e:
+                log.warning("LLM cache redis get failed: %s", e)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._set_local(key, value)
+        if self.use_redis:
+            try:
+                from app.redis_client import get_async_redis
+                await get_async_redis().set(REDIS_PREFIX + key, json.dumps(value), ex=self.ttl)
+            except Exception as e:
+                log.warning("LLM cache redis set failed: %s", e)
+
+    def invalidate_scan(self, scan_id) -> int:
+        """
+        Drop every cached answer for a scan (sync; safe to call from Celery tasks).
+        Returns the number of local entries removed.
+        """
+        prefix = f"{scan_id}:"
+        stale = [k for k in self._entries if k.startswith(prefix)]
+        for k in stale:
+            del self._entries[k]
+        if self.use_redis:
+            try:
+                from app.redis_client import get_redis
+                client = get_redis()
+                keys = list(client.scan_iter(match=f"{REDIS_PREFIX}{prefix}*", count=500))
+                if keys:
+                    client.delete(*keys)
+            except Exception as e:
+                log.warning("LLM cache redis invalidation failed for scan %s: %s", scan_id, e)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl, "hits": self.hits, "misses": self.misses}
+
+
+response_cache = LLMResponseCache()
@@ -0,0 +1,149 @@
+# app/utils/llm_limits.py
+"""
+Admission control for upstream LLM calls.
+
+Every call passes through one gate: a per-user semaphore, a global semaphore,
+then request/token buckets paced to the provider's RPM/TPM limits. Time spent
+queueing is recorded so bursts show up in metrics before they show up as
+timeouts.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, Optional
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONCURRENCY_PER_USER = int(os.getenv("LLM_MAX_CONCURRENCY_PER_USER", "2"))
+LLM_RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", "500"))          # provider requests/minute
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "200000"))       # provider tokens/minute
+
+CHARS_PER_TOKEN = 4            # rough estimate; good enough for pacing
+WAIT_SAMPLES = 1024            # recent queue waits kept for percentiles
+
+
+def estimate_tokens(messages: Iterable[Dict[str, str]], max_tokens: int) -> int:
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // CHARS_PER_TOKEN + max_tokens
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` units per second, up to `per_minute`."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # A single request larger than the bucket would wait forever; let it drain the bucket instead.
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class LLMGate:
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_per_user: int = LLM_MAX_CONCURRENCY_PER_USER,
+        rpm: int = LLM_RPM_LIMIT,
+        tpm: int = LLM_TPM_LIMIT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._users: Dict[str, asyncio.Semaphore] = {}
+        self._user_refs: Dict[str, int] = {}
+        self._rpm = TokenBucket(rpm) if rpm > 0 else None
+        self._tpm = TokenBucket(tpm) if tpm > 0 else None
+
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.coalesced = 0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+
+    def _user_semaphore(self, user_key: str) -> asyncio.Semaphore:
+        sem = self._users.get(user_key)
+        if sem is None:
+            sem = self._users[user_key] = asyncio.Semaphore(self.max_per_user)
+        self._user_refs[user_key] = self._user_refs.get(user_key, 0) + 1
+        return sem
+
+    def _release_user(self, user_key: str) -> None:
+        self._user_refs[user_key] -= 1
+        if self._user_refs[user_key] == 0:
+            # No holders or waiters left; don't keep one semaphore per client forever
+            del self._user_refs[user_key]
+            del self._users[user_key]
+
+    @asynccontextmanager
+    async def slot(self, user_key: Optional[str] = None, tokens: int = 0):
+        """Hold a concurrency slot (and rate budget) for one upstream call."""
+        started = time.monotonic()
+        self.queued += 1
+        user_sem = self._user_semaphore(user_key) if user_key else None
+        held_user = held_global = admitted = False
+        try:
+            if user_sem is not None:
+                await user_sem.acquire()
+                held_user = True
+            await self._global.acquire()
+            held_global = True
+            if self._rpm is not None:
+                await self._rpm.acquire(1)
+            if self._tpm is not None and tokens:
+                await self._tpm.acquire(tokens)
+
+            self.queued -= 1
+            self.active += 1
+            self.admitted += 1
+            admitted = True
+            self._waits.append(time.monotonic() - started)
+            yield
+        finally:
+            if admitted:
+                self.active -= 1
+            else:
+                self.queued -= 1
+            if held_global:
+                self._global.release()
+            if held_user:
+                user_sem.release()
+            if user_sem is not None:
+                self._release_user(user_key)
+
+    def metrics(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2)
+
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "coalesced": self.coalesced,
+            "max_concurrency": self.max_concurrency,
+            "max_per_user": self.max_per_user,
+            "queue_wait_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "max": pct(1.0)},
+        }
+
+
+llm_gate = LLMGate()
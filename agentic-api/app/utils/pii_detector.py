@@ -9,6 +9,44 @@ PII_PATTERNS = [
     # Extend as needed
 ]
 
+def luhn_valid(number: str) -> bool:
+    digits = [int(d) for d in number if d.isdigit()]
+    total = 0
+    for i, d in enumerate(reversed(digits)):
+        if i % 2:
+            d = d * 2 - 9 if d > 4 else d * 2
+        total += d
+    return total % 10 == 0
+
+
+# Patterns matched against sampled cell values (not column names), with an
+# optional check on the match. They insist on the formatting people actually
+# use (separators, "+" prefixes, card prefixes and checksums), so plain integer
+# columns (ids, epoch millis, amounts) aren't taken for PII.
+VALUE_PATTERNS = [
+    ("email", r"^[\w.+-]+@[\w-]+\.[\w.-]+$", None),
+    # Dashed or spaced; area 000/666/9xx, group 00 and serial 0000 are never issued
+    ("ssn", r"^(?!000|666|9)\d{3}([- ])(?!00)\d{2}\1(?!0000)\d{4}$", None),
+    # E.164 ("+" and 8-15 digits), or grouped: optional country code, an area
+    # code (parenthesised or followed by a separator), then two groups of 3-4 digits
+    (
+        "phone",
+        r"^(?=(?:\D*\d){7,15}\D*$)(?!\d{1,3}(?:\.\d{1,3}){3}$)"
+        r"(?:\+\d{8,15}|(?:\+\d{1,3}[\s.-]?)?(?:\(\d{1,4}\)[\s.-]?|\d{1,4}[\s.-])\d{3,4}[\s.-]\d{3,4})$",
+        None,
+    ),
+    # Issuer prefixes 2-6 (Mastercard, Amex/Diners, Visa, Mastercard, Discover) and a valid Luhn checksum
+    ("credit_card", r"^[2-6](?:[ -]?\d){12,18}$", luhn_valid),
+]
+
+# Share of non-empty sampled values that must match before a value tag is
+# applied, and the minimum number of matches (a 1-row sample proves nothing)
+VALUE_MATCH_THRESHOLD = 0.6
+VALUE_MIN_MATCHES = 3
+
+_COMPILED_VALUE_PATTERNS = [(label, re.compile(p), check) for label, p, check in VALUE_PATTERNS]
+
+
 def detect_pii_tags(column_name: str):
     tags = []
     for label, pattern in PII_PATTERNS:
@@ -16,3 +54,21 @@ def detect_pii_tags(column_name: str):
             tags.append("pii")
             tags.append(label)
     return tags
+
+
+def detect_pii_value_tags(values, threshold: float = VALUE_MATCH_THRESHOLD, min_matches: int = VALUE_MIN_MATCHES):
+    """
+    Tag a column from a sample of its values.
+    A label is applied when at least `threshold` of the non-empty values, and
+    at least `min_matches` of them, match it.
+    """
+    values = [v.strip() for v in values if v and v.strip()]
+    if not values:
+        return []
+    tags = []
+    for label, pattern, check in _COMPILED_VALUE_PATTERNS:
+        hits = sum(1 for v in values if pattern.match(v) and (check is None or check(v)))
+        if hits >= min_matches and hits / len(values) >= threshold:
+            tags.append("pii")
+            tags.append(label)
+    return tags
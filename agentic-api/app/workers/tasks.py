@@ -5,6 +5,11 @@ from app.models.scan_job import ScanJob, ScanJobResult
 from app.models.data_source import DataSource
 from app.utils.data_source_scan import scan_data_source_metadata_by_type
 from app.service.scan_job_service import store_scan_metadata
+from app.service.pii_classification_service import classify_scan_metadata
+from app.service.scan_digest_service import build_scan_digests
+from app.service.email_outbox_service import deliver_pending_emails, BATCH_SIZE as EMAIL_BATCH_SIZE
+from app.crud.audit import rollover_audit_logs
+from app.service.result_store import compact_inline_results
 from app.db.session import SessionLocal
 from app.config import settings
 import json
@@ -31,7 +36,17 @@ def run_scan_job(scan_job_id: int):
         print(f"[TASK] Scanning metadata with db_names={db_names}, artifact_types={artifact_types}")
 
         metadata = scan_data_source_metadata_by_type(ds.type, ds.connection_string, db_names=db_names, artifact_types=artifact_types)
-        print(f"[TASK] Metadata scan complete. Storing metadata...")
+        print(f"[TASK] Metadata scan complete. Classifying columns...")
+
+        metadata = classify_scan_metadata(
+            metadata,
+            ds.type,
+            ds.connection_string,
+            db_names=db_names,
+            sample_size=settings.pii_sample_size,
+            workers=settings.pii_classify_workers,
+        )
+        print(f"[TASK] Classification done in {metadata['classification']['wall_ms']} ms. Storing metadata...")
 
         result = store_scan_metadata(db, scan_job_id, metadata)
         print(f"[TASK] Metadata stored! Result ID: {result.id if result else None}")
@@ -39,6 +54,13 @@ def run_scan_job(scan_job_id: int):
         job.status = "completed"
         db.commit()
         print(f"[INFO] Job {scan_job_id} completed and metadata stored")
+
+        # Digest stage: failures here must not fail the completed scan
+        try:
+            build_scan_digests(db, scan_job_id)
+        except Exception as e:
+            print(f"[ERROR] Digest stage failed for job {scan_job_id}: {e}")
+            db.rollback()
     except Exception as e:
         print(f"[ERROR] Error in scan job: {e}")
         traceback.print_exc()
@@ -48,3 +70,66 @@ def run_scan_job(scan_job_id: int):
             db.commit()
     finally:
         db.close()
+
+
+@celery_app.task(name='workers.tasks.build_scan_digests')
+def build_scan_digest_task(scan_id):
+    """Digest stage; also sent by the profiler when a profile run finishes."""
+    db = SessionLocal()
+    try:
+        count = build_scan_digests(db, scan_id)
+        print(f"[TASK] Stored {count} digests for scan {scan_id}")
+    except Exception as e:
+        print(f"[ERROR] Error building digests for scan {scan_id}: {e}")
+        traceback.print_exc()
+        db.rollback()
+    finally:
+        db.close()
+
+
+@celery_app.task(name='workers.tasks.send_email_outbox')
+def send_email_outbox_task():
+    """Drains one batch of the email outbox; re-queues itself while batches come back full."""
+    db = SessionLocal()
+    try:
+        counts = deliver_pending_emails(db)
+        if counts["claimed"]:
+            print(f"[TASK] Email outbox: {counts}")
+        if counts["claimed"] >= EMAIL_BATCH_SIZE:
+            send_email_outbox_task.delay()
+    except Exception as e:
+        print(f"[ERROR] Error delivering email outbox: {e}")
+        traceback.print_exc()
+        db.rollback()
+    finally:
+        db.close()
+
+
+@celery_app.task(name='workers.tasks.rollover_audit_logs')
+def rollover_audit_logs_task():
+    """Moves audit entries past the hot window into audit_logs_archive."""
+    db = SessionLocal()
+    try:
+        moved = rollover_audit_logs(db, settings.audit_hot_days)
+        print(f"[TASK] Rolled over {moved} audit entries")
+    except Exception as e:
+        print(f"[ERROR] Error rolling over audit logs: {e}")
+        traceback.print_exc()
+        db.rollback()
+    finally:
+        db.close()
+
+
+@celery_app.task(name='workers.tasks.compact_scan_results')
+def compact_scan_results_task():
+    """Moves scan results stored inline into compressed, deduplicated blobs."""
+    db = SessionLocal()
+    try:
+        moved = compact_inline_results(db)
+        print(f"[TASK] Compacted {moved} scan results")
+    except Exception as e:
+        print(f"[ERROR] Error compacting scan results: {e}")
+        traceback.print_exc()
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,159 @@
+"""
+Latency/throughput benchmark for /agentic-ai/ask and /agentic-ai/ask/stream.
+
+Runs the agentic-ai router in this process with the fake LLM backend by
+default (no API key), so the numbers cover context fetch, prompt build,
+caching and the LLM gate with a simulated model. The router is served by a
+real uvicorn server on a loopback port, not httpx's ASGI transport: that
+transport buffers whole response bodies, which would make the streaming
+first_token_ms equal to the total latency. Point --url at a running server
+to benchmark a real deployment instead.
+
+    python bench_agentic_ai.py --scan-id <scan> --requests 200 --concurrency 16
+    LLM_FAKE_LATENCY_MS=800 LLM_FAKE_ERROR_RATE=0.05 python bench_agentic_ai.py --endpoint stream
+    python bench_agentic_ai.py --url http://localhost:8000 --scan-id <scan>
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+import uvicorn
+
+QUESTIONS = [
+    "Summarize the data quality issues in this scan",
+    "Where is customer email stored and how should it be protected?",
+    "Explain the null rates in the orders tables",
+    "What masking would you recommend for the payment columns?",
+]
+
+
+def _percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def _serve_in_process() -> uvicorn.Server:
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    from fastapi import FastAPI
+    from app.api.routes.agentic_ai import router
+
+    app = FastAPI()
+    app.include_router(router, prefix="/agentic-ai")
+    # proxy_headers: the simulated users below are told apart by X-Forwarded-For
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=0, log_level="warning", proxy_headers=True, forwarded_allow_ips="*",
+    ))
+    server.task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        if server.task.done():
+            server.task.result()  # startup failed: raise its error
+        await asyncio.sleep(0.01)
+    return server
+
+
+def _in_process_clients(server: uvicorn.Server, users: int):
+    port = server.servers[0].sockets[0].getsockname()[1]
+    # One client address per simulated user, so per-user LLM limits apply as in production
+    return [
+        httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            headers={"X-Forwarded-For": f"10.0.{u // 250}.{u % 250 + 1}"},
+            timeout=60,
+        )
+        for u in range(users)
+    ]
+
+
+async def _one(client, args, i):
+    question = QUESTIONS[i % len(QUESTIONS)]
+    if not args.repeat:
+        # Unique question per request so every call goes through context + LLM
+        question = f"{question} (run {i})"
+    payload = {"question": question}
+    if args.scan_id:
+        payload["scan_id"] = args.scan_id
+
+    started = time.perf_counter()
+    first_token = None
+    if args.endpoint == "stream":
+        ok = True
+        async with client.stream("POST", "/agentic-ai/ask/stream", json=payload) as resp:
+            async for line in resp.aiter_lines():
+                if line.startswith("event: token") and first_token is None:
+                    first_token = time.perf_counter() - started
+                elif line.startswith("event: error"):
+                    ok = False
+        ok = ok and resp.status_code == 200
+        cached = False
+    else:
+        resp = await client.post("/agentic-ai/ask", json=payload)
+        ok = resp.status_code == 200
+        cached = ok and resp.json().get("cached", False)
+    return time.perf_counter() - started, first_token, ok, cached
+
+
+async def run(args):
+    server = None
+    if args.url:
+        clients = [httpx.AsyncClient(base_url=args.url, timeout=60)]
+    else:
+        server = await _serve_in_process()
+        clients = _in_process_clients(server, args.users or args.concurrency)
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(i):
+        async with sem:
+            return await _one(clients[i % len(clients)], args, i)
+
+    try:
+        for i in range(args.warmup):
+            await _one(clients[0], args, -1 - i)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(bounded(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        for client in clients:
+            await client.aclose()
+        if server is not None:
+            server.should_exit = True
+            await server.task
+
+    latencies = [r[0] * 1000 for r in results if r[2]]
+    ttfts = [r[1] * 1000 for r in results if r[2] and r[1] is not None]
+    report = {
+        "endpoint": args.endpoint,
+        "target": args.url or "in-process uvicorn (LLM_BACKEND=%s)" % os.environ.get("LLM_BACKEND", ""),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "users": len(clients),
+        "ok": len(latencies),
+        "errors": args.requests - len(latencies),
+        "cached": sum(1 for r in results if r[3]),
+        "throughput_rps": round(args.requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {p: round(_percentile(latencies, q), 1) for p, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))},
+    }
+    if ttfts:
+        report["first_token_ms"] = {p: round(_percentile(ttfts, q), 1) for p, q in (("p50", 0.5), ("p99", 0.99))}
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="base URL of a running API (default: in-process)")
+    parser.add_argument("--endpoint", choices=["ask", "stream"], default="ask")
+    parser.add_argument("--scan-id", help="scan to pull profiling context from")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=0, help="simulated clients in-process (default: --concurrency)")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeat", action="store_true", help="reuse questions (measures the cache path)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Bytes saved vs. added latency for response compression.
+
+Seeds a throwaway SQLite database (same data as bench_responses.py) and
+fetches the large endpoints with each Accept-Encoding through the real
+middleware stack. For every encoding it prints the wire size, the server-side
+p50 latency and the estimated total time at --mbps, so the CPU cost can be
+weighed against the transfer time it saves.
+
+    python bench_compression.py
+    python bench_compression.py --mbps 20 --metadata-kb 4096
+    COMPRESSION_GZIP_LEVEL=1 python bench_compression.py
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ENCODINGS = ["identity", "gzip", "br", "zstd"]
+
+
+async def run(app, endpoints, encodings, repeat: int, bytes_per_ms: float):
+    import httpx
+
+    # httpx.ASGITransport rather than TestClient: it decodes every encoding, zstd included
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        print(f"{'endpoint':28} {'encoding':9} {'KB':>8} {'saved':>6} {'p50 ms':>8} {'total ms':>9}")
+        for path in endpoints:
+            baseline = None
+            for encoding in encodings:
+                headers = {"Accept-Encoding": encoding}
+                resp = await client.get(path, headers=headers)
+                if resp.status_code != 200:
+                    print(f"{path:28} {encoding:9} HTTP {resp.status_code}")
+                    break
+                wire = resp.num_bytes_downloaded
+                if baseline is None:
+                    baseline = (wire, resp.content)
+                elif resp.content != baseline[1]:
+                    sys.exit(f"{path} with {encoding}: decoded body differs from identity")
+                samples = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    await client.get(path, headers=headers)
+                    samples.append((time.perf_counter() - started) * 1000)
+                p50 = statistics.median(samples)
+                saved = 1 - wire / baseline[0]
+                print(f"{path:28} {encoding:9} {wire / 1024:8.0f} {saved:6.0%} {p50:8.1f} {p50 + wire / bytes_per_ms:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--sources", type=int, default=1000)
+    parser.add_argument("--metadata-kb", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--mbps", type=float, default=50.0, help="client bandwidth for the total-time estimate")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_compression_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("COMPRESSION_CPU_BUDGET", "0")  # measure every response compressed
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from app.api.dependencies import admin_required, get_current_user
+    from app.core.compression import available_encodings, compression_stats
+    from app.db.init_db import init_db
+    from app.db.session import SessionLocal
+    from app.main import app
+    from bench_responses import _seed
+
+    user = SimpleNamespace(id=1, email="bench@example.com", role="admin", status="active")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[admin_required] = lambda: user
+
+    endpoints = ["/api/scan-jobs", "/api/scan-jobs/1/result", "/api/scan-jobs/1/export", "/admin/data-sources/"]
+    encodings = [e for e in ENCODINGS if e == "identity" or e in available_encodings()]
+
+    init_db()
+    with SessionLocal() as db:
+        _seed(db, args.jobs, args.sources, args.metadata_kb)
+    print(f"encodings: {', '.join(encodings)}; total = server p50 + transfer at {args.mbps:g} Mbit/s\n")
+    asyncio.run(run(app, endpoints, encodings, args.repeat, args.mbps * 1_000_000 / 8 / 1000))
+    print(f"\n{compression_stats.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Latency benchmark for the largest JSON endpoints.
+
+Seeds a throwaway SQLite database, then calls each endpoint in-process
+through TestClient (auth dependencies overridden) and prints median / p95
+latency and payload size. Run it on two checkouts to compare.
+
+    python bench_responses.py
+    python bench_responses.py --jobs 20000 --sources 2000 --metadata-kb 4096 --repeat 30
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+
+def _seed(db, jobs: int, sources: int, metadata_kb: int):
+    from app.models.data_source import DataSource
+    from app.models.scan_job import ScanJob, ScanJobResult
+
+    db.add_all(
+        DataSource(name=f"source-{i}", type="postgres", connection_string=f"postgresql://h{i}/db", is_active=True)
+        for i in range(sources)
+    )
+    db.flush()
+    start = datetime(2024, 1, 1)
+    db.add_all(
+        ScanJob(
+            data_source_id=1 + i % sources,
+            db_names=json.dumps([f"db_{i % 7}", f"db_{i % 11}"]),
+            artifact_types=json.dumps(["table", "view", "collection"]),
+            status="finished",
+            created_at=start + timedelta(minutes=i),
+            created_by=1,
+            finished_at=start + timedelta(minutes=i, seconds=30),
+        )
+        for i in range(jobs)
+    )
+    field = {"name": "customer_email", "types": ["varchar"], "nullable": True, "primary_key": False,
+             "row_count": 123456, "description": "Primary contact address for the account"}
+    objects, size = [], 0
+    while size < metadata_kb * 1024:
+        obj = {"name": f"table_{len(objects)}", "fields": [field] * 20}
+        objects.append(obj)
+        size += len(json.dumps(obj))
+    db.add(ScanJobResult(scan_job_id=1, metadata_json=json.dumps({"objects": objects}), created_at=start))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--sources", type=int, default=1000)
+    parser.add_argument("--metadata-kb", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_responses_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SECRET_KEY", "bench")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from fastapi.testclient import TestClient
+
+    from app.api.dependencies import admin_required, get_current_user
+    from app.db.session import SessionLocal
+    from app.main import app
+
+    user = SimpleNamespace(id=1, email="bench@example.com", role="admin", status="active")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[admin_required] = lambda: user
+
+    endpoints = [
+        ("GET /api/scan-jobs", "/api/scan-jobs"),
+        ("GET /api/scan-jobs/1/result", "/api/scan-jobs/1/result"),
+        ("GET /api/scan-jobs/1/result?inline_metadata=true", "/api/scan-jobs/1/result?inline_metadata=true"),
+        ("GET /admin/data-sources/", "/admin/data-sources/"),
+        ("GET /api/data-sources", "/api/data-sources"),
+    ]
+    with TestClient(app) as client:
+        with SessionLocal() as db:
+            _seed(db, args.jobs, args.sources, args.metadata_kb)
+        print(f"{args.jobs} scan jobs, {args.sources} data sources, ~{args.metadata_kb} KB scan metadata\n")
+        print(f"{'endpoint':48} {'p50 ms':>8} {'p95 ms':>8} {'KB':>8}")
+        for label, path in endpoints:
+            resp = client.get(path)
+            if resp.status_code != 200:
+                print(f"{label:48} HTTP {resp.status_code}")
+                continue
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                client.get(path)
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+            print(f"{label:48} {statistics.median(samples):8.1f} {p95:8.1f} {len(resp.content) / 1024:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
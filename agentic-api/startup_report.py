@@ -0,0 +1,75 @@
+"""
+Import-time report for the API (or a Celery worker) with an optional budget.
+
+Imports the target module in a fresh interpreter under `python -X importtime`
+and lists the slowest imports by cumulative time, grouped by top-level
+package. With --budget-ms it exits non-zero when the total import time is
+over budget, so CI can catch a heavy import creeping back into startup.
+
+    python startup_report.py                           # app.main
+    python startup_report.py --module app.celery_config --top 30
+    python startup_report.py --budget-ms 800 --runs 3  # best of 3 against the budget
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str):
+    """[(cumulative_us, self_us, depth, name)] for one cold import of `module`."""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///./startup_report.db")
+    env.setdefault("SECRET_KEY", "startup-report")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import {module} failed:\n{proc.stderr[-4000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            rows.append((int(cumulative_us), int(self_us), (len(indent) - 1) // 2, name))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20, help="slowest imports to list")
+    parser.add_argument("--runs", type=int, default=1, help="report the fastest of N cold imports")
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail when the total exceeds this")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(1, args.runs))]
+    rows = min(runs, key=lambda r: sum(c for c, _, depth, _ in r if depth == 0))
+    total_ms = sum(c for c, _, depth, _ in rows if depth == 0) / 1000
+
+    by_package = defaultdict(int)
+    for _, self_us, _, name in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {args.module}: {total_ms:.0f} ms total ({len(rows)} modules)\n")
+    print("Slowest imports (cumulative):")
+    for cumulative_us, _, depth, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {'  ' * min(depth, 6)}{name}")
+    print("\nBy top-level package (self time):")
+    for package, self_us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    if args.budget_ms:
+        verdict = "within" if total_ms <= args.budget_ms else "OVER"
+        print(f"\n{verdict} budget: {total_ms:.0f} ms / {args.budget_ms:.0f} ms")
+        if total_ms > args.budget_ms:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
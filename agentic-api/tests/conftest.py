@@ -0,0 +1,83 @@
+"""
+Test configuration: a throwaway SQLite database and in-memory rate limits.
+
+The settings are read when app.config is first imported, so the environment
+is set here, before any test module imports the app.
+"""
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+_TMP = tempfile.mkdtemp(prefix="agentic_api_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/test.db"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("RATE_LIMIT_STORAGE", "memory://")
+os.environ.setdefault("AUDIT_DURABILITY", "transaction")
+os.environ.setdefault("COMPRESSION_CPU_BUDGET", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "5")
+os.environ.setdefault("PASSWORD_HASH_EXECUTOR", "thread")
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.db.init_db import init_db
+    from app.main import app as fastapi_app
+
+    init_db()
+    return fastapi_app
+
+
+@pytest.fixture
+def admin_app(app):
+    """The app with authentication replaced by a fixed admin user."""
+    from app.api.dependencies import admin_required, get_current_user
+
+    user = SimpleNamespace(id=1, email="admin@example.com", role="admin", status="active")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[admin_required] = lambda: user
+    yield app
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def db(app):
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def profile_db():
+    """
+    Session on a private in-memory database with the profiler's tables
+    (profile_run, profile_result_column; not ours, so created by hand) and
+    scan_digests. Tests insert their own profile rows.
+    """
+    from app.models.scan_digest import ScanDigest
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE profile_run (id INTEGER PRIMARY KEY, scan_id TEXT)"))
+        conn.execute(text(
+            "CREATE TABLE profile_result_column (run_id INTEGER, table_name TEXT, column_name TEXT, data_type TEXT,"
+            " null_percent REAL, distinct_percent REAL, is_pii BOOLEAN, quality_score REAL)"
+        ))
+    ScanDigest.__table__.create(engine)
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def scan_data(app):
+    """Data sources, scan jobs and one (legacy, inline) scan result, as bench_responses.py seeds them."""
+    from app.db.session import SessionLocal
+    from bench_responses import _seed
+
+    with SessionLocal() as session:
+        _seed(session, jobs=30, sources=3, metadata_kb=16)
@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import text
+
+from app.service.ai_intent_router import MAX_LISTED, answer_structured_question, classify_intent
+
+
+@pytest.fixture
+def pii_db(profile_db):
+    profile_db.execute(text("INSERT INTO profile_run (id, scan_id) VALUES (1, 'scan-1')"))
+    # More PII columns than the old 1000-row fetch: 900 + 500 + 100
+    rows = [
+        {"table": table, "column": f"c{i:04d}", "pii": True}
+        for table, n in (("customers", 900), ("orders", 500), ("events", 100))
+        for i in range(n)
+    ] + [{"table": "orders", "column": f"plain{i}", "pii": False} for i in range(50)]
+    profile_db.execute(
+        text("INSERT INTO profile_result_column (run_id, table_name, column_name, is_pii) VALUES (1, :table, :column, :pii)"),
+        rows,
+    )
+    profile_db.commit()
+    return profile_db
+
+
+def test_classify_intent():
+    assert classify_intent("How many PII columns are there?") == "pii_count"
+    assert classify_intent("Which tables contain PII?") == "pii_tables"
+    assert classify_intent("Why do these tables contain PII?") is None
+
+
+def test_pii_count_is_exact_past_the_listing_limit(pii_db):
+    intent, answer = answer_structured_question(pii_db, "scan-1", "How many PII columns are there?")
+    assert intent == "pii_count"
+    assert answer == "Scan scan-1 has 1500 PII column(s) across 3 table(s)."
+
+
+def test_pii_column_listing_is_labelled_truncated(pii_db):
+    _, answer = answer_structured_question(pii_db, "scan-1", "Which columns contain PII?")
+    assert answer.startswith("PII columns in scan scan-1 (1500):")
+    assert f"(first {MAX_LISTED} shown, +{1500 - MAX_LISTED} more)" in answer
+
+
+def test_pii_tables_are_aggregated(pii_db):
+    _, answer = answer_structured_question(pii_db, "scan-1", "Which tables contain PII?", ["orders", "events"])
+    assert answer.splitlines() == [
+        "Tables with PII in scan scan-1 (2):",
+        "- orders (500 PII column(s))",
+        "- events (100 PII column(s))",
+    ]
@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api.routes import agentic_ai
+from app.service.scan_digest_service import ScanDigests
+from app.utils.context_index import ScanContextIndex
+from app.utils.llm_limits import llm_gate
+
+
+def test_batch_runs_questions_side_by_side_on_one_context(app, monkeypatch):
+    calls = []
+    loads = []
+    running = {"now": 0, "max": 0}
+
+    async def fake_ask_llm(messages, *, max_tokens, timeout, user_key):
+        calls.append(user_key)
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.05)
+        running["now"] -= 1
+        return {"ok": True, "answer": "ok"}
+
+    def fake_load_scan_context(db, scan_id):
+        loads.append(scan_id)
+        return ScanDigests(("scan digest", 3), {}), ScanContextIndex([])
+
+    async def no_fast_path(db, scan_id, question, scope_tables):
+        return None
+
+    monkeypatch.setattr(agentic_ai, "ask_llm", fake_ask_llm)
+    monkeypatch.setattr(agentic_ai, "_load_scan_context", fake_load_scan_context)
+    monkeypatch.setattr(agentic_ai, "_fast_path_answer", no_fast_path)
+    monkeypatch.setattr(agentic_ai, "LLM_ENABLED", True)
+    monkeypatch.setattr(agentic_ai, "LLM_CACHE_ENABLED", False)
+
+    questions = [f"Tell me something about topic {i}" for i in range(6)]
+    with TestClient(app) as client:
+        resp = client.post("/agentic-ai/ask/batch", json={"scan_id": "batch-scan", "questions": questions})
+    assert resp.status_code == 200
+    events = [line for line in resp.text.splitlines() if line.startswith("data: ")]
+    assert json.loads(events[-1][6:]) == {"answered": 6, "failed": 0}
+
+    assert loads == ["batch-scan"]
+    assert len(calls) == 6
+    # Not held to the per-user limit for single questions
+    assert llm_gate.max_per_user < running["max"] <= agentic_ai.BATCH_CONCURRENCY
+    assert agentic_ai._batch_slots == {}
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.audit import AuditWriter
+from app.models.audit_log import AuditLog
+
+
+def _row(object_type, object_id, action="update"):
+    return {
+        "user_id": 1,
+        "action": action,
+        "object_type": object_type,
+        "object_id": object_id,
+        "timestamp": datetime.utcnow(),
+        "details": None,
+    }
+
+
+def test_bad_row_is_dead_lettered_and_the_rest_written(db):
+    writer = AuditWriter(batch_size=10)
+    writer._buffer.extend(_row("poison-test", i) for i in range(3))
+    writer._buffer.append(_row("poison-test", 99, action=None))  # NOT NULL violation
+    writer._buffer.extend(_row("poison-test", i) for i in range(3, 6))
+
+    assert writer.flush() == 6
+    assert writer.stats() == {"buffered": 0, "written": 6, "failed_batches": 1, "dead_lettered": 1}
+    stored = db.query(AuditLog.object_id).filter(AuditLog.object_type == "poison-test").order_by(AuditLog.object_id).all()
+    assert [r.object_id for r in stored] == [0, 1, 2, 3, 4, 5]
+
+    # Later entries aren't held up
+    writer._buffer.append(_row("poison-test", 6))
+    assert writer.flush() == 1
+
+
+def test_transient_failure_keeps_the_batch(monkeypatch):
+    writer = AuditWriter(batch_size=10)
+    rows = [_row("transient-test", i) for i in range(3)]
+    writer._buffer.extend(rows)
+
+    def down(batch):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(writer, "_insert", down)
+    with pytest.raises(OperationalError):
+        writer.flush()
+    assert list(writer._buffer) == rows
+    assert writer.dead_lettered == 0
@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+from app.core.password_hasher import make_context
+from app.models.user import User
+
+
+def test_register_verify_login(app, db):
+    with TestClient(app) as client:
+        resp = client.post("/users/register", json={"email": "flow@example.com", "password": "s3cret-pass", "name": "Flow"})
+        assert resp.status_code == 201, resp.text
+
+        token = db.query(User.verification_token).filter(User.email == "flow@example.com").scalar()
+        assert client.get("/users/verify-email", params={"token": token}).status_code == 200
+
+        resp = client.post("/users/login", json={"email": "flow@example.com", "password": "s3cret-pass"})
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["token_type"] == "bearer"
+
+        resp = client.post("/users/login", json={"email": "flow@example.com", "password": "wrong"})
+        assert resp.status_code == 401
+
+
+def test_login_upgrades_outdated_hash(app, db):
+    # BCRYPT_ROUNDS is 5 in the tests, so a cost-4 hash is outdated
+    user = User(
+        email="rehash@example.com",
+        name="Rehash",
+        role="user",
+        hashed_password=make_context(4).hash("old-cost-pass"),
+        is_verified=True,
+        status="active",
+    )
+    db.add(user)
+    db.commit()
+    with TestClient(app) as client:
+        resp = client.post("/auth/login", data={"username": "rehash@example.com", "password": "old-cost-pass"})
+        assert resp.status_code == 200, resp.text
+    db.refresh(user)
+    assert user.hashed_password.startswith("$2b$05$")
+
+
+def test_blocking_callers_are_capped_below_the_threadpool():
+    import threading
+
+    import pytest
+
+    from app.core.password_hasher import PasswordHasher, PasswordHasherBusy, THREADPOOL_TOKENS
+
+    assert PasswordHasher(workers=4, max_pending=0).max_blocking < THREADPOOL_TOKENS
+    hasher = PasswordHasher(workers=1, max_pending=100, kind="thread", max_blocking=1)
+    release = threading.Event()
+    waiter = threading.Thread(target=hasher._run_blocking, args=(release.wait,))
+    waiter.start()
+    try:
+        while hasher.blocking == 0:
+            release.wait(0.001)
+        with pytest.raises(PasswordHasherBusy):
+            hasher._run_blocking(len, "x")
+        assert hasher.metrics()["rejected"] == 1
+    finally:
+        release.set()
+        waiter.join()
+        hasher.shutdown()
+    assert hasher._run_blocking(len, "x") == 1
+    assert hasher.blocking == 0 and hasher.pending == 0
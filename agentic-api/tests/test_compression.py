@@ -0,0 +1,36 @@
+import asyncio
+
+import httpx
+
+
+def _get(app, path, headers):
+    async def go():
+        # httpx.ASGITransport rather than TestClient: it decodes every encoding, zstd included
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(go())
+
+
+def test_304_carries_the_validator_of_the_compressed_200(admin_app, scan_data):
+    ok = _get(admin_app, "/api/scan-jobs", {"Accept-Encoding": "gzip"})
+    assert ok.status_code == 200
+    assert ok.headers["content-encoding"] == "gzip"
+    etag = ok.headers["etag"]
+    assert etag.startswith('W/"')
+
+    revalidated = _get(admin_app, "/api/scan-jobs", {"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert "Accept-Encoding" in revalidated.headers["vary"]
+
+
+def test_uncompressed_304_keeps_the_strong_etag(admin_app, scan_data):
+    ok = _get(admin_app, "/api/scan-jobs", {"Accept-Encoding": "identity"})
+    assert "content-encoding" not in ok.headers
+    etag = ok.headers["etag"]
+    assert etag.startswith('"')
+
+    revalidated = _get(admin_app, "/api/scan-jobs", {"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
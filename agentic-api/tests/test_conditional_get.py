@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+
+from app.models.data_source import DataSource
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+def _get(app, path, **headers):
+    with TestClient(app) as client:
+        return client.get(path, headers={**IDENTITY, **headers})
+
+
+def test_scan_result_revalidates_by_etag_and_date(admin_app, scan_data):
+    ok = _get(admin_app, "/api/scan-jobs/1/result")
+    assert ok.status_code == 200
+    assert ok.headers["cache-control"] == "private, no-cache"
+    etag, last_modified = ok.headers["etag"], ok.headers["last-modified"]
+
+    by_etag = _get(admin_app, "/api/scan-jobs/1/result", **{"If-None-Match": f'"other", {etag}'})
+    assert by_etag.status_code == 304
+    assert by_etag.content == b""
+    assert by_etag.headers["etag"] == etag
+
+    assert _get(admin_app, "/api/scan-jobs/1/result", **{"If-Modified-Since": last_modified}).status_code == 304
+    # If-None-Match takes precedence over If-Modified-Since
+    assert _get(admin_app, "/api/scan-jobs/1/result", **{"If-None-Match": '"other"', "If-Modified-Since": last_modified}).status_code == 200
+
+    inline = _get(admin_app, "/api/scan-jobs/1/result?inline_metadata=true", **{"If-None-Match": etag})
+    assert inline.status_code == 200
+    assert inline.headers["etag"] != etag
+
+
+def test_scan_job_list_revalidates(admin_app, scan_data):
+    ok = _get(admin_app, "/api/scan-jobs")
+    assert ok.status_code == 200
+    assert _get(admin_app, "/api/scan-jobs", **{"If-None-Match": ok.headers["etag"]}).status_code == 304
+
+
+def test_data_source_list_etag_changes_on_update(admin_app, scan_data, db):
+    ok = _get(admin_app, "/api/data-sources")
+    etag = ok.headers["etag"]
+    assert _get(admin_app, "/api/data-sources", **{"If-None-Match": etag}).status_code == 304
+
+    source = db.query(DataSource).filter(DataSource.name == "source-0").one()
+    source.connection_status = "ok"
+    db.commit()
+
+    changed = _get(admin_app, "/api/data-sources", **{"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
@@ -0,0 +1,31 @@
+from sqlalchemy import text
+
+from app.api.routes.agentic_ai import _load_scan_context
+from app.service.scan_digest_service import build_scan_digests
+
+
+def _profile_run(db, run_id, columns):
+    db.execute(text("INSERT INTO profile_run (id, scan_id) VALUES (:id, 'rescanned')"), {"id": run_id})
+    db.execute(
+        text("INSERT INTO profile_result_column (run_id, table_name, column_name, data_type) VALUES (:run, 'customers', :c, 'text')"),
+        [{"run": run_id, "c": c} for c in columns],
+    )
+    db.commit()
+
+
+def test_rescan_is_seen_before_the_cache_expires(profile_db):
+    _profile_run(profile_db, 1, ["email"])
+    build_scan_digests(profile_db, "rescanned")
+    _, index = _load_scan_context(profile_db, "rescanned")
+    assert len(index) == 1
+    _, again = _load_scan_context(profile_db, "rescanned")
+    assert again is index
+
+    # A second profile run: the cached index must not be served any more
+    _profile_run(profile_db, 2, ["phone"])
+    _, index = _load_scan_context(profile_db, "rescanned")
+    assert len(index) == 2
+
+    build_scan_digests(profile_db, "rescanned")
+    digests, _ = _load_scan_context(profile_db, "rescanned")
+    assert "columns=2" in digests.scan[0]
@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+
+from app import redis_client
+from app.service.conversation_service import ConversationStore, SessionBusy, new_session
+
+
+class FakeLock:
+    def __init__(self, held: dict, name: str, blocking_timeout: float):
+        self.held, self.name, self.blocking_timeout = held, name, blocking_timeout
+
+    async def acquire(self) -> bool:
+        deadline = time.monotonic() + self.blocking_timeout
+        while self.name in self.held:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.001)
+        self.held[self.name] = True
+        return True
+
+    async def release(self) -> None:
+        del self.held[self.name]
+
+
+class FakeRedis:
+    """The subset of redis.asyncio the store uses; shared by the 'workers' of a test."""
+
+    def __init__(self):
+        self.data, self.locks, self.down = {}, {}, False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis unreachable")
+
+    async def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value
+
+    async def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        self._check()
+        return FakeLock(self.locks, name, blocking_timeout)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_client, "get_async_redis", lambda: fake)
+    return fake
+
+
+def _session():
+    return new_session(owner="1.2.3.4", scan_id="s1", scope_tables=None, row_limit=10)
+
+
+async def _add_turn(store, session_id, question, pause=0.0):
+    async with store.lock(session_id):
+        session = await store.get(session_id)
+        await asyncio.sleep(pause)  # stands in for the LLM call
+        session["turns"].append({"q": question, "a": "ok"})
+        await store.put(session)
+
+
+def test_workers_see_each_others_turns(redis):
+    worker_a, worker_b = ConversationStore(use_redis=True), ConversationStore(use_redis=True)
+
+    async def go():
+        session = _session()
+        await worker_a.put(session)
+        await worker_a.get(session["id"])  # cached locally on A
+        await _add_turn(worker_b, session["id"], "from b")
+        await _add_turn(worker_a, session["id"], "from a")
+        return await worker_b.get(session["id"])
+
+    assert [t["q"] for t in asyncio.run(go())["turns"]] == ["from b", "from a"]
+
+
+def test_concurrent_turns_on_two_workers_are_both_kept(redis):
+    worker_a, worker_b = ConversationStore(use_redis=True), ConversationStore(use_redis=True)
+
+    async def go():
+        session = _session()
+        await worker_a.put(session)
+        await asyncio.gather(
+            _add_turn(worker_a, session["id"], "a", pause=0.01),
+            _add_turn(worker_b, session["id"], "b", pause=0.01),
+        )
+        return await worker_a.get(session["id"])
+
+    assert sorted(t["q"] for t in asyncio.run(go())["turns"]) == ["a", "b"]
+
+
+def test_session_ended_on_another_worker_is_gone(redis):
+    worker_a, worker_b = ConversationStore(use_redis=True), ConversationStore(use_redis=True)
+
+    async def go():
+        session = _session()
+        await worker_a.put(session)
+        await worker_b.delete(session["id"])
+        return await worker_a.get(session["id"])
+
+    assert asyncio.run(go()) is None
+
+
+def test_local_copy_is_the_fallback_while_redis_is_down(redis):
+    store = ConversationStore(use_redis=True)
+
+    async def go():
+        session = _session()
+        await store.put(session)
+        redis.down = True
+        await _add_turn(store, session["id"], "offline")
+        return await store.get(session["id"])
+
+    assert [t["q"] for t in asyncio.run(go())["turns"]] == ["offline"]
+
+
+def test_lock_held_elsewhere_too_long_raises_busy(redis, monkeypatch):
+    from app.service import conversation_service
+
+    monkeypatch.setattr(conversation_service, "SESSION_LOCK_WAIT_S", 0.01)
+    store = ConversationStore(use_redis=True)
+    redis.locks[conversation_service.REDIS_LOCK_PREFIX + "held"] = True
+
+    async def go():
+        async with store.lock("held"):
+            pass
+
+    with pytest.raises(SessionBusy):
+        asyncio.run(go())
+
+
+def test_in_process_store_expires_sessions():
+    store = ConversationStore(ttl=60, use_redis=False)
+
+    async def go():
+        session = _session()
+        await store.put(session)
+        assert await store.get(session["id"]) is session
+        session["updated_at"] -= 61
+        return await store.get(session["id"])
+
+    assert asyncio.run(go()) is None
@@ -0,0 +1,38 @@
+import time
+
+from app.models.email_outbox import EmailOutbox
+from app.service.email_outbox_service import enqueue_email, notify_outbox
+
+
+def _rows(db, key):
+    return db.query(EmailOutbox).filter(EmailOutbox.to_email == f"{key}@example.com").order_by(EmailOutbox.id).all()
+
+
+def test_repeated_requests_replace_the_pending_message(db):
+    for link in ("first", "second", "third"):
+        enqueue_email(db, "replace@example.com", "Password Reset Request", f"click: {link}", dedupe_key="reset:test-replace")
+        db.commit()
+    rows = _rows(db, "replace")
+    assert [(r.body, r.dedupe_key) for r in rows] == [("click: third", "reset:test-replace")]
+
+
+def test_key_is_reused_once_the_message_went_out(db):
+    enqueue_email(db, "resend@example.com", "Password Reset Request", "click: first", dedupe_key="reset:test-resend")
+    db.commit()
+    _rows(db, "resend")[0].status = "sent"
+    db.commit()
+
+    enqueue_email(db, "resend@example.com", "Password Reset Request", "click: second", dedupe_key="reset:test-resend")
+    db.commit()
+    rows = _rows(db, "resend")
+    assert [(r.status, r.body, r.dedupe_key) for r in rows] == [
+        ("sent", "click: first", None),
+        ("pending", "click: second", "reset:test-resend"),
+    ]
+
+
+def test_notify_does_not_wait_for_the_broker():
+    started = time.perf_counter()
+    notify_outbox()
+    notify_outbox()
+    assert time.perf_counter() - started < 0.5
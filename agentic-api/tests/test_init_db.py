@@ -0,0 +1,80 @@
+import hashlib
+import json
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.init_db import init_db
+
+# The three tables as they were before ETags (user-048) and result blobs (user-050)
+PRE_048_SCHEMA = [
+    """CREATE TABLE data_sources (
+        id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE, type VARCHAR NOT NULL,
+        connection_string VARCHAR NOT NULL, is_active BOOLEAN, created_by VARCHAR, connection_status VARCHAR)""",
+    """CREATE TABLE scan_jobs (
+        id INTEGER PRIMARY KEY, data_source_id INTEGER REFERENCES data_sources (id), db_names TEXT,
+        artifact_types TEXT, status VARCHAR, created_at DATETIME, created_by INTEGER, log_id INTEGER,
+        scheduled_time DATETIME, scheduled_cron VARCHAR, finished_at DATETIME, metadata_result_id VARCHAR)""",
+    """CREATE TABLE scan_job_results (
+        id INTEGER PRIMARY KEY, scan_job_id INTEGER REFERENCES scan_jobs (id),
+        metadata_json TEXT NOT NULL, created_at DATETIME)""",
+]
+
+PAYLOAD = json.dumps({"objects": [{"name": "customers"}]})
+
+
+def _old_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        for ddl in PRE_048_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO data_sources (id, name, type, connection_string) VALUES (1, 'legacy', 'postgres', 'x')"))
+        conn.execute(text(
+            "INSERT INTO scan_jobs (id, data_source_id, status, created_at, finished_at) "
+            "VALUES (1, 1, 'completed', '2024-01-01 00:00:00', '2024-01-01 00:05:00'), (2, 1, 'pending', '2024-01-02 00:00:00', NULL)"
+        ))
+        conn.execute(text("INSERT INTO scan_job_results (id, scan_job_id, metadata_json, created_at) VALUES (1, 1, :j, '2024-01-01 00:05:00')"), {"j": PAYLOAD})
+    return engine
+
+
+def test_init_db_upgrades_a_pre_etag_schema(tmp_path):
+    engine = _old_database(tmp_path)
+    init_db(bind=engine)
+
+    with engine.connect() as conn:
+        assert dict(conn.execute(text("SELECT id, updated_at FROM scan_jobs ORDER BY id")).all()) == {
+            1: "2024-01-01 00:05:00",
+            2: "2024-01-02 00:00:00",
+        }
+        assert conn.execute(text("SELECT updated_at FROM data_sources")).scalar() is not None
+        assert conn.execute(text("SELECT content_hash FROM scan_job_results")).scalar() == hashlib.sha256(PAYLOAD.encode()).hexdigest()
+    assert "scan_result_blobs" in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+def test_init_db_relaxes_metadata_json_on_sqlite(tmp_path):
+    engine = _old_database(tmp_path)
+    init_db(bind=engine)
+    init_db(bind=engine)  # idempotent
+
+    column = next(c for c in inspect(engine).get_columns("scan_job_results") if c["name"] == "metadata_json")
+    assert column["nullable"]
+    with engine.begin() as conn:
+        # Rows survive the table rebuild, and blob-backed rows can now be written
+        assert conn.execute(text("SELECT metadata_json FROM scan_job_results WHERE id = 1")).scalar() == PAYLOAD
+        conn.execute(text("INSERT INTO scan_job_results (scan_job_id, metadata_json, content_hash) VALUES (2, NULL, 'abc')"))
+    engine.dispose()
+
+
+def test_init_db_indexes_an_existing_audit_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/audit.db")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, action VARCHAR NOT NULL, "
+            "object_type VARCHAR NOT NULL, object_id INTEGER NOT NULL, timestamp DATETIME NOT NULL, details TEXT)"
+        ))
+    init_db(bind=engine)
+    init_db(bind=engine)  # idempotent
+
+    names = {ix["name"] for ix in inspect(engine).get_indexes("audit_logs")}
+    assert {"ix_audit_logs_ts_user_objtype", "ix_audit_logs_user_ts", "ix_audit_logs_object_ts"} <= names
+    engine.dispose()
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.utils import llm
+from app.utils.llm_backends import LLMBackend
+from app.utils.llm_limits import LLMGate
+
+
+class SlowBackend(LLMBackend):
+    name = "slow"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.started = 0
+        self.finished = 0
+
+    async def complete(self, messages, *, model, temperature, max_tokens):
+        self.started += 1
+        await asyncio.sleep(self.delay)
+        self.finished += 1
+        return "answer"
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    def install(delay, gate=None):
+        backend = SlowBackend(delay)
+        monkeypatch.setattr(llm, "_backend", backend)
+        monkeypatch.setattr(llm, "llm_gate", gate or LLMGate(max_concurrency=4, rpm=0, tpm=0))
+        return backend
+
+    return install
+
+
+def test_timed_out_call_never_reaches_the_provider(backend):
+    gate = LLMGate(max_concurrency=1, rpm=0, tpm=0)
+    slow = backend(0.0, gate)
+
+    async def scenario():
+        async with gate.slot():  # the only slot is taken for the whole call below
+            result = await llm.ask_llm([{"role": "user", "content": "queued"}], timeout=0.05)
+        await asyncio.sleep(0.05)  # let a leftover task grab the freed slot, if there were one
+        return result
+
+    result = asyncio.run(scenario())
+    assert result["ok"] is False
+    assert slow.started == 0
+    assert llm._inflight == {}
+    assert gate.queued == 0 and gate.active == 0
+
+
+def test_last_waiter_leaving_cancels_the_call(backend):
+    slow = backend(0.2)
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(llm.ask_llm([{"role": "user", "content": "q"}], timeout=5)) for _ in range(2)]
+        await asyncio.sleep(0.02)
+        for w in waiters:
+            w.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0.3)
+
+    asyncio.run(scenario())
+    assert slow.started == 1
+    assert slow.finished == 0
+    assert llm._inflight == {}
+
+
+def test_call_continues_while_a_coalesced_waiter_remains(backend):
+    slow = backend(0.1)
+
+    async def scenario():
+        question = [{"role": "user", "content": "shared"}]
+        leaving = asyncio.ensure_future(llm.ask_llm(question, timeout=5))
+        staying = asyncio.ensure_future(llm.ask_llm(question, timeout=5))
+        await asyncio.sleep(0.02)
+        leaving.cancel()
+        return await staying
+
+    assert asyncio.run(scenario()) == {"ok": True, "answer": "answer"}
+    assert slow.started == slow.finished == 1
+
+
+def test_stream_waiting_for_a_slot_times_out(backend):
+    gate = LLMGate(max_concurrency=1, rpm=0, tpm=0)
+    slow = backend(0.0, gate)
+    streamed = []
+
+    async def stream(messages, **kwargs):
+        streamed.append(messages)
+        yield "never"
+
+    slow.stream = stream
+
+    async def scenario():
+        async with gate.slot():
+            with pytest.raises(asyncio.TimeoutError):
+                async for _ in llm.stream_llm([{"role": "user", "content": "queued"}], timeout=0.05):
+                    pass
+
+    asyncio.run(scenario())
+    assert streamed == []
+    assert gate.queued == 0 and gate.active == 0
@@ -0,0 +1,79 @@
+import sqlalchemy
+
+from app.service import pii_classification_service
+from app.utils.pii_detector import detect_pii_value_tags, luhn_valid
+
+
+def _tags(values):
+    return [t for t in detect_pii_value_tags(values) if t != "pii"]
+
+
+def test_formatted_values_are_tagged():
+    assert _tags(["123-45-6789", "234-56-7890", "345-67-8901"]) == ["ssn"]
+    assert _tags(["(555) 123-4567", "+1 555 123 4567", "555.123.4567", "+4915112345678"]) == ["phone"]
+    assert _tags(["4111 1111 1111 1111", "5555-5555-5555-4444", "378282246310005"]) == ["credit_card"]
+    assert _tags(["a@example.com", "b.c@example.org", "d+e@example.net"]) == ["email"]
+
+
+def test_plain_numbers_are_not_pii():
+    assert _tags(["1700000000123", "1700000004567", "1700000008901", "1700000012345"]) == []  # epoch millis
+    assert _tags(["123456789", "234567890", "345678901"]) == []  # bare 9 digits
+    assert _tags(["9007199254740993", "9007199254740994", "9007199254740995"]) == []  # bigint ids
+    assert _tags(["4111111111111112", "4111111111111113", "4111111111111114"]) == []  # fail Luhn
+    assert _tags(["15.01.2023", "192.168.100.200", "12.345678"]) == []  # dates, IPs, decimals
+    assert _tags(["000-12-3456", "666-12-3456", "900-12-3456"]) == []  # never-issued SSN areas
+
+
+def test_share_and_minimum_matches():
+    assert _tags(["123-45-6789"]) == []
+    assert _tags(["123-45-6789", "234-56-7890", "345-67-8901", "n/a", "unknown", "-"]) == []
+    assert _tags(["123-45-6789", "234-56-7890", "345-67-8901", "n/a"]) == ["ssn"]
+
+
+def test_luhn():
+    assert luhn_valid("4111 1111 1111 1111")
+    assert not luhn_valid("4111 1111 1111 1112")
+
+
+def test_sql_sampling_disposes_its_engine(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path}/src.db"
+    with sqlalchemy.create_engine(url).begin() as conn:
+        conn.execute(sqlalchemy.text("CREATE TABLE people (email TEXT)"))
+        conn.execute(sqlalchemy.text("INSERT INTO people VALUES ('a@example.com')"))
+
+    engines = []
+    real_create_engine = sqlalchemy.create_engine
+
+    def tracking_create_engine(*args, **kwargs):
+        engine = real_create_engine(*args, **kwargs)
+        engines.append(engine)
+        return engine
+
+    monkeypatch.setattr(sqlalchemy, "create_engine", tracking_create_engine)
+    metadata = {"objects": [{"object_type": "table_column", "table": "people", "name": "email"}]}
+    samples = pii_classification_service.sample_sql_columns(url, metadata, sample_size=10)
+    assert samples == {("people", "email"): ["a@example.com"]}
+    (engine,) = engines
+    assert engine.pool.checkedin() == 0  # disposed: the pool was replaced by an empty one
+
+
+def test_pool_classification_matches_serial_from_a_worker_thread():
+    import threading
+
+    from app.service.pii_classification_service import MIN_COLUMNS_FOR_POOL, classify_columns
+
+    keys = [("people", f"email_{i}") if i % 3 == 0 else ("people", f"note_{i}") for i in range(MIN_COLUMNS_FOR_POOL + 8)]
+    samples = {key: ["a.person@example.com"] * 5 if i % 2 else ["nothing to see"] * 5 for i, key in enumerate(keys)}
+    serial_tags, _, serial_workers = classify_columns(keys, samples, workers=1)
+
+    result = {}
+    # As under Celery's threads pool: the parent is not a daemonic process, so the pool starts
+    worker = threading.Thread(target=lambda: result.update(out=classify_columns(keys, samples, workers=2)))
+    worker.start()
+    worker.join()
+    tags, timings, workers = result["out"]
+
+    assert serial_workers == 1 and workers == 2
+    assert tags == serial_tags
+    assert len(timings) == len(keys)
+    assert any("email" in t for t in tags)
@@ -0,0 +1,50 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.db.replicas import STICKY_COOKIE, ReplicaRouter, _Replica, replica_router
+
+# Nothing listens on port 1: connecting is refused at once
+UNREACHABLE = "postgresql+psycopg2://u:p@127.0.0.1:1/db"
+
+
+def test_sync_read_fails_over_to_primary(app):
+    router = ReplicaRouter([UNREACHABLE], sticky_seconds=10)
+    db = router.read_session(None)
+    try:
+        assert "replica" not in db.info
+        assert db.get_bind().url.get_backend_name() == "sqlite"
+    finally:
+        db.close()
+    assert router.stats()["replicas"] == [{"name": "replica0", "healthy": False}]
+    assert router.routed["failover"] == 1
+    # Marked down: the next read goes straight to the primary
+    router.read_session(None).close()
+    assert router.routed == {"primary": 1, "replica": 1, "sticky": 0, "failover": 1}
+
+
+def test_async_read_fails_over_to_primary(app):
+    router = ReplicaRouter([UNREACHABLE], sticky_seconds=10)
+
+    async def read():
+        async with await router.async_read_session(None) as db:
+            assert "replica" not in db.info
+            return db.get_bind().url.get_backend_name()
+
+    assert asyncio.run(read()) == "sqlite"
+    assert router.stats()["replicas"] == [{"name": "replica0", "healthy": False}]
+    assert router.routed["failover"] == 1
+
+
+def test_only_declared_writes_pin_reads(admin_app, monkeypatch):
+    monkeypatch.setattr(replica_router, "replicas", [_Replica(0, UNREACHABLE)])
+    monkeypatch.setattr(replica_router, "_recent_writers", type(replica_router._recent_writers)())
+    with TestClient(admin_app) as client:
+        # A POST that doesn't write
+        resp = client.post("/fields/validate", json={"field_name": "amount"})
+        assert resp.status_code == 200
+        assert STICKY_COOKIE not in resp.cookies
+
+        resp = client.post("/admin/data-sources/", json={"name": "pin-test", "type": "postgresql", "connection_string": "sqlite://"})
+        assert resp.status_code == 201, resp.text
+        assert STICKY_COOKIE in resp.cookies
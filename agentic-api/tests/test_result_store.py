@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.init_db import init_db
+from app.models.scan_job import ScanJob, ScanJobResult, ScanResultBlob
+from app.service.result_store import compact_inline_results, load_result_json, store_result_payload
+
+PAYLOAD = json.dumps({"objects": [{"name": f"table_{i}", "fields": [{"name": "email", "types": ["varchar"]}] * 5} for i in range(50)]})
+
+
+@pytest.fixture
+def store_db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/store.db")
+    init_db(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(ScanJob(id=1, status="completed"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _blob_count(db):
+    return db.scalar(select(func.count()).select_from(ScanResultBlob))
+
+
+def test_identical_payloads_share_one_blob(store_db):
+    first = store_result_payload(store_db, PAYLOAD)
+    second = store_result_payload(store_db, PAYLOAD)
+    other = store_result_payload(store_db, json.dumps({"objects": []}))
+    store_db.commit()
+
+    assert first == second != other
+    assert _blob_count(store_db) == 2
+    blob = store_db.get(ScanResultBlob, first)
+    assert blob.encoding == "zstd"
+    assert blob.size == len(PAYLOAD.encode()) > len(blob.data)
+
+
+def test_load_reads_inline_and_blob_results(store_db):
+    inline = ScanJobResult(scan_job_id=1, metadata_json=PAYLOAD)
+    stored = ScanJobResult(scan_job_id=1, content_hash=store_result_payload(store_db, PAYLOAD))
+    store_db.add_all([inline, stored])
+    store_db.commit()
+
+    assert inline.content_hash == stored.content_hash
+    assert load_result_json(store_db, inline) == load_result_json(store_db, stored) == PAYLOAD
+
+    missing = ScanJobResult(scan_job_id=1, content_hash="0" * 64)
+    with pytest.raises(LookupError):
+        load_result_json(store_db, missing)
+
+
+def test_compaction_moves_inline_results_into_blobs(store_db):
+    store_db.add_all(ScanJobResult(scan_job_id=1, metadata_json=PAYLOAD) for _ in range(5))
+    store_db.add(ScanJobResult(scan_job_id=1, metadata_json="{}"))
+    store_db.commit()
+
+    assert compact_inline_results(store_db, batch_size=2) == 6
+    assert compact_inline_results(store_db) == 0
+    results = store_db.execute(select(ScanJobResult).order_by(ScanJobResult.id)).scalars().all()
+    assert all(r.metadata_json is None for r in results)
+    assert _blob_count(store_db) == 2
+    assert [load_result_json(store_db, r) for r in results] == [PAYLOAD] * 5 + ["{}"]
+
+
+def _get(app, path, headers):
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(go())
+
+
+def test_zstd_envelope_decodes_like_identity(admin_app, scan_data, db):
+    job = ScanJob(data_source_id=1, status="completed", created_by=1)
+    db.add(job)
+    db.flush()
+    db.add(ScanJobResult(scan_job_id=job.id, content_hash=store_result_payload(db, PAYLOAD)))
+    db.commit()
+    path = f"/api/scan-jobs/{job.id}/result?inline_metadata=true"
+
+    plain = _get(admin_app, path, {"Accept-Encoding": "identity"})
+    passthrough = _get(admin_app, path, {"Accept-Encoding": "zstd"})
+
+    assert "content-encoding" not in plain.headers
+    assert passthrough.headers["content-encoding"] == "zstd"
+    assert passthrough.headers["etag"] == f"W/{plain.headers['etag']}"
+    assert "Accept-Encoding" in passthrough.headers["vary"]
+    assert passthrough.content == plain.content  # httpx decodes the multi-frame stream
+    assert passthrough.json()["metadata_json"] == json.loads(PAYLOAD)
+
+
+def test_rescanning_unchanged_metadata_reuses_the_blob(store_db):
+    import copy
+    from app.service.pii_classification_service import classify_scan_metadata
+    from app.service.scan_job_service import store_scan_metadata
+
+    metadata = {"objects": [{"name": "customers", "fields": [{"name": "email"}] + [{"name": f"col_{i}"} for i in range(3)]}]}
+    results = [
+        store_scan_metadata(store_db, 1, classify_scan_metadata(copy.deepcopy(metadata), "api", "", sample_size=0, workers=1))
+        for _ in range(2)
+    ]
+
+    assert results[0].content_hash == results[1].content_hash
+    assert _blob_count(store_db) == 1
+    assert "classification" not in json.loads(load_result_json(store_db, results[0]))
+    assert json.loads(results[1].classification_json)["columns"] == 4
@@ -0,0 +1,74 @@
+from sqlalchemy import text
+
+from app.models.scan_digest import ScanDigest
+from app.service import scan_digest_service
+from app.service.scan_digest_service import build_scan_digests, digest_version, get_scan_digests
+
+
+def _profile(db, scan_id, run_id, columns):
+    db.execute(text("INSERT INTO profile_run (id, scan_id) VALUES (:id, :scan)"), {"id": run_id, "scan": scan_id})
+    db.execute(
+        text("INSERT INTO profile_result_column (run_id, table_name, column_name, data_type, is_pii) VALUES (:run, :t, :c, 'text', :pii)"),
+        [{"run": run_id, "t": t, "c": c, "pii": pii} for t, c, pii in columns],
+    )
+    db.commit()
+
+
+def _count_profile_reads(monkeypatch):
+    calls = []
+    original = scan_digest_service.get_profile_columns
+
+    def counting(db, scan_id, limit):
+        calls.append(scan_id)
+        return original(db, scan_id, limit)
+
+    monkeypatch.setattr(scan_digest_service, "get_profile_columns", counting)
+    return calls
+
+
+def test_undigested_scan_is_computed_read_only_and_cached(profile_db, monkeypatch):
+    _profile(profile_db, "s-undigested", 1, [("users", "email", True), ("users", "id", False)])
+    reads = _count_profile_reads(monkeypatch)
+
+    version = digest_version(profile_db, "s-undigested")
+    assert version is None
+    digests = get_scan_digests(profile_db, "s-undigested", version)
+    assert "pii_columns=1" in digests.scan[0]
+    assert set(digests.tables) == {"users"}
+    # Nothing written on the request path
+    assert profile_db.query(ScanDigest).count() == 0
+    assert not profile_db.new and not profile_db.dirty
+
+    assert get_scan_digests(profile_db, "s-undigested", version) is digests
+    assert reads == ["s-undigested"]
+
+
+def test_scan_without_profile_rows_is_cached(profile_db, monkeypatch):
+    reads = _count_profile_reads(monkeypatch)
+    for _ in range(3):
+        digests = get_scan_digests(profile_db, "s-empty", digest_version(profile_db, "s-empty"))
+        assert digests.scan is None and digests.tables == {}
+    assert reads == ["s-empty"]
+
+
+def test_rebuild_changes_the_version(profile_db):
+    _profile(profile_db, "s-rebuilt", 2, [("orders", "card", True)])
+    before = get_scan_digests(profile_db, "s-rebuilt", digest_version(profile_db, "s-rebuilt"))
+    assert "pii_columns=1" in before.scan[0]
+
+    assert build_scan_digests(profile_db, "s-rebuilt") == 2
+    _profile(profile_db, "s-rebuilt", 3, [("orders", "ssn", True)])
+    build_scan_digests(profile_db, "s-rebuilt")
+    version = digest_version(profile_db, "s-rebuilt")
+    assert version is not None
+    after = get_scan_digests(profile_db, "s-rebuilt", version)
+    assert "pii_columns=2" in after.scan[0]
+
+
+def test_profile_run_landing_after_a_query_is_picked_up(profile_db):
+    empty = get_scan_digests(profile_db, "s-late", digest_version(profile_db, "s-late"))
+    assert empty.scan is None
+
+    _profile(profile_db, "s-late", 4, [("accounts", "email", True)])
+    digests = get_scan_digests(profile_db, "s-late", digest_version(profile_db, "s-late"))
+    assert set(digests.tables) == {"accounts"}
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app import redis_client
+from app.core.user_cache import UserCache
+from app.models.user import User
+
+
+class AsyncDict:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+@pytest.fixture
+def shared_redis(monkeypatch):
+    fake = AsyncDict()
+
+    def sync_client():
+        raise AssertionError("sync Redis client used from async code")
+
+    monkeypatch.setattr(redis_client, "get_async_redis", lambda: fake)
+    monkeypatch.setattr(redis_client, "get_redis", sync_client)
+    return fake
+
+
+def test_async_lookups_share_users_through_async_redis(shared_redis):
+    worker_a, worker_b = UserCache(ttl=30, use_redis=True), UserCache(ttl=30, use_redis=True)
+    user = User(id=7, email="cached@example.com", role="admin", status="active", is_active=True, is_verified=True, name="C")
+
+    async def go():
+        await worker_a.aset(user.email, user)
+        return await worker_b.aget(user.email), await worker_b.aget("unknown@example.com")
+
+    found, missing = asyncio.run(go())
+    assert (found.id, found.role) == (7, "admin")
+    assert missing is None
+    assert worker_b.stats()["hits"] == 1 and worker_b.stats()["misses"] == 1
+
+
+def test_authenticated_request_uses_the_async_cache(app, shared_redis, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.api import dependencies
+    from app.core.security import create_access_token
+
+    monkeypatch.setattr(dependencies, "user_cache", UserCache(ttl=30, use_redis=True))
+    with TestClient(app) as client:
+        client.post("/users/register", json={"email": "cache-user@example.com", "password": "pw-123456"})
+        token = create_access_token({"sub": "cache-user@example.com"})
+        for _ in range(2):
+            resp = client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+            assert resp.status_code == 200, resp.text
+    assert "auth:user:cache-user@example.com" in shared_redis.data
@@ -0,0 +1,23 @@
+import asyncio
+
+from app.crud.user import create_user
+from app.crud.user_search import count_users
+from app.service.user_import_service import import_users
+
+
+async def _rows(*emails):
+    for i, email in enumerate(emails, start=1):
+        yield i, {"email": email, "password": "secret"}, None
+
+
+def test_create_user_refreshes_the_count(app, db):
+    before = count_users(db)
+    create_user(db, {"email": "counted@example.com", "hashed_password": "!", "is_verified": True})
+    assert count_users(db) == before + 1
+
+
+def test_import_refreshes_the_count(app, db):
+    before = count_users(db)
+    result = asyncio.run(import_users(db, _rows("imp1@example.com", "imp2@example.com")))
+    assert result["created"] == 2
+    assert count_users(db) == before + 2
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.schemas.user import BulkUserUpdate
+from app.service.user_import_service import parse_import
+
+
+async def _body(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _parse(data: bytes, size: int = 7):
+    async def go():
+        return [row async for row in parse_import("text/csv", _body(data, size))]
+
+    return asyncio.run(go())
+
+
+CSV = (
+    "\ufeffemail,name,role\r\n"
+    'a@example.com,"Smith, ""Jr""",user\r\n'
+    "\r\n"
+    'b@example.com,"two\nlines",admin\r\n'
+    'c@example.com,O"Brien,user\r\n'
+    "d@example.com,Dee,user"
+).encode()
+
+
+def test_csv_rows_follow_csv_quoting_across_chunks():
+    for size in (1, 7, 4096):
+        rows = _parse(CSV, size)
+        assert [(no, data["email"], data["name"]) for no, data, _ in rows] == [
+            (1, "a@example.com", 'Smith, "Jr"'),
+            (2, "b@example.com", "two\nlines"),
+            (3, "c@example.com", 'O"Brien'),
+            (4, "d@example.com", "Dee"),
+        ]
+
+
+def test_csv_extra_columns_are_reported_per_row():
+    rows = _parse(b"email,name\nx@example.com,X,extra\ny@example.com,Y\n")
+    assert rows[0] == (1, None, "expected 2 columns, got 3")
+    assert rows[1][1]["email"] == "y@example.com"
+
+
+def test_import_rejects_unknown_role(admin_app):
+    from fastapi.testclient import TestClient
+
+    body = b"email,role,password\nroot@example.com,root,secret\nok-import@example.com,user,secret\n"
+    with TestClient(admin_app) as client:
+        r = client.post("/admin/users/import", content=body, headers={"Content-Type": "text/csv"})
+    assert r.status_code == 200
+    result = r.json()
+    assert result["created"] == 1
+    assert result["errors"][0]["row"] == 1
+    assert result["errors"][0]["error"].startswith("role:")
+
+
+def test_bulk_update_rejects_unknown_status(admin_app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(admin_app) as client:
+        r = client.post("/admin/users/bulk-update", json={"user_ids": [1], "status": "banned"})
+    assert r.status_code == 422
+    assert BulkUserUpdate(user_ids=[1], role="admin", status="inactive").role == "admin"